@@ -0,0 +1,416 @@
+"""Local REST/JSON admin API.
+
+An optional HTTP server on localhost for managing the catalog without the
+touchscreen, e.g. from a laptop over SSH port forwarding or from scripts.
+It runs on its own thread; every read of app state and every write is
+handed to the Tk thread (through the asyncio bridge's Tk queue), and
+writes go through MainApp.update_item, so the screens update
+incrementally exactly as for an edit made in the Admin screen.
+
+Catalog reads carry an ETag built from the event bus's catalog version.
+The serialized catalog is cached per version: a conditional GET
+(If-None-Match) is answered 304 without touching the Tk thread, and
+repeated reads of an unchanged catalog are served from the cache. PATCH
+accepts If-Match, so a script can't overwrite an edit it hasn't seen.
+
+Quantities are stock on hand, as in item_list.json: units held in a
+customer's cart are included, and stock can't be set below them.
+
+Endpoints:
+    GET   /catalog                 -> [item, ...]
+    GET   /catalog/<name>          -> item
+    PATCH /catalog/<name>          {field: value} -> item
+    POST  /catalog/stock           {"set": {name: qty}, "add": {name: delta}} -> {"updated", "errors"}
+    GET   /config                  -> config
+    PATCH /config                  {key: value} -> config
+    GET   /metrics                 -> counters
+
+Configured with the "admin_api" config key, e.g.
+    "admin_api": {"enabled": true, "port": 8780, "token": "change-me"}
+With a token set, requests must send "Authorization: Bearer <token>".
+"""
+import json
+import threading
+import time
+import urllib.parse
+import uuid
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from money import Money, json_default
+
+# Item fields the API may change; anything else (e.g. the sales count) is kept as is
+EDITABLE_FIELDS = ("name", "description", "category", "price", "quantity", "image")
+
+
+class ApiError(Exception):
+    """Rejected request, answered with `status` and a JSON error message."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def validate_item_fields(fields):
+    """Checks and converts editable item fields. Raises ApiError on bad input."""
+    if not isinstance(fields, dict):
+        raise ApiError(400, "expected a JSON object")
+    unknown = [key for key in fields if key not in EDITABLE_FIELDS]
+    if unknown:
+        raise ApiError(400, f"fields can't be changed: {', '.join(unknown)}")
+    clean = {}
+    for key, value in fields.items():
+        if key == "price":
+            try:
+                clean[key] = Money.of(value)
+            except ValueError:
+                raise ApiError(400, f"invalid price: {value!r}")
+            if clean[key] < 0:
+                raise ApiError(400, "price can't be negative")
+        elif key == "quantity":
+            clean[key] = _quantity(value)
+        elif key == "name":
+            if not isinstance(value, str) or not value.strip():
+                raise ApiError(400, "name can't be empty")
+            clean[key] = value.strip()
+        else:
+            clean[key] = "" if value is None else str(value)
+    return clean
+
+
+def _quantity(value, allow_negative=False):
+    if isinstance(value, bool) or not isinstance(value, int):
+        raise ApiError(400, f"quantity must be an integer: {value!r}")
+    if value < 0 and not allow_negative:
+        raise ApiError(400, "quantity can't be negative")
+    return value
+
+
+class AdminAPI:
+    """Threaded localhost HTTP server exposing the catalog, config and metrics."""
+
+    def __init__(self, app, host="127.0.0.1", port=8780, token=None, tk_timeout=5.0):
+        """Initialize the API (call start() to begin serving).
+
+        Args:
+            app (MainApp): The application whose catalog is served
+            host (str): Interface to bind; keep it on localhost
+            port (int): TCP port
+            token (str, optional): Bearer token required on every request
+            tk_timeout (float): Longest wait for the Tk thread to answer
+        """
+        self.app = app
+        self.host = host
+        self.port = port
+        self.token = token or None
+        self.tk_timeout = tk_timeout
+        self._server = None
+        self._boot_id = uuid.uuid4().hex[:8]  # catalog versions restart at 0 on every run
+        self._cache = None  # (version, etag, body bytes)
+        self._lock = threading.Lock()
+        self._started_at = time.time()
+        self._counters = {"requests": 0, "not_modified": 0, "cache_hits": 0, "cache_misses": 0, "errors": 0}
+
+    def start(self):
+        self._server = ThreadingHTTPServer((self.host, self.port), _make_handler(self))
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name="admin-api", daemon=True).start()
+        print(f"Admin API listening on http://{self.host}:{self.port}")
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def count(self, name):
+        with self._lock:
+            self._counters[name] += 1
+
+    # --- Tk thread marshalling ---
+
+    def on_tk(self, func, *args):
+        """Runs func(*args) on the Tk thread and returns its result (HTTP thread only).
+
+        Raises FutureTimeout if the Tk thread hasn't started the call within
+        tk_timeout; the call is then cancelled, so a 503 means nothing was
+        applied and the client can safely retry.
+        """
+        future = Future()
+
+        def run():
+            if not future.set_running_or_notify_cancel():
+                return  # Timed out before the Tk thread got to it
+            try:
+                future.set_result(func(*args))
+            except Exception as e:
+                future.set_exception(e)
+
+        self.app.async_bridge.call_in_tk(run)
+        try:
+            return future.result(timeout=self.tk_timeout)
+        except FutureTimeout:
+            if future.cancel():
+                raise
+        # Already running on the Tk thread: it finishes shortly, let it answer
+        return future.result()
+
+    # --- Catalog ---
+
+    def etag(self, version=None):
+        if version is None:
+            version = self.app.events.catalog_version
+        return f'"{self._boot_id}-{version}"'
+
+    def catalog(self):
+        """Returns (etag, body) of the whole catalog, serialized once per version."""
+        cached = self._cache
+        if cached is not None and cached[0] == self.app.events.catalog_version:
+            self.count("cache_hits")
+            return cached[1], cached[2]
+        self.count("cache_misses")
+        version, body = self.on_tk(self._snapshot)
+        cached = (version, self.etag(version), body)
+        self._cache = cached
+        return cached[1], cached[2]
+
+    def _on_hand(self, item):
+        """`item` as the API shows it: quantity is stock on hand, including cart reservations."""
+        reserved = self.app.reservations.reserved(item["name"])
+        return dict(item, quantity=item["quantity"] + reserved) if reserved else dict(item)
+
+    def _snapshot(self):
+        # Tk thread: version and items are read together, so the ETag matches the body
+        items = [self._on_hand(item) for item in self.app.items]
+        body = json.dumps(items, default=json_default).encode("utf-8")
+        return self.app.events.catalog_version, body
+
+    def _available(self, name, on_hand):
+        """Converts stock on hand to the in-memory (available) quantity. Tk thread."""
+        reserved = self.app.reservations.reserved(name)
+        if on_hand < 0:
+            raise ApiError(409, f"stock would go negative ({on_hand})")
+        if on_hand < reserved:
+            raise ApiError(409, f"{reserved} are held in a customer's cart; stock can't go below that")
+        return on_hand - reserved
+
+    def get_item(self, name):
+        def read():
+            item = self.app.find_item(name)
+            if item is None:
+                raise ApiError(404, f"no item named {name!r}")
+            return self.app.events.catalog_version, self._on_hand(item)
+        version, item = self.on_tk(read)
+        return self.etag(version), item
+
+    def patch_item(self, name, fields, if_match=None):
+        clean = validate_item_fields(fields)
+
+        def write():
+            # Checked on the Tk thread, so no edit can slip in between check and write
+            if if_match is not None and if_match != self.etag():
+                raise ApiError(412, "catalog changed since it was read")
+            item = self.app.find_item(name)
+            if item is None:
+                raise ApiError(404, f"no item named {name!r}")
+            new_name = clean.get("name", name)
+            if new_name != name and self.app.name_taken(new_name, ignore=name):
+                raise ApiError(409, f"an item named {new_name!r} already exists")
+            new_item = dict(item, **clean)
+            if "quantity" in clean:
+                new_item["quantity"] = self._available(name, clean["quantity"])
+            self.app.update_item(name, new_item)
+            return self.app.events.catalog_version, self._on_hand(self.app.find_item(new_name))
+        version, item = self.on_tk(write)
+        return self.etag(version), item
+
+    def update_stock(self, payload):
+        """Sets ("set") or adjusts ("add") the stock on hand of many items in one request."""
+        if not isinstance(payload, dict) or not (payload.get("set") or payload.get("add")):
+            raise ApiError(400, 'expected {"set": {name: qty}} and/or {"add": {name: delta}}')
+        changes = []  # (name, quantity, is_delta)
+        for key, is_delta in (("set", False), ("add", True)):
+            entries = payload.get(key) or {}
+            if not isinstance(entries, dict):
+                raise ApiError(400, f'"{key}" must map item names to integers')
+            for name, value in entries.items():
+                changes.append((name, _quantity(value, allow_negative=is_delta), is_delta))
+
+        def write():
+            updated, errors, new_items = [], {}, {}
+            for name, value, is_delta in changes:
+                item = new_items.get(name) or self.app.find_item(name)
+                if item is None:
+                    errors[name] = "no such item"
+                    continue
+                on_hand = item["quantity"] + self.app.reservations.reserved(name)
+                on_hand = on_hand + value if is_delta else value
+                try:
+                    quantity = self._available(name, on_hand)
+                except ApiError as e:
+                    errors[name] = str(e)
+                    continue
+                if quantity != item["quantity"]:
+                    new_items[name] = dict(item, quantity=quantity)
+                updated.append({"name": name, "quantity": on_hand})
+            # One save and one screen refresh for the whole request
+            if new_items:
+                self.app.apply_bulk_changes(updated=list(new_items.items()))
+            return {"updated": updated, "errors": errors, "version": self.app.events.catalog_version}
+        result = self.on_tk(write)
+        result["etag"] = self.etag(result.pop("version"))
+        return result
+
+    # --- Config and metrics ---
+
+    def get_config(self):
+        return self.on_tk(lambda: dict(self.app.config))
+
+    def patch_config(self, fields):
+        if not isinstance(fields, dict):
+            raise ApiError(400, "expected a JSON object")
+
+        def write():
+            new_config = dict(self.app.config)
+            new_config.update(fields)
+            self.app.save_config(new_config)
+            return dict(new_config)
+        return self.on_tk(write)
+
+    def metrics(self):
+        def read():
+            app = self.app
+            items = app.items
+            return {
+                "items": len(items),
+                "out_of_stock": sum(1 for item in items if item.get("quantity", 0) <= 0),
+                "units_in_stock": sum(max(0, item.get("quantity", 0)) for item in items),
+                "units_reserved": sum(app.reservations.reserved(item["name"]) for item in items),
+                "units_sold": sum(item.get("sold", 0) for item in items),
+                "cart_lines": len(app.cart),
+                "payment_in_progress": app.frames["CartScreen"].payment_in_progress,
+                "catalog_version": app.events.catalog_version,
+                "active_screen": app.active_frame_name,
+            }
+        result = self.on_tk(read)
+        with self._lock:
+            result["api"] = dict(self._counters)
+        result["uptime_seconds"] = round(time.time() - self._started_at, 1)
+        spool = getattr(self.app.sales_uploader, "spool", None)
+        if spool is not None:
+            result["sales_chunks_unsent"] = len(spool.chunks())
+        return result
+
+
+def _make_handler(api):
+    class Handler(BaseHTTPRequestHandler):
+        def _send(self, code, payload=None, body=None, etag=None):
+            if body is None and payload is not None:
+                body = json.dumps(payload, default=json_default).encode("utf-8")
+            self.send_response(code)
+            if etag:
+                self.send_header("ETag", etag)
+                self.send_header("Cache-Control", "no-cache")
+            if body is not None:
+                self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body or b"")))
+            self.end_headers()
+            if body:
+                self.wfile.write(body)
+
+        def _read_json(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            try:
+                return json.loads(self.rfile.read(length).decode("utf-8") or "null") if length else None
+            except ValueError:
+                raise ApiError(400, "body is not valid JSON")
+
+        def _parts(self):
+            path = urllib.parse.urlsplit(self.path).path
+            return [urllib.parse.unquote(p) for p in path.split("/") if p]
+
+        def _authorized(self):
+            if api.token is None:
+                return True
+            if self.headers.get("Authorization") == f"Bearer {api.token}":
+                return True
+            self._send(401, {"error": "missing or wrong token"})
+            return False
+
+        def _handle(self, route):
+            api.count("requests")
+            if not self._authorized():
+                return
+            try:
+                route(self._parts())
+            except ApiError as e:
+                self._send(e.status, {"error": str(e)})
+            except FutureTimeout:
+                api.count("errors")
+                self._send(503, {"error": "the kiosk UI is busy; try again"})
+            except Exception as e:
+                api.count("errors")
+                print(f"Admin API error on {self.command} {self.path}: {e}")
+                self._send(500, {"error": str(e)})
+
+        def do_GET(self):
+            self._handle(self._get)
+
+        def do_PATCH(self):
+            self._handle(self._patch)
+
+        def do_POST(self):
+            self._handle(self._post)
+
+        def _get(self, parts):
+            if parts and parts[0] == "catalog" and len(parts) <= 2:
+                # Conditional read: answered from the version counter alone
+                if self.headers.get("If-None-Match") == api.etag():
+                    api.count("not_modified")
+                    return self._send(304, etag=api.etag())
+                if len(parts) == 1:
+                    etag, body = api.catalog()
+                    return self._send(200, body=body, etag=etag)
+                etag, item = api.get_item(parts[1])
+                return self._send(200, item, etag=etag)
+            if parts == ["config"]:
+                return self._send(200, api.get_config())
+            if parts == ["metrics"]:
+                return self._send(200, api.metrics())
+            raise ApiError(404, "not found")
+
+        def _patch(self, parts):
+            if len(parts) == 2 and parts[0] == "catalog":
+                etag, item = api.patch_item(parts[1], self._read_json(), self.headers.get("If-Match"))
+                return self._send(200, item, etag=etag)
+            if parts == ["config"]:
+                return self._send(200, api.patch_config(self._read_json()))
+            raise ApiError(404, "not found")
+
+        def _post(self, parts):
+            if parts == ["catalog", "stock"]:
+                result = api.update_stock(self._read_json())
+                return self._send(200, result, etag=result["etag"])
+            raise ApiError(404, "not found")
+
+        def log_message(self, format, *args):
+            pass  # One line per request is too noisy on the kiosk console
+
+    return Handler
+
+
+def build_admin_api(app):
+    """Starts the API configured in app.config["admin_api"], or returns None."""
+    options = app.config.get("admin_api")
+    if not options or not options.get("enabled", True):
+        return None
+    try:
+        return AdminAPI(
+            app,
+            host=options.get("host", "127.0.0.1"),
+            port=options.get("port", 8780),
+            token=options.get("token"),
+        ).start()
+    except Exception as e:
+        print(f"Error starting admin API: {e}")
+        return None
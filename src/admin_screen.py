@@ -1,15 +1,24 @@
 import tkinter as tk
 from tkinter import font as tkfont, messagebox, filedialog
-import json
 import os
+from touch_gestures import TouchScroller
+from virtual_list import VirtualList
+from facet_index import category_of
+from money import Money
+from sort_index import SORT_CATALOG, SORT_LABELS, SORT_STOCK, SORT_POPULARITY, order_for_label
+from event_bus import CONFIG_CHANGED, STOCK_CHANGED
+from inventory_csv import read_csv, write_csv
+from admin_transactions import EditTransaction
 
 
 class ItemEditWindow(tk.Toplevel):
     """A Toplevel window for adding or editing an item."""
 
-    def __init__(self, parent, controller, item_data=None):
+    def __init__(self, parent, controller, item_data=None, target=None):
         super().__init__(parent)
         self.controller = controller
+        # Where the change goes: the app, or a batch-mode EditTransaction
+        self.target = controller if target is None else target
         self.item_data = item_data
 
         self.title("Edit Item" if item_data else "Add New Item")
@@ -34,7 +43,7 @@ class ItemEditWindow(tk.Toplevel):
     def _center_window(self):
         """Centers this Toplevel window on the main application window."""
         width = 500
-        height = 350
+        height = 400
 
         # Get the main application window (the controller)
         parent_window = self.controller
@@ -65,6 +74,7 @@ class ItemEditWindow(tk.Toplevel):
         fields_to_create = [
             ("Name", "name", False),
             ("Description", "description", True),
+            ("Category", "category", False),
             ("Price", "price", False),
             ("Quantity", "quantity", False),
             ("Image Path", "image", False),
@@ -128,7 +138,8 @@ class ItemEditWindow(tk.Toplevel):
 
     def save_item(self):
         """Gathers data from fields, validates, and calls controller."""
-        new_data = {}
+        # Keep fields the form doesn't show (e.g. the sales count)
+        new_data = dict(self.item_data) if self.item_data else {}
         try:
             for key, widget in self.fields.items():
                 if isinstance(widget, tk.Text):
@@ -139,7 +150,7 @@ class ItemEditWindow(tk.Toplevel):
                 if key in ["price", "quantity"]:
                     if not value:
                         raise ValueError(f"{key.capitalize()} cannot be empty.")
-                    new_data[key] = float(value) if key == "price" else int(value)
+                    new_data[key] = Money.of(value) if key == "price" else int(value)
                 elif key == "name" and not value:
                     raise ValueError("Name cannot be empty.")
                 else:
@@ -149,10 +160,16 @@ class ItemEditWindow(tk.Toplevel):
             return
 
         if self.item_data:  # Editing existing item
-            self.controller.update_item(self.item_data["name"], new_data)
+            if self.target.update_item(self.item_data["name"], new_data) is False:
+                messagebox.showerror(
+                    "Duplicate Item",
+                    f"An item with the name '{new_data['name']}' already exists.",
+                    parent=self
+                )
+                return
             self.destroy()
         else:  # Adding new item
-            success = self.controller.add_item(new_data)
+            success = self.target.add_item(new_data)
             if success:
                 self.destroy()
             else:
@@ -262,17 +279,9 @@ class KioskConfigWindow(tk.Toplevel):
         members = [m.strip() for m in members_raw.splitlines() if m.strip()]
         new_cfg['group_members'] = members
 
-        # Write to config file
+        # Write to config file; the kiosk picks the change up from the event bus
         try:
-            with open(self.controller.config_path, 'w') as f:
-                json.dump(new_cfg, f, indent=4)
-            self.controller.config = new_cfg
-            # Notify kiosk frame to update if present
-            if 'KioskFrame' in getattr(self.controller, 'frames', {}):
-                try:
-                    self.controller.frames['KioskFrame'].update_kiosk_config()
-                except Exception as e:
-                    print(f"Failed to update kiosk frame: {e}")
+            self.controller.save_config(new_cfg)
             self.destroy()
         except Exception as e:
             messagebox.showerror('Save Error', f'Failed to save config: {e}', parent=self)
@@ -282,7 +291,6 @@ class AdminScreen(tk.Frame):
     def __init__(self, parent, controller):
         tk.Frame.__init__(self, parent, bg="#f0f4f8")  # Light background
         self.controller = controller
-        self.scan_start_x = 0  # For drag-to-scroll
 
         self.fonts = {
             "header": tkfont.Font(family="Helvetica", size=24, weight="bold"),
@@ -301,8 +309,12 @@ class AdminScreen(tk.Frame):
             "btn_fg": "#ffffff",
         }
 
+        self._stale = True  # catalog changed while hidden; reload the list when shown
+        self.transaction = None  # EditTransaction while batch mode is on
+        self.last_batch = None  # CommittedBatch that "Undo Last Batch" reverts
         self.create_widgets()
-        self.bind("<<ShowFrame>>", lambda e: self.populate_items())
+        self.bind("<<ShowFrame>>", lambda e: self._on_show())
+        controller.events.subscribe(self.on_catalog_changed)
 
         exit_label = tk.Label(
             self,
@@ -352,6 +364,94 @@ class AdminScreen(tk.Frame):
         )
         kiosk_cfg_btn.pack(side="right", padx=(0, 8))
 
+        # Bulk CSV import/export (one save and one refresh for the whole file)
+        for text, command in (("Export CSV", self.export_csv), ("Import CSV", self.import_csv)):
+            tk.Button(
+                header,
+                text=text,
+                font=self.fonts["button"],
+                bg="#8e44ad",
+                fg=self.colors["btn_fg"],
+                relief="flat",
+                padx=12,
+                pady=5,
+                command=command,
+            ).pack(side="right", padx=(0, 8))
+
+        # --- Batch edit bar: stage changes, review, commit once, undo ---
+        batch_frame = tk.Frame(self, bg=self.colors["background"])
+        batch_frame.pack(fill="x", padx=20, pady=(0, 10))
+        self.batch_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(
+            batch_frame,
+            text="Batch edit",
+            variable=self.batch_var,
+            font=self.fonts["item_details"],
+            bg=self.colors["background"],
+            command=self.toggle_batch_mode,
+        ).pack(side="left")
+        self.batch_status = tk.Label(
+            batch_frame,
+            font=self.fonts["item_details"],
+            bg=self.colors["background"],
+            fg="#7f8c8d",
+        )
+        self.batch_status.pack(side="left", padx=(6, 0))
+        self.undo_button = tk.Button(
+            batch_frame, text="Undo Last Batch", font=self.fonts["item_details"],
+            relief="flat", command=self.undo_last_batch,
+        )
+        self.undo_button.pack(side="right")
+        self.discard_button = tk.Button(
+            batch_frame, text="Discard", font=self.fonts["item_details"],
+            relief="flat", command=self.discard_batch,
+        )
+        self.discard_button.pack(side="right", padx=(0, 6))
+        self.commit_button = tk.Button(
+            batch_frame, text="Review & Commit", font=self.fonts["item_details"],
+            bg="#27ae60", fg=self.colors["btn_fg"], relief="flat", command=self.commit_batch,
+        )
+        self.commit_button.pack(side="right", padx=(0, 6))
+        self._update_batch_bar()
+
+        # --- Fuzzy filter field ---
+        filter_frame = tk.Frame(self, bg=self.colors["background"])
+        filter_frame.pack(fill="x", padx=20, pady=(0, 10))
+        tk.Label(
+            filter_frame,
+            text="Filter:",
+            font=self.fonts["item_details"],
+            bg=self.colors["background"],
+            fg=self.colors["header_fg"],
+        ).pack(side="left")
+        self.filter_var = tk.StringVar()
+        tk.Entry(
+            filter_frame, textvariable=self.filter_var, font=self.fonts["item_details"], width=40
+        ).pack(side="left", padx=(6, 4))
+        tk.Button(
+            filter_frame,
+            text="Clear",
+            font=self.fonts["item_details"],
+            relief="flat",
+            command=lambda: self.filter_var.set(""),
+        ).pack(side="left")
+        self.filter_var.trace_add("write", lambda *args: self.apply_filter())
+        # Sort selector; "Default" keeps file order (or best match while filtering)
+        self.sort_var = tk.StringVar(value=SORT_LABELS[SORT_CATALOG])
+        sort_menu = tk.OptionMenu(
+            filter_frame, self.sort_var, *SORT_LABELS.values(),
+            command=lambda _: self.apply_filter(),
+        )
+        sort_menu.configure(font=self.fonts["item_details"], relief="flat")
+        sort_menu.pack(side="right")
+        tk.Label(
+            filter_frame,
+            text="Sort:",
+            font=self.fonts["item_details"],
+            bg=self.colors["background"],
+            fg=self.colors["header_fg"],
+        ).pack(side="right", padx=(0, 6))
+
         # --- Scrollable Item List ---
         canvas_container = tk.Frame(self, bg=self.colors["background"])
         canvas_container.pack(fill="both", expand=True, padx=20, pady=(0, 20))
@@ -359,97 +459,158 @@ class AdminScreen(tk.Frame):
         self.canvas = tk.Canvas(
             canvas_container, bg=self.colors["background"], highlightthickness=0
         )
-        self.scrollable_frame = tk.Frame(self.canvas, bg=self.colors["background"])
+        self.canvas.pack(side="left", fill="both", expand=True)
 
-        self.scrollable_frame.bind(
-            "<Configure>",
-            lambda e: self.canvas.configure(scrollregion=self.canvas.bbox("all")),
-        )
+        # Drag/fling scrolling; the admin list has no tap action of its own
+        self.gestures = TouchScroller(self.canvas)
 
-        self.canvas_window = self.canvas.create_window(
-            (0, 0), window=self.scrollable_frame, anchor="nw"
+        # Only rows in view exist as widgets; they are recycled while scrolling
+        self.item_list = VirtualList(
+            self.canvas,
+            row_height=self._row_height(),
+            create_row=self.create_item_row,
+            bind_row=self.bind_item_row,
         )
 
-        self.canvas.pack(side="left", fill="both", expand=True)
-
         # --- Bindings for Scrolling ---
         self.canvas.bind("<Configure>", self.on_canvas_configure)
         self.canvas.bind("<ButtonPress-1>", self.on_canvas_press)
         self.canvas.bind("<B1-Motion>", self.on_canvas_drag)
-        self.scrollable_frame.bind("<ButtonPress-1>", self.on_canvas_press)
-        self.scrollable_frame.bind("<B1-Motion>", self.on_canvas_drag)
+        self.canvas.bind("<ButtonRelease-1>", self.on_canvas_release)
 
         # Bind mouse wheel to scroll (works on all frames)
         self.bind_all("<MouseWheel>", self._on_mousewheel)
 
+    def _row_height(self):
+        """Fixed row height: three text lines plus card padding and spacing."""
+        text_height = (
+            self.fonts["item_name"].metrics("linespace")
+            + self.fonts["item_description"].metrics("linespace") + 6
+            + self.fonts["item_details"].metrics("linespace")
+        )
+        return text_height + 2 * 10 + 2 + 2 * 5  # card pady, border, row spacing
+
     def on_canvas_configure(self, event):
-        """On canvas resize, update the width of the inner frame."""
-        canvas_width = event.width
-        self.canvas.itemconfig(self.canvas_window, width=canvas_width)
+        """On canvas resize, stretch the rows to the new width."""
+        self.item_list.on_resize(event.width)
 
     def on_canvas_press(self, event):
-        """Records the starting y-position and fixed x-position of a mouse drag."""
-        self.canvas.scan_mark(event.x, event.y)
-        self.scan_start_x = event.x
+        """Starts tracking a touch for drag-to-scroll."""
+        self.gestures.press(event)
 
     def on_canvas_drag(self, event):
-        """Moves the canvas view vertically based on mouse drag."""
-        self.canvas.scan_dragto(self.scan_start_x, event.y, gain=1)
+        """Feeds drag motion to the gesture recognizer."""
+        self.gestures.motion(event)
+
+    def on_canvas_release(self, event):
+        """Ends a drag; a fast drag continues as an inertial scroll."""
+        self.gestures.release(event)
 
     def _on_mousewheel(self, event):
-        self.canvas.yview_scroll(int(-1 * (event.delta / 120)), "units")
+        # The canvas scrolls in 1px units (see TouchScroller); keep ~40px per notch
+        self.gestures.stop()
+        self.canvas.yview_scroll(int(-1 * (event.delta / 120)) * 40, "units")
+
+    def _on_show(self):
+        if self._stale:
+            self.populate_items()
+
+    def on_catalog_changed(self, events):
+        """Event bus callback: re-binds changed rows, or reloads the list if it must."""
+        events = [e for e in events if e.kind != CONFIG_CHANGED]
+        if not events:
+            return
+        if self.controller.active_frame_name != "AdminScreen":
+            self._stale = True
+            return
+        order = order_for_label(self.sort_var.get())
+        if all(e.kind == STOCK_CHANGED for e in events) and order not in (SORT_STOCK, SORT_POPULARITY):
+            # Row order and membership are unchanged; only refresh the affected rows
+            for event in events:
+                self.item_list.refresh_item(event.item)
+            return
+        self.populate_items()
 
     def populate_items(self):
-        # Clear existing items
-        for widget in self.scrollable_frame.winfo_children():
-            widget.destroy()
-
-        # Repopulate with current items
-        for item in self.controller.items:
-            card = self.create_item_card(self.scrollable_frame, item)
-            card.pack(fill="x", padx=10, pady=5)
-
-    def create_item_card(self, parent, item_data):
+        """Points the list at the current items; only visible rows are rebuilt."""
+        self._stale = False
+        self.item_list.set_items(self.filtered_items())
+
+    def filtered_items(self):
+        """Items matching the filter field in the selected order (all items if empty).
+
+        With the default order, filter matches are listed best match first.
+        """
+        matches = self.controller.admin_index.search(self.filter_var.get())
+        order = order_for_label(self.sort_var.get())
+        sort_index = self.controller.sort_index
+        if order == SORT_CATALOG:
+            items = self.controller.items if matches is None else matches
+        elif matches is None:
+            items = sort_index.ordered_items(order)
+        else:
+            names = sort_index.sort_names([item["name"] for item in matches], order)
+            items = [sort_index.item(name) for name in names]
+        if self.transaction:
+            return self._with_staged(items)
+        return items
+
+    def _with_staged(self, items):
+        """Committed `items` as batch mode shows them: staged edits in place, new items last."""
+        text = self.filter_var.get().strip().lower()
+        added = [item for item in self.transaction.added_items() if text in item["name"].lower()]
+        return self.transaction.overlay(items) + added
+
+    def apply_filter(self):
+        """Re-applies the filter and sort order and scrolls back to the top."""
+        self.item_list.set_items(self.filtered_items(), keep_position=False)
+
+    def create_item_row(self, parent):
+        """Builds one recyclable row. Content is filled in by bind_item_row."""
+        row = tk.Frame(parent, bg=self.colors["background"])
         card = tk.Frame(
-            parent,
+            row,
             bg=self.colors["card_bg"],
             highlightbackground=self.colors["border"],
             highlightthickness=1,
         )
+        card.pack(fill="both", expand=True, padx=10, pady=5)
         card.grid_columnconfigure(0, weight=1)
 
         info_frame = tk.Frame(card, bg=card["bg"])
         info_frame.grid(row=0, column=0, padx=15, pady=10, sticky="ew")
 
-        tk.Label(
+        row.name_label = tk.Label(
             info_frame,
-            text=item_data["name"],
             font=self.fonts["item_name"],
             bg=card["bg"],
             anchor="w",
-        ).pack(fill="x")
-        tk.Label(
+        )
+        row.name_label.pack(fill="x")
+        # Single line: rows have a fixed height, long descriptions are clipped
+        row.description_label = tk.Label(
             info_frame,
-            text=item_data["description"],
             font=self.fonts["item_description"],
             bg=card["bg"],
             fg="#7f8c8d",
             anchor="w",
             justify="left",
-            wraplength=600,  # Adjust as needed for your screen width
-        ).pack(fill="x", pady=(2, 4))
-        tk.Label(
+        )
+        row.description_label.pack(fill="x", pady=(2, 4))
+        row.details_label = tk.Label(
             info_frame,
-            text=f"Price: {self.controller.currency_symbol}{item_data['price']:.2f} | Qty: {item_data['quantity']}",
             font=self.fonts["item_details"],
             bg=card["bg"],
             fg="#7f8c8d",
             anchor="w",
-        ).pack(fill="x")
+        )
+        row.details_label.pack(fill="x")
 
         button_frame = tk.Frame(card, bg=card["bg"])
         button_frame.grid(row=0, column=1, padx=15, pady=10, sticky="e")
 
+        # The row is re-bound to different items; buttons act on the current one
+        row.item_data = None
         edit_button = tk.Button(
             button_frame,
             text="Edit",
@@ -457,7 +618,7 @@ class AdminScreen(tk.Frame):
             bg=self.colors["edit_btn_bg"],
             fg=self.colors["btn_fg"],
             relief="flat",
-            command=lambda i=item_data: self.edit_item(i),
+            command=lambda r=row: self.edit_item(r.item_data),
         )
         edit_button.pack(side="left", padx=(0, 5))
 
@@ -468,37 +629,175 @@ class AdminScreen(tk.Frame):
             bg=self.colors["remove_btn_bg"],
             fg=self.colors["btn_fg"],
             relief="flat",
-            command=lambda i=item_data: self.remove_item(i),
+            command=lambda r=row: self.remove_item(r.item_data),
         )
         remove_button.pack(side="left")
 
-        # --- Bind drag-scroll events to all widgets on the card ---
+        # --- Bind drag-scroll events to all widgets on the row ---
         # This ensures that dragging anywhere on the card scrolls the canvas.
         # The buttons will still work because their `command` handles the click.
-        widgets_to_bind = [card, info_frame] + info_frame.winfo_children()
+        # Rows are pooled, so this runs once per built row, not per item.
+        widgets_to_bind = [row, card, info_frame] + info_frame.winfo_children()
 
         for widget in widgets_to_bind:
-            # Exclude buttons from having their primary click action overridden
-            if not isinstance(widget, tk.Button):
-                widget.bind("<ButtonPress-1>", self.on_canvas_press)
-                widget.bind("<B1-Motion>", self.on_canvas_drag)
+            widget.bind("<ButtonPress-1>", self.on_canvas_press)
+            widget.bind("<B1-Motion>", self.on_canvas_drag)
+            widget.bind("<ButtonRelease-1>", self.on_canvas_release)
             # The button_frame and its buttons are not bound, so their commands work.
 
+        return row
 
-        return card
+    def bind_item_row(self, row, item_data):
+        """Shows `item_data` in a recycled row, touching only changed labels."""
+        row.item_data = item_data
+        staged = self.transaction is not None and self.transaction.is_staged(item_data)
+        texts = (
+            item_data["name"] + ("  (staged)" if staged else ""),
+            item_data["description"],
+            f"Price: {self.controller.currency_symbol}{item_data['price']:.2f} | Qty: {item_data['quantity']} | {category_of(item_data)}",
+        )
+        if getattr(row, "texts", None) == texts:
+            return
+        row.texts = texts
+        row.name_label.config(text=texts[0])
+        row.description_label.config(text=texts[1])
+        row.details_label.config(text=texts[2])
 
     def add_new_item(self):
-        ItemEditWindow(self, self.controller)
+        ItemEditWindow(self, self.controller, target=self.edit_target())
 
     def open_kiosk_config(self):
         KioskConfigWindow(self, self.controller)
 
+    def import_csv(self):
+        """Reads a CSV of item changes, reports bad rows and applies the rest as one batch."""
+        if self.transaction is not None:
+            # The import writes to the catalog directly; staged edits would be based on stale items
+            messagebox.showinfo(
+                "Import CSV", "Commit or discard the batch and leave batch edit before importing.", parent=self)
+            return
+        path = filedialog.askopenfilename(
+            title="Import items", filetypes=[("CSV files", "*.csv"), ("All files", "*.*")], parent=self)
+        if not path:
+            return
+        controller = self.controller
+        try:
+            with open(path, "r", newline="", encoding="utf-8-sig") as file:
+                plan = read_csv(file, controller.items, controller.reservations.reserved)
+        except (OSError, UnicodeDecodeError) as e:
+            messagebox.showerror("Import Error", f"Could not read {path}: {e}", parent=self)
+            return
+        if not plan.changes:
+            report = plan.error_report(limit=15) if plan.errors else ""
+            messagebox.showinfo("Import", f"Nothing to change ({plan.summary()}).\n\n{report}".strip(), parent=self)
+            return
+        question = f"{plan.summary()}.\n\n"
+        if plan.errors:
+            question += f"These rows will be skipped:\n{plan.error_report(limit=15)}\n\n"
+        question += "Apply the changes?"
+        if messagebox.askyesno("Import Items", question, parent=self):
+            controller.apply_bulk_changes(added=plan.added, updated=plan.updated)
+
+    def export_csv(self):
+        path = filedialog.asksaveasfilename(
+            title="Export items", defaultextension=".csv", initialfile="items.csv",
+            filetypes=[("CSV files", "*.csv")], parent=self)
+        if not path:
+            return
+        try:
+            with open(path, "w", newline="", encoding="utf-8") as file:
+                count = write_csv(self.controller.items, file, self.controller.reservations.reserved)
+        except OSError as e:
+            messagebox.showerror("Export Error", f"Could not write {path}: {e}", parent=self)
+            return
+        messagebox.showinfo("Export", f"Exported {count} items to {path}", parent=self)
+
     def edit_item(self, item_data):
-        ItemEditWindow(self, self.controller, item_data)
+        ItemEditWindow(self, self.controller, item_data, target=self.edit_target())
 
     def remove_item(self, item_to_remove):
         if messagebox.askyesno(
             "Confirm Deletion",
             f"Are you sure you want to remove '{item_to_remove['name']}'?",
         ):
-            self.controller.remove_item(item_to_remove)
+            self.edit_target().remove_item(item_to_remove)
+
+    # --- Batch edit mode ---
+
+    def edit_target(self):
+        """Where item changes go: the open transaction in batch mode, else the app."""
+        return self.controller if self.transaction is None else self.transaction
+
+    def toggle_batch_mode(self):
+        if self.batch_var.get():
+            self.transaction = EditTransaction(self.controller, on_change=self._on_staged_change)
+        else:
+            if self.transaction and not messagebox.askyesno(
+                "Leave Batch Edit",
+                f"Discard {len(self.transaction)} staged changes?",
+                parent=self,
+            ):
+                self.batch_var.set(True)
+                return
+            self.transaction = None
+            self.populate_items()
+        self._update_batch_bar()
+
+    def _on_staged_change(self):
+        self.populate_items()
+        self._update_batch_bar()
+
+    def _update_batch_bar(self):
+        staged = len(self.transaction) if self.transaction is not None else 0
+        if self.transaction is None:
+            status = "Changes are saved one by one"
+        else:
+            status = f"{staged} staged change{'s' if staged != 1 else ''}"
+        self.batch_status.config(text=status)
+        self.commit_button.config(state="normal" if staged else "disabled")
+        self.discard_button.config(state="normal" if staged else "disabled")
+        self.undo_button.config(state="normal" if self.last_batch is not None else "disabled")
+
+    def commit_batch(self):
+        """Shows the staged changes and applies them as one batch (one save, one refresh)."""
+        if not self.transaction:
+            return
+        lines = self.transaction.preview()
+        shown = "\n".join(lines[:25])
+        if len(lines) > 25:
+            shown += f"\n... and {len(lines) - 25} more"
+        if not messagebox.askyesno("Commit Changes", f"Apply these changes?\n\n{shown}", parent=self):
+            return
+        batch = self.transaction.commit()
+        self.last_batch = batch if len(batch) else None
+        self._update_batch_bar()
+        if batch.skipped:
+            messagebox.showwarning(
+                "Some Changes Skipped",
+                "The catalog changed since these were staged:\n" + "\n".join(batch.skipped),
+                parent=self,
+            )
+
+    def discard_batch(self):
+        if self.transaction and messagebox.askyesno(
+            "Discard Changes", f"Discard {len(self.transaction)} staged changes?", parent=self
+        ):
+            self.transaction.discard()
+
+    def undo_last_batch(self):
+        """Reverts the last committed batch, again as one batch."""
+        if self.last_batch is None:
+            return
+        if not messagebox.askyesno(
+            "Undo Last Batch", f"Undo the last batch of {len(self.last_batch)} changes?", parent=self
+        ):
+            return
+        skipped = self.last_batch.undo()
+        self.last_batch = None
+        self._update_batch_bar()
+        if skipped:
+            messagebox.showwarning(
+                "Some Changes Not Undone",
+                "These were changed again since the batch was committed:\n" + "\n".join(skipped),
+                parent=self,
+            )
@@ -0,0 +1,256 @@
+"""Batched admin edits.
+
+In batch mode the Admin screen stages adds, edits and removals in an
+EditTransaction instead of applying each one. Staging only touches the
+transaction; the catalog, its indexes and item_list.json stay as they
+are, so a long restocking session costs nothing per change. Commit
+applies everything through MainApp.apply_bulk_changes: one save and one
+screen refresh. The returned CommittedBatch can undo it the same way.
+
+Edits are kept as the fields that changed. At commit (and undo) they are
+laid over the item as it is then. A quantity edit is applied as the
+difference it makes (e.g. +20 for a restock), so stock sold or synced in
+the meantime isn't overwritten with the value seen when it was staged.
+"""
+
+
+class EditTransaction:
+    """Staged item changes. Has the add/update/remove_item signatures of MainApp."""
+
+    def __init__(self, app, on_change=None):
+        """Initialize an empty transaction.
+
+        Args:
+            app (MainApp): Catalog the changes are committed to
+            on_change (callable, optional): Called after every staged change
+        """
+        self.app = app
+        self.on_change = on_change
+        self._edits = {}  # committed name -> (item as staged from, staged item), or None if removed
+        self._added = {}  # name -> new item
+
+    def __len__(self):
+        return len(self._edits) + len(self._added)
+
+    def _notify(self):
+        if self.on_change is not None:
+            self.on_change()
+
+    def _original_name(self, name):
+        """Committed name of the item currently shown as `name` (None if it is new)."""
+        for original, edit in self._edits.items():
+            if edit is not None and edit[1]["name"] == name:
+                return original
+        if name in self._edits or name in self._added:
+            return None
+        return name
+
+    def _name_taken(self, name, ignore=None):
+        lowered = name.strip().lower()
+        return any(item["name"].strip().lower() == lowered
+                   for item in self.items() if item["name"] != ignore)
+
+    # --- Staging (same signatures as MainApp) ---
+
+    def add_item(self, new_item_data):
+        """Stages a new item. Returns False if the name is already taken."""
+        name = new_item_data.get("name", "").strip()
+        if self._name_taken(name):
+            return False
+        self._added[name] = new_item_data
+        self._notify()
+        return True
+
+    def update_item(self, original_item_name, updated_item_data):
+        """Stages an edit of the item shown as `original_item_name`. Returns False on a name clash."""
+        new_name = updated_item_data["name"]
+        if new_name != original_item_name and self._name_taken(new_name, ignore=original_item_name):
+            return False
+        if original_item_name in self._added:
+            del self._added[original_item_name]
+            self._added[new_name] = updated_item_data
+        else:
+            committed = self._original_name(original_item_name)
+            item = self.app.find_item(committed) if committed else None
+            if item is None:
+                return False
+            base = self._edits[committed][0] if self._edits.get(committed) else dict(item)
+            self._edits[committed] = (base, updated_item_data)
+        self._notify()
+        return True
+
+    def remove_item(self, item_to_remove):
+        name = item_to_remove["name"]
+        if self._added.pop(name, None) is None:
+            committed = self._original_name(name)
+            if committed is None:
+                return
+            self._edits[committed] = None
+        self._notify()
+
+    def discard(self):
+        self._edits.clear()
+        self._added.clear()
+        self._notify()
+
+    # --- Viewing ---
+
+    def overlay(self, items):
+        """`items` (committed) as they will be after commit: edits shown, removals left out."""
+        result = []
+        for item in items:
+            if item["name"] in self._edits:
+                edit = self._edits[item["name"]]
+                if edit is not None:
+                    result.append(edit[1])
+            else:
+                result.append(item)
+        return result
+
+    def is_staged(self, item):
+        """True if `item` is a staged (edited or new) item rather than a committed one."""
+        return (any(edit is not None and edit[1] is item for edit in self._edits.values())
+                or any(added is item for added in self._added.values()))
+
+    def added_items(self):
+        return list(self._added.values())
+
+    def items(self):
+        """The whole catalog with the staged changes."""
+        return self.overlay(self.app.items) + self.added_items()
+
+    def preview(self):
+        """One line per staged change, for review before commit."""
+        currency = getattr(self.app, "currency_symbol", "")
+        lines = []
+        for original, edit in self._edits.items():
+            if edit is None:
+                lines.append(f"Remove {original}")
+                continue
+            base, staged = edit
+            changes = []
+            for key, value in staged.items():
+                if base.get(key) == value:
+                    continue
+                if key == "name":
+                    changes.insert(0, f"rename to {value}")
+                elif key == "price":
+                    changes.append(f"price {currency}{base.get(key, 0):.2f} -> {currency}{value:.2f}")
+                elif key == "quantity":
+                    changes.append(f"qty {base.get(key)} -> {value} ({value - base.get(key, 0):+d})")
+                else:
+                    changes.append(f"{key} changed")
+            lines.append(f"Edit {original}: {', '.join(changes) or 'no changes'}")
+        for name, item in self._added.items():
+            lines.append(f"Add {name} ({currency}{item['price']:.2f}, qty {item['quantity']})")
+        return lines
+
+    # --- Commit ---
+
+    def commit(self):
+        """Applies the staged changes as one batch. Returns a CommittedBatch.
+
+        Changes to items that were removed or renamed elsewhere since they
+        were staged are skipped and listed in the batch's `skipped`.
+        """
+        app = self.app
+        updated, removed, added, skipped = [], [], [], []
+        before = []  # (committed name, item before, item after) for undo
+        for original, edit in self._edits.items():
+            current = app.find_item(original)
+            if current is None:
+                skipped.append(f"{original}: no longer in the catalog")
+                continue
+            if edit is None:
+                removed.append(current)
+                continue
+            base, staged = edit
+            new_item = dict(current)
+            new_item.update({key: value for key, value in staged.items() if base.get(key) != value})
+            if "quantity" in staged and staged["quantity"] != base.get("quantity"):
+                # Restock/adjustment on top of whatever was sold meanwhile
+                quantity = current["quantity"] + staged["quantity"] - base.get("quantity", 0)
+                if quantity < 0:
+                    skipped.append(f"{original}: stock would go negative ({quantity})")
+                    continue
+                new_item["quantity"] = quantity
+            if new_item == current:
+                continue
+            if new_item["name"] != original and app.name_taken(new_item["name"], ignore=original):
+                skipped.append(f"{original}: {new_item['name']} already exists")
+                continue
+            updated.append((original, new_item))
+            # Copied: sales update the live item in place
+            before.append((original, current, dict(new_item)))
+        for name, item in self._added.items():
+            if app.find_item(name) is not None:
+                skipped.append(f"{name}: already exists")
+            else:
+                added.append(item)
+
+        if added or updated or removed:
+            app.apply_bulk_changes(added=added, updated=updated, removed=[item["name"] for item in removed])
+        # No on_change here: the catalog events refresh the screen once
+        self._edits.clear()
+        self._added.clear()
+        return CommittedBatch(app, before, added, removed, skipped)
+
+
+class CommittedBatch:
+    """A committed transaction, kept so it can be undone as one batch."""
+
+    def __init__(self, app, edits, added, removed, skipped):
+        self.app = app
+        self._edits = edits  # (committed name, item before, item after)
+        self._added = added
+        self._removed = removed
+        self.skipped = skipped
+
+    def __len__(self):
+        return len(self._edits) + len(self._added) + len(self._removed)
+
+    def undo(self):
+        """Reverts the batch with one save and refresh. Returns lines for what couldn't be reverted.
+
+        Only fields that still hold the committed value are reverted, and a
+        quantity change is taken back as a difference, so stock sold after
+        the commit stays sold. Removed items come back at the end of the list.
+        """
+        app = self.app
+        updated, restored, removed, skipped = [], [], [], []
+        for original, old_item, new_item in self._edits:
+            current = app.find_item(new_item["name"])
+            if current is None:
+                skipped.append(f"{new_item['name']}: no longer in the catalog")
+                continue
+            reverted = dict(current)
+            for key, value in old_item.items():
+                if key == "quantity":
+                    continue
+                if new_item.get(key) != value and current.get(key) == new_item.get(key):
+                    reverted[key] = value
+            delta = new_item.get("quantity", 0) - old_item.get("quantity", 0)
+            if delta:
+                quantity = current["quantity"] - delta
+                if quantity < 0:
+                    skipped.append(f"{current['name']}: stock would go negative ({quantity})")
+                    continue
+                reverted["quantity"] = quantity
+            if reverted["name"] != current["name"] and app.name_taken(reverted["name"], ignore=current["name"]):
+                skipped.append(f"{current['name']}: {reverted['name']} exists again")
+                continue
+            if reverted != current:
+                updated.append((current["name"], reverted))
+        for item in self._added:
+            if app.find_item(item["name"]) is None:
+                skipped.append(f"{item['name']}: already removed")
+            else:
+                removed.append(item["name"])
+        for item in self._removed:
+            if app.find_item(item["name"]) is not None:
+                skipped.append(f"{item['name']}: the name is in use again")
+            else:
+                restored.append(item)
+        if restored or updated or removed:
+            app.apply_bulk_changes(added=restored, updated=updated, removed=removed)
+        return skipped
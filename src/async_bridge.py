@@ -0,0 +1,166 @@
+"""asyncio event loop running alongside Tk.
+
+Tk owns the main thread, so the asyncio loop runs on one background
+thread. Hardware waits (hopper payouts), network polls (e-wallet) and
+background file writes run there as coroutines instead of each needing
+its own thread or `time.sleep` loop.
+
+The bridge is the only way across:
+- Tk (or a GPIO callback) -> loop: `submit(coro)` / `call_soon(fn)`,
+  both thread-safe.
+- loop -> Tk: `call_in_tk(fn)` queues the call, and the Tk thread drains
+  the queue with `after`. Nothing on the loop thread touches a widget.
+
+Blocking calls inside coroutines go through `run_blocking`, which uses
+the loop's shared executor.
+"""
+import asyncio
+import os
+import queue
+import threading
+
+
+class AsyncBridge:
+    """An asyncio loop on a worker thread with a thread-safe path back to Tk."""
+
+    DRAIN_MS = 50
+    DRAIN_BATCH = 16  # Tk callbacks run per tick
+
+    def __init__(self, tk_widget):
+        """Start the loop thread and the Tk-side drain.
+
+        Args:
+            tk_widget: Any Tk widget, used to schedule queue draining
+        """
+        self.widget = tk_widget
+        self.loop = asyncio.new_event_loop()
+        self._to_tk = queue.SimpleQueue()
+        self._drain_job = None
+        self._thread = threading.Thread(target=self._run_loop, name="asyncio-loop", daemon=True)
+        self._thread.start()
+        self._drain_job = self.widget.after(self.DRAIN_MS, self._drain)
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def submit(self, coro, on_done=None):
+        """Runs `coro` on the loop. Safe to call from any thread.
+
+        Args:
+            coro: Coroutine object to schedule
+            on_done (callable, optional): on_done(result, error) called on the
+                Tk thread when the coroutine finishes; error is None on success
+
+        Returns:
+            A concurrent.futures.Future for the result
+        """
+        future = asyncio.run_coroutine_threadsafe(coro, self.loop)
+        if on_done is not None:
+            future.add_done_callback(lambda f: self.call_in_tk(self._deliver, f, on_done))
+        return future
+
+    @staticmethod
+    def _deliver(future, on_done):
+        if future.cancelled():
+            on_done(None, asyncio.CancelledError())
+        elif future.exception() is not None:
+            on_done(None, future.exception())
+        else:
+            on_done(future.result(), None)
+
+    def call_soon(self, callback, *args):
+        """Runs callback(*args) on the loop thread (e.g. from a GPIO callback)."""
+        self.loop.call_soon_threadsafe(callback, *args)
+
+    def call_in_tk(self, callback, *args):
+        """Runs callback(*args) on the Tk thread. Safe to call from any thread."""
+        self._to_tk.put((callback, args))
+
+    def _drain(self):
+        self._drain_job = None
+        for _ in range(self.DRAIN_BATCH):
+            try:
+                callback, args = self._to_tk.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                callback(*args)
+            except Exception as e:
+                print(f"Error in async callback: {e}")
+        try:
+            self._drain_job = self.widget.after(self.DRAIN_MS, self._drain)
+        except Exception:
+            pass  # The window is being destroyed
+
+    def close(self, timeout=5.0):
+        """Lets pending tasks finish (up to `timeout` seconds), then stops the loop."""
+        async def _shutdown():
+            current = asyncio.current_task()
+            tasks = [t for t in asyncio.all_tasks() if t is not current]
+            if tasks:
+                await asyncio.wait(tasks, timeout=timeout)
+
+        if self._drain_job is not None:
+            try:
+                self.widget.after_cancel(self._drain_job)
+            except Exception:
+                pass
+            self._drain_job = None
+        if not self.loop.is_running():
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(_shutdown(), self.loop).result(timeout + 1)
+        except Exception as e:
+            print(f"Error finishing async tasks: {e}")
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout=1.0)
+
+
+async def run_blocking(func, *args):
+    """Runs a blocking call (file or network I/O) without stalling the loop."""
+    return await asyncio.get_running_loop().run_in_executor(None, func, *args)
+
+
+class BackgroundWriter:
+    """Writes a file from the asyncio loop, keeping only the latest content.
+
+    `write()` returns at once. If writes arrive faster than the disk takes
+    them, intermediate contents are skipped: only the newest text is
+    written once the current write finishes. Files are replaced
+    atomically, so a crash leaves either the old or the new content.
+    """
+
+    def __init__(self, bridge, path):
+        self.bridge = bridge
+        self.path = path
+        self._latest = None  # loop thread only
+        self._task = None
+
+    def write(self, text):
+        """Queues `text` to be written. Safe to call from any thread."""
+        self.bridge.call_soon(self._enqueue, text)
+
+    def _enqueue(self, text):
+        self._latest = text
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._flush())
+
+    async def _flush(self):
+        try:
+            while self._latest is not None:
+                text, self._latest = self._latest, None
+                try:
+                    await run_blocking(self._write_file, text)
+                except Exception as e:
+                    print(f"Error writing {self.path}: {e}")
+        finally:
+            self._task = None
+
+    def _write_file(self, text):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as file:
+            file.write(text)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp_path, self.path)
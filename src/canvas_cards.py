@@ -0,0 +1,249 @@
+"""Canvas-native item card renderer for the kiosk grid.
+
+Draws each card as a handful of canvas items (rectangle, image, text) on
+`KioskFrame.canvas` instead of a Frame/Label widget tree. Every item of a
+card is tagged `card` and `card:<index>`, and hit-testing resolves taps
+through those tags.
+"""
+import os
+from image_loader import MODE_HEIGHT, PRIORITY_NORMAL
+
+
+class CanvasCardRenderer:
+    """Lays out and draws kiosk item cards directly on a canvas."""
+
+    CARD_WIDTH = 300
+    CARD_PAD = 15  # outer padding around each card (matches the widget grid)
+    INNER_PAD = 10
+    IMAGE_HEIGHT = 150
+    DESCRIPTION_LINES = 3
+
+    def __init__(self, kiosk):
+        """Initialize the renderer.
+
+        Args:
+            kiosk: The owning KioskFrame (provides canvas, colors, fonts and controller)
+        """
+        self.kiosk = kiosk
+        self.canvas = kiosk.canvas
+        self.items = []
+        self.photos = {}  # image path -> PhotoImage (False on error), kept across redraws
+        self._image_slots = {}  # image path -> [(card index, x, y)] awaiting a bitmap
+        self._measure_cache = {}  # (font name, text) -> width in px
+        self._linespace_cache = {}  # font name -> line height in px
+        self.card_height = self._compute_card_height()
+
+    # --- Font metrics -------------------------------------------------
+
+    def _linespace(self, font_key):
+        font = self.kiosk.fonts[font_key]
+        key = str(font)
+        if key not in self._linespace_cache:
+            self._linespace_cache[key] = font.metrics("linespace")
+        return self._linespace_cache[key]
+
+    def _measure(self, font_key, text):
+        font = self.kiosk.fonts[font_key]
+        key = (str(font), text)
+        width = self._measure_cache.get(key)
+        if width is None:
+            width = font.measure(text)
+            self._measure_cache[key] = width
+        return width
+
+    def invalidate_metrics(self):
+        """Drops cached metrics; call after a font is reconfigured."""
+        self._measure_cache.clear()
+        self._linespace_cache.clear()
+        self.card_height = self._compute_card_height()
+
+    def _compute_card_height(self):
+        return (
+            self.INNER_PAD + self.IMAGE_HEIGHT + self.INNER_PAD
+            + 5 + self._linespace("name") + 2
+            + self.DESCRIPTION_LINES * self._linespace("description") + 10
+            + max(self._linespace("price"), self._linespace("out_of_stock")) + self.INNER_PAD
+        )
+
+    def _truncate(self, font_key, text, width):
+        """Cuts `text` to fit `width` px, adding an ellipsis when shortened."""
+        if self._measure(font_key, text) <= width:
+            return text
+        while text and self._measure(font_key, text + "…") > width:
+            text = text[:-1]
+        return text + "…"
+
+    def _wrap(self, font_key, text, width, max_lines):
+        """Greedy word wrap using cached word widths."""
+        space = self._measure(font_key, " ")
+        lines, current, current_w = [], [], 0
+        for word in text.split():
+            word_w = self._measure(font_key, word)
+            extra = word_w if not current else space + word_w
+            if current and current_w + extra > width:
+                lines.append(" ".join(current))
+                current, current_w = [word], word_w
+            else:
+                current.append(word)
+                current_w += extra
+        if current:
+            lines.append(" ".join(current))
+        if len(lines) > max_lines:
+            lines = lines[:max_lines]
+            lines[-1] = self._truncate(font_key, lines[-1] + " …", width)
+        return "\n".join(lines)
+
+    # --- Images -------------------------------------------------------
+
+    def _photo_for(self, image_path):
+        """Returns a cached card-size PhotoImage, None if missing/pending, False on error."""
+        if not image_path or not os.path.exists(image_path):
+            return None
+        return self.photos.get(image_path)
+
+    def _request_photo(self, image_path, index, x, y):
+        """Queues a background decode; the placeholder at (x, y) is swapped later."""
+        slots = self._image_slots.get(image_path)
+        if slots is None:
+            self._image_slots[image_path] = [(index, x, y)]
+            self.kiosk.controller.image_loader.request(
+                image_path, self.IMAGE_HEIGHT, MODE_HEIGHT,
+                callback=lambda photo, path=image_path: self._on_photo(path, photo),
+                priority=PRIORITY_NORMAL, cache=False,
+            )
+        else:
+            slots.append((index, x, y))
+
+    def _on_photo(self, image_path, photo):
+        """Replaces the placeholders of every card showing `image_path` (Tk thread)."""
+        self.photos[image_path] = photo if photo is not None else False
+        for index, x, y in self._image_slots.pop(image_path, []):
+            placeholder = f"placeholder:{index}"
+            if photo is None:
+                self.canvas.itemconfigure(placeholder, text="Image Error")
+                continue
+            self.canvas.delete(placeholder)
+            self.canvas.create_image(x, y, image=photo, tags=("card", f"card:{index}"))
+
+    # --- Layout and drawing -------------------------------------------
+
+    def columns_for(self, canvas_width):
+        return max(1, canvas_width // (self.CARD_WIDTH + 2 * self.CARD_PAD))
+
+    def render(self, items, canvas_width):
+        """Clears the grid and draws a card for every item."""
+        self.canvas.delete("card")
+        self.items = list(items)
+        # Placeholders from the previous layout are gone; pending decodes still fill self.photos
+        for slots in self._image_slots.values():
+            slots.clear()
+
+        num_cols = self.columns_for(canvas_width)
+        cell_w = self.CARD_WIDTH + 2 * self.CARD_PAD
+        cell_h = self.card_height + 2 * self.CARD_PAD
+        x_offset = max(0, (canvas_width - num_cols * cell_w) // 2)
+
+        for index, item in enumerate(self.items):
+            row, col = divmod(index, num_cols)
+            x = x_offset + col * cell_w + self.CARD_PAD
+            y = row * cell_h + self.CARD_PAD
+            self.draw_card(index, item, x, y)
+
+        rows = (len(self.items) + num_cols - 1) // num_cols
+        self.canvas.configure(scrollregion=(0, 0, canvas_width, rows * cell_h))
+
+    def draw_card(self, index, item_data, x, y):
+        """Draws one card with its top-left corner at (x, y)."""
+        kiosk = self.kiosk
+        colors = kiosk.colors
+        tags = ("card", f"card:{index}")
+        in_stock = item_data["quantity"] > 0
+        bg = colors["card_bg"] if in_stock else colors["disabled_bg"]
+        text_w = self.CARD_WIDTH - 2 * self.INNER_PAD
+        left = x + self.INNER_PAD
+
+        self.canvas.create_rectangle(
+            x, y, x + self.CARD_WIDTH, y + self.card_height,
+            fill=bg, outline=colors["border"], tags=tags,
+        )
+
+        # Image (or placeholder text) centred in the image band
+        image_cx = x + self.CARD_WIDTH // 2
+        image_cy = y + self.INNER_PAD + self.IMAGE_HEIGHT // 2
+        image_path = item_data.get("image")
+        photo = self._photo_for(image_path)
+        if photo:
+            self.canvas.create_image(image_cx, image_cy, image=photo, tags=tags)
+        else:
+            pending = photo is None and image_path and os.path.exists(image_path)
+            if pending:
+                text = "Loading..."
+            else:
+                text = "Image Error" if photo is False else "No Image"
+            self.canvas.create_text(
+                image_cx, image_cy, text=text,
+                font=kiosk.fonts["image_placeholder"], fill=colors["gray_fg"],
+                tags=tags + (f"placeholder:{index}",),
+            )
+            if pending:
+                self._request_photo(image_path, index, image_cx, image_cy)
+
+        text_y = y + self.INNER_PAD + self.IMAGE_HEIGHT + self.INNER_PAD + 5
+        self.canvas.create_text(
+            left, text_y, anchor="nw",
+            text=self._truncate("name", item_data["name"], text_w),
+            font=kiosk.fonts["name"], fill=colors["text_fg"], tags=tags,
+        )
+        text_y += self._linespace("name") + 2
+        self.canvas.create_text(
+            left, text_y, anchor="nw", justify="left",
+            text=self._wrap("description", item_data["description"], text_w, self.DESCRIPTION_LINES),
+            font=kiosk.fonts["description"], fill=colors["gray_fg"], tags=tags,
+        )
+
+        bottom_y = y + self.card_height - self.INNER_PAD
+        if in_stock:
+            self.canvas.create_text(
+                left, bottom_y, anchor="sw",
+                text=f"{kiosk.controller.currency_symbol}{item_data['price']:.2f}",
+                font=kiosk.fonts["price"], fill=colors["price_fg"], tags=tags,
+            )
+            self.canvas.create_text(
+                x + self.CARD_WIDTH - self.INNER_PAD, bottom_y, anchor="se",
+                text=f"Qty: {item_data['quantity']}",
+                font=kiosk.fonts["quantity"], fill=colors["gray_fg"], tags=tags,
+            )
+        else:
+            self.canvas.create_text(
+                image_cx, bottom_y, anchor="s",
+                text="Out of Stock",
+                font=kiosk.fonts["out_of_stock"], fill=colors["out_of_stock_fg"], tags=tags,
+            )
+
+    # --- Hit-testing --------------------------------------------------
+
+    def item_at(self, x, y):
+        """Returns the item under widget coordinates (x, y), or None."""
+        cx, cy = self.canvas.canvasx(x), self.canvas.canvasy(y)
+        for canvas_id in reversed(self.canvas.find_overlapping(cx, cy, cx, cy)):
+            for tag in self.canvas.gettags(canvas_id):
+                if tag.startswith("card:"):
+                    index = int(tag[5:])
+                    if index < len(self.items):
+                        return self.items[index]
+        return None
+
+    def items_in_view(self, top, bottom):
+        """Returns the items whose cards overlap the canvas y-range [top, bottom)."""
+        indices = set()
+        for canvas_id in self.canvas.find_overlapping(0, top, self.canvas.winfo_width(), bottom):
+            for tag in self.canvas.gettags(canvas_id):
+                if tag.startswith("card:"):
+                    indices.add(int(tag[5:]))
+        return [self.items[i] for i in sorted(indices) if i < len(self.items)]
+
+    def clear(self):
+        self.canvas.delete("card")
+        self.items = []
+        for slots in self._image_slots.values():
+            slots.clear()
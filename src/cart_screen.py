@@ -2,6 +2,18 @@ import tkinter as tk
 from tkinter import font as tkfont
 from tkinter import messagebox
 from payment_handler import PaymentHandler
+from payment_devices import KIND_EWALLET
+from reservations import KIOSK_CART
+from fix_paths import get_absolute_path
+from money import ZERO
+import ewallet
+
+try:
+    # Optional: draw the e-wallet QR code (otherwise the payload is shown as text)
+    import qrcode
+    from PIL import ImageTk
+except Exception:
+    qrcode = None
 
 
 class CartScreen(tk.Frame):
@@ -9,11 +21,23 @@ class CartScreen(tk.Frame):
         tk.Frame.__init__(self, parent, bg="#f0f4f8")
         self.controller = controller
         # Initialize payment handler with coin hoppers from config
-        self.payment_handler = PaymentHandler(controller.config, coin_pin=17)  # Using GPIO17 for coin signal
+        self.payment_handler = PaymentHandler(
+            controller.config,
+            coin_pin=17,  # Using GPIO17 for coin signal
+            journal_path=get_absolute_path(controller.config.get("payment_journal", "payment_journal.jsonl")),
+            bridge=controller.async_bridge,
+        )
+        self.payment_handler.on_ewallet_refund = self._ewallet_refund_notice
         self.payment_in_progress = False
-        self.payment_received = 0.0
-        self.payment_required = 0.0
+        self.payout_in_progress = False  # change being paid out after a sale
+        self.recovery_in_progress = False  # a crashed session is being settled at startup
+        self.payment_received = ZERO
+        self.payment_required = ZERO
         self.change_label = None  # Will be created in the payment window
+        self._rows = {}  # item name -> widgets and last shown values of its cart line
+        self._grand_total = ZERO
+        self._qr_shown = None  # payload of the QR currently displayed
+        self._qr_image = None  # keeps the PhotoImage alive
         
         # --- Colors and Fonts ---
         self.colors = {
@@ -55,6 +79,14 @@ class CartScreen(tk.Frame):
         self.cart_items_frame = tk.Frame(self, bg=self.colors["background"])
         self.cart_items_frame.pack(fill="both", expand=True, padx=50)
 
+        self.empty_label = tk.Label(
+            self.cart_items_frame,
+            text="Your cart is empty.",
+            font=self.fonts["item_name"],
+            bg=self.colors["background"],
+            fg=self.colors["gray_fg"],
+        )
+
         # --- Footer for totals and buttons ---
         footer = tk.Frame(self, bg=self.colors["background"])
         footer.pack(fill="x", padx=50, pady=20)
@@ -94,153 +126,239 @@ class CartScreen(tk.Frame):
         )
         self.checkout_button.pack(side="left", expand=True, fill="x", padx=(5, 0))
 
+        self.ewallet_button = None
+        if self.payment_handler.ewallet_provider is not None:
+            self.ewallet_button = tk.Button(
+                action_frame,
+                text="Pay with E-Wallet",
+                font=self.fonts["action_button"],
+                bg=self.colors["payment_fg"],
+                fg=self.colors["background"],
+                relief="flat",
+                pady=10,
+                command=lambda: self.handle_checkout(pay_with_ewallet=True),
+            )
+            self.ewallet_button.pack(side="left", expand=True, fill="x", padx=(5, 0))
+
     def update_cart(self, cart_items):
-        # Clear previous items
-        for widget in self.cart_items_frame.winfo_children():
-            widget.destroy()
+        """Reconciles the cart lines with `cart_items`, keyed by item name.
 
-        if not cart_items:
-            tk.Label(
-                self.cart_items_frame,
-                text="Your cart is empty.",
-                font=self.fonts["item_name"],
-                bg=self.colors["background"],
-                fg=self.colors["gray_fg"],
-            ).pack(pady=50)
+        Existing rows are reused and only their changed labels are updated;
+        rows are created or destroyed only for lines added to or removed
+        from the cart.
+        """
+        names = set()
+        for item_info in cart_items:
+            names.add(item_info["item"]["name"])
+            self._update_row(item_info)
+        for name in [n for n in self._rows if n not in names]:
+            self._remove_row(name)
+        self._update_totals()
+
+    def update_cart_line(self, item_name):
+        """Refreshes the single cart line for `item_name` and the grand total."""
+        for item_info in self.controller.cart:
+            if item_info["item"]["name"] == item_name:
+                self._update_row(item_info)
+                break
+        else:
+            self._remove_row(item_name)
+        self._update_totals()
+
+    def _update_row(self, item_info):
+        """Creates the row for a cart line, or updates the labels that changed."""
+        item = item_info["item"]
+        quantity = item_info["quantity"]
+        total_price = item["price"] * quantity
+        row = self._rows.get(item["name"])
+        if row is None:
+            row = self._create_row(item)
+            self._rows[item["name"]] = row
+
+        if row["price"] != item["price"]:
+            row["price"] = item["price"]
+            row["details_label"].config(
+                text=f"{self.controller.currency_symbol}{item['price']:.2f} each"
+            )
+        if row["quantity"] != quantity:
+            row["quantity"] = quantity
+            row["qty_label"].config(text=str(quantity))
+        if row["total"] != total_price:
+            self._grand_total += total_price - row["total"]
+            row["total"] = total_price
+            row["total_label"].config(
+                text=f"{self.controller.currency_symbol}{total_price:.2f}"
+            )
+
+    def _remove_row(self, item_name):
+        row = self._rows.pop(item_name, None)
+        if row is not None:
+            self._grand_total -= row["total"]
+            row["frame"].destroy()
+
+    def _update_totals(self):
+        if not self._rows:
+            self._grand_total = ZERO
+            self.empty_label.pack(pady=50)
             self.total_label.config(text="")
             self.checkout_button.config(state="disabled")
+            if self.ewallet_button is not None:
+                self.ewallet_button.config(state="disabled")
             return
 
-        grand_total = 0
+        self.empty_label.pack_forget()
         self.checkout_button.config(state="normal")
-        for item_info in cart_items:
-            item = item_info["item"]
-            quantity = item_info["quantity"]
-            total_price = item["price"] * quantity
-            grand_total += total_price
-
-            item_frame = tk.Frame(
-                self.cart_items_frame,
-                bg="white",
-                highlightbackground=self.colors["border"],
-                highlightthickness=1,
-            )
-            item_frame.pack(fill="x", pady=5)
-            item_frame.grid_columnconfigure(1, weight=1)
+        if self.ewallet_button is not None:
+            self.ewallet_button.config(state="normal")
+        self.total_label.config(
+            text=f"Grand Total: {self.controller.currency_symbol}{self._grand_total:.2f}"
+        )
 
-            # --- Left side: Name and Price ---
-            info_frame = tk.Frame(item_frame, bg="white")
-            info_frame.grid(row=0, column=0, padx=15, pady=10, sticky="nw")
+    def _create_row(self, item):
+        """Builds the widgets for one cart line. Values are filled by _update_row."""
+        item_frame = tk.Frame(
+            self.cart_items_frame,
+            bg="white",
+            highlightbackground=self.colors["border"],
+            highlightthickness=1,
+        )
+        item_frame.pack(fill="x", pady=5)
+        item_frame.grid_columnconfigure(1, weight=1)
 
-            name_label = tk.Label(
-                info_frame,
-                text=item["name"],
-                font=self.fonts["item_name"],
-                bg="white",
-                fg=self.colors["text_fg"],
-                anchor="w",
-            )
-            name_label.pack(fill="x")
+        # --- Left side: Name and Price ---
+        info_frame = tk.Frame(item_frame, bg="white")
+        info_frame.grid(row=0, column=0, padx=15, pady=10, sticky="nw")
 
-            details_label = tk.Label(
-                info_frame,
-                text=f"{self.controller.currency_symbol}{item['price']:.2f} each",
-                font=self.fonts["item_details"],
-                bg="white",
-                fg=self.colors["gray_fg"],
-                anchor="w",
-            )
-            details_label.pack(fill="x")
+        name_label = tk.Label(
+            info_frame,
+            text=item["name"],
+            font=self.fonts["item_name"],
+            bg="white",
+            fg=self.colors["text_fg"],
+            anchor="w",
+        )
+        name_label.pack(fill="x")
 
-            # --- Right side: Controls and Total ---
-            controls_frame = tk.Frame(item_frame, bg="white")
-            controls_frame.grid(row=0, column=1, padx=15, pady=10, sticky="nse")
+        details_label = tk.Label(
+            info_frame,
+            font=self.fonts["item_details"],
+            bg="white",
+            fg=self.colors["gray_fg"],
+            anchor="w",
+        )
+        details_label.pack(fill="x")
 
-            # Quantity adjustment
-            qty_frame = tk.Frame(controls_frame, bg="white")
-            qty_frame.pack(side="left", padx=20)
+        # --- Right side: Controls and Total ---
+        controls_frame = tk.Frame(item_frame, bg="white")
+        controls_frame.grid(row=0, column=1, padx=15, pady=10, sticky="nse")
 
-            decrease_btn = tk.Button(
-                qty_frame,
-                text="-",
-                font=self.fonts["qty_btn"],
-                bg=self.colors["background"],
-                fg=self.colors["text_fg"],
-                relief="flat",
-                width=2,
-                command=lambda i=item: self.controller.decrease_cart_item_quantity(i),
-            )
-            decrease_btn.pack(side="left")
+        # Quantity adjustment
+        qty_frame = tk.Frame(controls_frame, bg="white")
+        qty_frame.pack(side="left", padx=20)
 
-            qty_label = tk.Label(
-                qty_frame,
-                text=str(quantity),
-                font=self.fonts["item_details"],
-                bg="white",
-                fg=self.colors["text_fg"],
-                width=3,
-            )
-            qty_label.pack(side="left", padx=5)
+        decrease_btn = tk.Button(
+            qty_frame,
+            text="-",
+            font=self.fonts["qty_btn"],
+            bg=self.colors["background"],
+            fg=self.colors["text_fg"],
+            relief="flat",
+            width=2,
+            command=lambda i=item: self.controller.decrease_cart_item_quantity(i),
+        )
+        decrease_btn.pack(side="left")
 
-            increase_btn = tk.Button(
-                qty_frame,
-                text="+",
-                font=self.fonts["qty_btn"],
-                bg=self.colors["background"],
-                fg=self.colors["text_fg"],
-                relief="flat",
-                width=2,
-                command=lambda i=item: self.controller.increase_cart_item_quantity(i),
-            )
-            increase_btn.pack(side="left")
+        qty_label = tk.Label(
+            qty_frame,
+            font=self.fonts["item_details"],
+            bg="white",
+            fg=self.colors["text_fg"],
+            width=3,
+        )
+        qty_label.pack(side="left", padx=5)
 
-            # Total price for the item line
-            price_label = tk.Label(
-                controls_frame,
-                text=f"{self.controller.currency_symbol}{total_price:.2f}",
-                font=self.fonts["item_name"],
-                bg="white",
-                fg=self.colors["text_fg"],
-                width=10,
-                anchor="e",
-            )
-            price_label.pack(side="left", padx=20)
+        increase_btn = tk.Button(
+            qty_frame,
+            text="+",
+            font=self.fonts["qty_btn"],
+            bg=self.colors["background"],
+            fg=self.colors["text_fg"],
+            relief="flat",
+            width=2,
+            command=lambda i=item: self.controller.increase_cart_item_quantity(i),
+        )
+        increase_btn.pack(side="left")
 
-            # Delete button
-            delete_btn = tk.Button(
-                controls_frame,
-                text="✕",
-                font=self.fonts["qty_btn"],
-                bg="white",
-                fg="#e74c3c",
-                relief="flat",
-                command=lambda i=item: self.controller.remove_from_cart(i),
-            )
-            delete_btn.pack(side="left")
+        # Total price for the item line
+        total_label = tk.Label(
+            controls_frame,
+            font=self.fonts["item_name"],
+            bg="white",
+            fg=self.colors["text_fg"],
+            width=10,
+            anchor="e",
+        )
+        total_label.pack(side="left", padx=20)
 
-        self.total_label.config(
-            text=f"Grand Total: {self.controller.currency_symbol}{grand_total:.2f}"
+        # Delete button
+        delete_btn = tk.Button(
+            controls_frame,
+            text="✕",
+            font=self.fonts["qty_btn"],
+            bg="white",
+            fg="#e74c3c",
+            relief="flat",
+            command=lambda i=item: self.controller.remove_from_cart(i),
         )
+        delete_btn.pack(side="left")
+
+        return {
+            "frame": item_frame,
+            "details_label": details_label,
+            "qty_label": qty_label,
+            "total_label": total_label,
+            "price": None,
+            "quantity": None,
+            "total": ZERO,
+        }
+
+    def handle_checkout(self, pay_with_ewallet=False):
+        """Process the checkout with coin payment using Allan 123A-Pro.
 
-    def handle_checkout(self):
-        """Process the checkout with coin payment using Allan 123A-Pro."""
+        Args:
+            pay_with_ewallet (bool): Also request the total from the customer's
+                e-wallet right away (coins are still accepted)
+        """
         if not self.controller.cart:
             return
+        if self.recovery_in_progress:
+            # The hoppers may still be paying out the interrupted session
+            messagebox.showinfo(
+                "Please Wait",
+                "The machine is finishing an earlier payment. Please try again in a moment.",
+            )
+            return
 
         # Calculate total amount needed
-        total_amount = sum(item["item"]["price"] * item["quantity"] for item in self.controller.cart)
+        total_amount = sum((item["item"]["price"] * item["quantity"] for item in self.controller.cart), ZERO)
         
         if not self.payment_in_progress:
             # Start payment session
             self.payment_in_progress = True
             self.payment_required = total_amount
-            self.payment_received = 0.0
-            self.payment_handler.start_payment_session(total_amount)
+            self.payment_received = ZERO
+            self.payment_handler.start_payment_session(
+                total_amount,
+                items=self._sale_lines(self.controller.cart),
+            )
+            # Don't let the cart expire while the customer is paying
+            self.controller.reservations.hold(KIOSK_CART)
             
             # Create payment status window with fixed size and position
             self.payment_window = tk.Toplevel(self)
             self.payment_window.title("Insert Coins")
-            self.payment_window.geometry("400x400")
+            ewallet_enabled = self.payment_handler.ewallet_provider is not None
+            self.payment_window.geometry("400x680" if ewallet_enabled else "400x400")
             self.payment_window.transient(self)  # Make it float on top
             self.payment_window.grab_set()  # Make it modal
             
@@ -313,9 +431,38 @@ class CartScreen(tk.Frame):
                 fg=self.colors["text_fg"],
                 justify=tk.LEFT
             ).pack()
+
+            # E-wallet payment of the remaining balance
+            self.ewallet_pay_button = None
+            self.ewallet_status = None
+            self.qr_label = None
+            if ewallet_enabled:
+                self._qr_shown = None
+                self._qr_image = None
+                self.ewallet_pay_button = tk.Button(
+                    self.payment_window,
+                    text="Pay with E-Wallet",
+                    font=self.fonts["item_details"],
+                    command=self.start_ewallet_payment,
+                    bg=self.colors["payment_fg"],
+                    fg="white",
+                    relief="flat"
+                )
+                self.ewallet_pay_button.pack(pady=(20, 5))
+                self.qr_label = tk.Label(self.payment_window, bg=self.colors["payment_bg"])
+                self.qr_label.pack()
+                self.ewallet_status = tk.Label(
+                    self.payment_window,
+                    text="",
+                    font=self.fonts["item_details"],
+                    bg=self.colors["payment_bg"],
+                    fg=self.colors["text_fg"],
+                    wraplength=360
+                )
+                self.ewallet_status.pack()
             
             # Cancel button
-            tk.Button(
+            self.cancel_button = tk.Button(
                 self.payment_window,
                 text="Cancel Payment",
                 font=self.fonts["item_details"],
@@ -323,8 +470,12 @@ class CartScreen(tk.Frame):
                 bg="white",
                 fg="#e74c3c",
                 relief="flat"
-            ).pack(pady=20)
+            )
+            self.cancel_button.pack(pady=20)
             
+            if pay_with_ewallet:
+                self.start_ewallet_payment()
+
             # Start updating payment status
             self.update_payment_status(total_amount)
             
@@ -340,6 +491,8 @@ class CartScreen(tk.Frame):
             received = self.payment_handler.get_current_amount()
             if received != self.payment_received:  # Only update if amount changed
                 self.payment_received = received
+                # Inserting coins counts as activity for the idle timeout
+                self.controller.idle_monitor.touch()
                 remaining = total_amount - received
                 
                 status_text = (
@@ -352,33 +505,139 @@ class CartScreen(tk.Frame):
                 if received >= total_amount:
                     self.complete_payment()
                     return
+
+            self._update_ewallet_status()
                     
             # Update every 100ms while payment is in progress
             self.after(100, lambda: self.update_payment_status(total_amount))
 
+    def start_ewallet_payment(self):
+        """Asks the customer's e-wallet for the remaining balance.
+
+        Returns immediately: the request is created and confirmed in the
+        background, and update_payment_status picks up the result.
+        """
+        if not self.payment_in_progress or self.ewallet_status is None:
+            return
+        remaining = self.payment_required - self.payment_handler.get_current_amount()
+        if remaining <= 0:
+            return
+        self.payment_handler.start_ewallet_payment(remaining)
+        self._show_qr(None)
+        self.ewallet_pay_button.config(state="disabled")
+        self.ewallet_status.config(text=f"Requesting e-wallet payment of ₱{remaining:.2f}...")
+
+    def _update_ewallet_status(self):
+        """Shows the QR code once the request exists and handles its outcome."""
+        session = self.payment_handler.ewallet_session
+        if session is None or self.ewallet_status is None:
+            return
+        if session.status == ewallet.PENDING:
+            # Scanning and paying on a phone is customer activity too
+            self.controller.idle_monitor.touch()
+            payload = session.qr_payload
+            if payload is not None and payload != self._qr_shown:
+                self._show_qr(payload)
+                self.ewallet_status.config(
+                    text=f"Scan to pay ₱{session.amount:.2f}\nRef: {session.reference}"
+                )
+        elif session.status == ewallet.PAID:
+            # The credit is on the device bus; get_current_amount counts it
+            self.payment_handler.cancel_ewallet_payment()
+            self._show_qr(None)
+            self.ewallet_status.config(text=f"E-wallet payment {session.reference} received")
+        else:
+            self.payment_handler.cancel_ewallet_payment()
+            self._show_qr(None)
+            reason = {
+                ewallet.EXPIRED: "The e-wallet payment timed out.",
+                ewallet.CANCELLED: "The e-wallet payment was cancelled.",
+            }.get(session.status, session.error or "The e-wallet payment failed.")
+            self.ewallet_status.config(text=f"{reason}\nInsert coins or try again.")
+            self.ewallet_pay_button.config(state="normal")
+
+    def _show_qr(self, payload):
+        """Draws `payload` as a QR code (or as text without qrcode/PIL); None clears it."""
+        self._qr_shown = payload
+        if self.qr_label is None:
+            return
+        if payload is None:
+            self._qr_image = None
+            self.qr_label.config(image="", text="")
+            return
+        if qrcode is not None:
+            try:
+                qr = qrcode.QRCode(box_size=4, border=2)
+                qr.add_data(payload)
+                qr.make(fit=True)
+                self._qr_image = ImageTk.PhotoImage(qr.make_image().convert("RGB"))
+                self.qr_label.config(image=self._qr_image, text="")
+                return
+            except Exception as e:
+                print(f"Error drawing QR code: {e}")
+        self.qr_label.config(image="", text=payload, wraplength=360, font=self.fonts["item_details"])
+
     def update_change_status(self, message):
         """Update the change dispensing status display."""
         if self.change_label:
             self.change_label.config(text=message)
             self.change_label.pack()  # Make visible
-            self.payment_window.update()
 
     def complete_payment(self):
-        """Complete the payment process and dispense items & change"""
+        """Complete the payment process and dispense items & change.
+
+        Change is paid out by a coroutine on the asyncio bridge, so the
+        window keeps updating while the hoppers run; _finish_payment
+        records the sale once the payout is done.
+        """
         if not self.payment_in_progress:
             return
             
         self.payment_in_progress = False
-        
+        self.payout_in_progress = True
+        # The payout can't be cancelled half way
+        self.cancel_button.config(state="disabled")
+        self.payment_window.protocol("WM_DELETE_WINDOW", lambda: None)
+        if self.ewallet_pay_button is not None:
+            self.ewallet_pay_button.config(state="disabled")
+        self.controller.idle_monitor.touch()
+
+        bridge = self.controller.async_bridge
         # Stop payment session and handle change
-        received, change_dispensed, change_status = self.payment_handler.stop_payment_session(
-            required_amount=self.payment_required
+        bridge.submit(
+            self.payment_handler.stop_payment_session_async(
+                required_amount=self.payment_required,
+                change_callback=lambda message: bridge.call_in_tk(self.update_change_status, message),
+            ),
+            on_done=self._finish_payment,
         )
-        
-        # Show change being dispensed if needed
-        if change_dispensed > 0:
-            self.update_change_status(f"Dispensing change: ₱{change_dispensed:.2f}...")
-            
+
+    def _finish_payment(self, result, error):
+        """Shows the receipt and records the sale once change has been paid out."""
+        if error is not None:
+            print(f"Error finishing payment: {error}")
+            received, change_dispensed, change_status = self.payment_received, ZERO, f"Error: {error}"
+        else:
+            received, change_dispensed, change_status = result
+        change_owed = self.payment_handler.change_owed
+
+        # Settle the sale before the receipt: Tk timers (the idle reset)
+        # keep running while the dialog is open
+        sales_uploader = self.controller.sales_uploader
+        if sales_uploader is not None:
+            sales_uploader.record({
+                "items": self._sale_lines(self.controller.cart),
+                "total": self.payment_required,
+                "received": received,
+                "change": change_dispensed,
+                "owed": change_owed,
+                "payments": dict(self.payment_handler.received_by_kind),
+            })
+        self.controller.record_sale(self.controller.cart)
+        self.payment_handler.mark_vend_done()
+        self.controller.clear_cart()
+        self.payout_in_progress = False
+
         # Show final status
         status_text = (
             f"Thank you!\n\n"
@@ -387,8 +646,8 @@ class CartScreen(tk.Frame):
         
         if change_dispensed > 0:
             status_text += f"Change dispensed: ₱{change_dispensed:.2f}\n"
-            if change_status:
-                status_text += f"{change_status}\n"
+        if change_status and (change_dispensed > 0 or change_owed > 0):
+            status_text += f"{change_status}\n"
                 
         status_text += "\nYour items will now be dispensed."
         
@@ -396,24 +655,98 @@ class CartScreen(tk.Frame):
         
         # Clean up and return to main screen
         self.payment_window.destroy()
-        self.controller.clear_cart()
         self.controller.show_frame("KioskFrame")
         
-    def cancel_payment(self):
-        """Cancel the current payment session"""
+    @staticmethod
+    def _sale_lines(cart_items):
+        return [
+            {"name": line["item"]["name"], "quantity": line["quantity"], "price": line["item"]["price"]}
+            for line in cart_items
+        ]
+
+    def cancel_payment(self, notify=True):
+        """Cancel the current payment session.
+
+        Args:
+            notify (bool): Show the collect-your-money dialog (off for idle resets)
+        """
         if self.payment_in_progress:
             self.payment_in_progress = False
-            received = self.payment_handler.stop_payment_session()
+            received = self.payment_handler.cancel_payment_session()
+            self.controller.reservations.touch(KIOSK_CART)
             
-            if received > 0:
-                messagebox.showwarning(
-                    "Payment Cancelled",
-                    f"Payment cancelled.\n"
-                    f"Please collect your money: ₱{received:.2f}"
-                )
+            # E-wallet money is refunded by the provider; only cash comes back out here
+            ewallet_part = self.payment_handler.received_by_kind.get(KIND_EWALLET, ZERO)
+            cash_part = received - ewallet_part
+            if received > 0 and not notify:
+                print(f"Payment cancelled with ₱{received:.2f} received (₱{ewallet_part:.2f} by e-wallet)")
+            elif received > 0:
+                text = "Payment cancelled.\n"
+                if cash_part > 0:
+                    text += f"Please collect your money: ₱{cash_part:.2f}\n"
+                if ewallet_part > 0:
+                    text += f"₱{ewallet_part:.2f} paid by e-wallet is being refunded to your e-wallet."
+                messagebox.showwarning("Payment Cancelled", text.strip())
             
             self.payment_window.destroy()
                 
+    def _ewallet_refund_notice(self, message, owed):
+        """Tells the customer about a late or failed e-wallet refund; money still owed is reported."""
+        sales_uploader = self.controller.sales_uploader
+        if owed > 0 and sales_uploader is not None:
+            sales_uploader.record({
+                "items": [],
+                "total": ZERO,
+                "received": owed,
+                "change": ZERO,
+                "owed": owed,
+                "note": message,
+            })
+        messagebox.showwarning("E-Wallet Payment", message)
+
+    def recover_interrupted_payment(self):
+        """Completes or refunds a payment that a crash or restart left open.
+
+        Any payout runs on the asyncio bridge; _finish_recovery reports it.
+        Checkout waits until then.
+        """
+        self.recovery_in_progress = True
+        self.controller.async_bridge.submit(
+            self.payment_handler.recover_interrupted_session_async(),
+            on_done=self._finish_recovery,
+        )
+
+    def _finish_recovery(self, result, error):
+        self.recovery_in_progress = False
+        if error is not None:
+            print(f"Error recovering payment session: {error}")
+            return
+        if result is None:
+            return
+        session, action, message = result
+        if action == "complete":
+            self.controller.record_recovered_sale(session.items)
+            if self.controller.sales_uploader is not None:
+                self.controller.sales_uploader.record({
+                    "items": session.items,
+                    "total": session.required,
+                    "received": session.received,
+                    "change": session.received - session.required,
+                    "recovered": True,
+                })
+            text = (
+                f"A payment of ₱{session.received:.2f} was interrupted by a restart "
+                f"after it was fully paid. The sale has been completed."
+            )
+        else:
+            text = (
+                f"A payment was interrupted by a restart before it was fully paid. "
+                f"The ₱{session.received:.2f} inserted has been refunded."
+            )
+        if message:
+            text += f"\n\n{message}"
+        messagebox.showinfo("Payment Recovered", text)
+
     def on_closing(self):
         """Handle cleanup when closing"""
         if hasattr(self, 'payment_handler'):
@@ -4,18 +4,19 @@ except Exception:
     # Not running on Raspberry Pi / RPi.GPIO unavailable — use a local mock so the UI can run
     import rpi_gpio_mock as GPIO
 import time
+from money import Money, ZERO
 from threading import Thread, Lock
 from queue import Queue
 
 class CoinAcceptor:
     # Allan 123A-Pro coin values matching your calibration
     COIN_VALUES = {
-        1: {'value': 1.0, 'description': 'Old 1 Peso Coin'},  # A1
-        2: {'value': 1.0, 'description': 'New 1 Peso Coin'},  # A2
-        3: {'value': 5.0, 'description': 'Old 5 Peso Coin'},  # A3
-        4: {'value': 5.0, 'description': 'New 5 Peso Coin'},  # A4
-        5: {'value': 10.0, 'description': 'Old 10 Peso Coin'}, # A5
-        6: {'value': 10.0, 'description': 'New 10 Peso Coin'}  # A6
+        1: {'value': Money.of(1), 'description': 'Old 1 Peso Coin'},  # A1
+        2: {'value': Money.of(1), 'description': 'New 1 Peso Coin'},  # A2
+        3: {'value': Money.of(5), 'description': 'Old 5 Peso Coin'},  # A3
+        4: {'value': Money.of(5), 'description': 'New 5 Peso Coin'},  # A4
+        5: {'value': Money.of(10), 'description': 'Old 10 Peso Coin'}, # A5
+        6: {'value': Money.of(10), 'description': 'New 10 Peso Coin'}  # A6
     }
 
     def __init__(self, coin_pin=17, counter_pin=None):  # GPIO17 for coin input
@@ -25,8 +26,9 @@ class CoinAcceptor:
         self.debounce_time = 0.05  # 50ms debounce for Allan 123A-Pro
         self.running = False
         self.payment_lock = Lock()
-        self.received_amount = 0.0
-        self.current_coin_value = 1.0  # Default coin value, adjust after programming
+        self.received_amount = ZERO  # Money; exact, so totals never drift
+        self.current_coin_value = Money.of(1)  # Default coin value, adjust after programming
+        self.on_coin = None  # Optional callback(value, new_total), called from the GPIO thread
         
         # Initialize GPIO
         GPIO.setmode(GPIO.BCM)
@@ -53,6 +55,13 @@ class CoinAcceptor:
         with self.payment_lock:
             # Add the current coin value when a coin is detected
             self.received_amount += self.current_coin_value
+            total = self.received_amount
+
+        if self.on_coin:
+            try:
+                self.on_coin(self.current_coin_value, total)
+            except Exception as e:
+                print(f"Error in coin callback: {e}")
 
     def get_received_amount(self):
         """Get the total amount received"""
@@ -62,7 +71,7 @@ class CoinAcceptor:
     def reset_amount(self):
         """Reset the received amount to zero"""
         with self.payment_lock:
-            self.received_amount = 0.0
+            self.received_amount = ZERO
 
     def cleanup(self):
         """Clean up GPIO settings"""
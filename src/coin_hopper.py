@@ -1,8 +1,12 @@
-import time
+import asyncio
+from money import Money
 try:
     import RPi.GPIO as GPIO
 except ImportError:
-    from rpi_gpio_mock import GPIO
+    import rpi_gpio_mock as GPIO
+
+# Seconds to wait for each hopper to pay out its coins
+DISPENSE_TIMEOUT = 30
 
 class CoinHopper:
     """Controls coin hoppers for dispensing change.
@@ -13,6 +17,10 @@ class CoinHopper:
     
     Uses GPIO pins to control motor activation for each hopper.
     Includes coin counting via feedback sensor.
+
+    Dispensing is a coroutine (`dispense_change_async`): the sensor
+    callbacks wake it for every coin counted, so it never sleeps in a
+    polling loop. It runs on the app's asyncio bridge, off the Tk thread.
     """
     
     def __init__(self, one_peso_pin, five_peso_pin, one_peso_sensor, five_peso_sensor):
@@ -44,6 +52,8 @@ class CoinHopper:
         # Setup coin counting
         self.one_peso_count = 0
         self.five_peso_count = 0
+        self._loop = None  # loop of the payout in progress
+        self._coin_counted = None  # asyncio.Event set by the sensor callbacks
         self.last_one_peso_state = GPIO.input(one_peso_sensor)
         self.last_five_peso_state = GPIO.input(five_peso_sensor)
         
@@ -57,6 +67,7 @@ class CoinHopper:
         if current_state != self.last_one_peso_state:
             if current_state == GPIO.HIGH:  # Coin detected
                 self.one_peso_count += 1
+                self._wake()
             self.last_one_peso_state = current_state
 
     def _five_peso_callback(self, channel):
@@ -65,40 +76,58 @@ class CoinHopper:
         if current_state != self.last_five_peso_state:
             if current_state == GPIO.HIGH:  # Coin detected
                 self.five_peso_count += 1
+                self._wake()
             self.last_five_peso_state = current_state
 
+    def _wake(self):
+        # Runs on the GPIO thread; hand the news to the payout coroutine
+        loop, event = self._loop, self._coin_counted
+        if loop is not None and event is not None:
+            try:
+                loop.call_soon_threadsafe(event.set)
+            except RuntimeError:
+                pass  # Loop already closed
+
     def calculate_change(self, amount):
         """Calculate optimal coin combination for change.
         
         Args:
-            amount: Amount of change needed in pesos
+            amount (Money): Amount of change needed. Centavos can't be paid
+                out by the hoppers and are left over.
             
         Returns:
             Tuple of (num_five_peso, num_one_peso) coins needed
         """
+        # Whole pesos, in exact integer arithmetic
+        pesos = Money.of(amount).centavos // 100
         # Use as many 5 peso coins as possible, then ones for remainder
-        num_five = amount // 5
-        remainder = amount % 5
-        num_one = remainder
+        num_five = pesos // 5
+        num_one = pesos % 5
         
         return (num_five, num_one)
 
-    def dispense_change(self, amount, callback=None):
+    def _dispensed(self):
+        return Money.of(self.five_peso_count * 5 + self.one_peso_count)
+
+    async def dispense_change_async(self, amount, callback=None):
         """Dispense specified amount of change using minimum coins.
         
         Args:
-            amount: Amount to dispense in pesos
-            callback: Optional function to call with status updates
+            amount (Money): Amount to dispense
+            callback: Optional function to call with status updates (called
+                on the event loop's thread)
             
         Returns:
-            Tuple of (success, dispensed_amount, error_message)
+            Tuple of (success, dispensed_amount (Money), error_message)
         """
         if amount <= 0:
-            return (True, 0, "No change needed")
+            return (True, Money(0), "No change needed")
             
         # Calculate coins needed
         five_needed, one_needed = self.calculate_change(amount)
         
+        self._loop = asyncio.get_running_loop()
+        self._coin_counted = asyncio.Event()
         try:
             # Reset counters
             self.five_peso_count = 0
@@ -108,48 +137,51 @@ class CoinHopper:
             if five_needed > 0:
                 if callback:
                     callback(f"Dispensing {five_needed} five peso coins...")
-                GPIO.output(self.five_peso_pin, GPIO.HIGH)
-                
-                # Wait for correct number of coins
-                timeout = time.time() + 30  # 30 second timeout
-                while self.five_peso_count < five_needed:
-                    if time.time() > timeout:
-                        GPIO.output(self.five_peso_pin, GPIO.LOW)
-                        return (False, 
-                               (self.five_peso_count * 5) + self.one_peso_count,
-                               "Timeout dispensing 5 peso coins")
-                    time.sleep(0.1)
-                    
-                GPIO.output(self.five_peso_pin, GPIO.LOW)
+                if not await self._run_hopper(self.five_peso_pin, lambda: self.five_peso_count, five_needed):
+                    return (False,
+                           self._dispensed(),
+                           "Timeout dispensing 5 peso coins")
 
             # Dispense 1 peso coins
             if one_needed > 0:
                 if callback:
                     callback(f"Dispensing {one_needed} one peso coins...")
-                GPIO.output(self.one_peso_pin, GPIO.HIGH)
-                
-                # Wait for correct number of coins
-                timeout = time.time() + 30  # 30 second timeout
-                while self.one_peso_count < one_needed:
-                    if time.time() > timeout:
-                        GPIO.output(self.one_peso_pin, GPIO.LOW)
-                        return (False,
-                               (self.five_peso_count * 5) + self.one_peso_count,
-                               "Timeout dispensing 1 peso coins")
-                    time.sleep(0.1)
-                    
-                GPIO.output(self.one_peso_pin, GPIO.LOW)
+                if not await self._run_hopper(self.one_peso_pin, lambda: self.one_peso_count, one_needed):
+                    return (False,
+                           self._dispensed(),
+                           "Timeout dispensing 1 peso coins")
             
-            total_dispensed = (self.five_peso_count * 5) + self.one_peso_count
+            total_dispensed = self._dispensed()
             return (True, total_dispensed, "Change dispensed successfully")
             
         except Exception as e:
+            return (False,
+                   self._dispensed(),
+                   f"Error dispensing change: {str(e)}")
+        finally:
             # Ensure motors are stopped
             GPIO.output(self.five_peso_pin, GPIO.LOW)
             GPIO.output(self.one_peso_pin, GPIO.LOW)
-            return (False,
-                   (self.five_peso_count * 5) + self.one_peso_count,
-                   f"Error dispensing change: {str(e)}")
+            self._loop = None
+            self._coin_counted = None
+
+    async def _run_hopper(self, motor_pin, count, needed):
+        """Runs one hopper motor until `needed` coins are counted. False on timeout."""
+        GPIO.output(motor_pin, GPIO.HIGH)
+        try:
+            deadline = self._loop.time() + DISPENSE_TIMEOUT
+            while count() < needed:
+                remaining = deadline - self._loop.time()
+                if remaining <= 0:
+                    return False
+                self._coin_counted.clear()
+                try:
+                    await asyncio.wait_for(self._coin_counted.wait(), remaining)
+                except asyncio.TimeoutError:
+                    pass
+            return True
+        finally:
+            GPIO.output(motor_pin, GPIO.LOW)
 
     def cleanup(self):
         """Clean up GPIO resources."""
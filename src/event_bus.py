@@ -0,0 +1,85 @@
+"""Change-event bus between the catalog (MainApp) and the screens.
+
+The controller publishes typed change events; subscribers receive them in
+one batch per Tk tick, flushed from an after_idle callback. Repeated
+events for the same item within a tick are coalesced, so a burst of stock
+changes costs each screen one update instead of one per change.
+"""
+from collections import namedtuple
+
+ITEM_ADDED = "item_added"
+ITEM_UPDATED = "item_updated"  # old_name holds the name before the edit
+ITEM_REMOVED = "item_removed"
+STOCK_CHANGED = "stock_changed"  # quantity or sales count changed
+CONFIG_CHANGED = "config_changed"
+
+CATALOG_EVENTS = (ITEM_ADDED, ITEM_UPDATED, ITEM_REMOVED)
+
+ChangeEvent = namedtuple("ChangeEvent", "kind name item old_name")
+
+
+class EventBus:
+    """Publishes change events to subscribers once per Tk tick."""
+
+    def __init__(self, tk_widget):
+        self.tk_widget = tk_widget
+        self._subscribers = []  # (callback, kinds or None for all)
+        self._pending = {}  # (kind, name) -> ChangeEvent, in last-published order
+        self._flush_job = None
+        # Bumped on every catalog change as it is published (not at flush),
+        # so readers can tell whether a snapshot is current, e.g. for ETags
+        self.catalog_version = 0
+
+    def subscribe(self, callback, kinds=None):
+        """Registers callback(events) for the given event kinds (all if None)."""
+        self._subscribers.append((callback, frozenset(kinds) if kinds else None))
+
+    def unsubscribe(self, callback):
+        self._subscribers = [(cb, kinds) for cb, kinds in self._subscribers if cb != callback]
+
+    def publish(self, kind, item=None, old_name=None):
+        """Queues an event; subscribers are called on the next idle flush."""
+        name = item["name"] if item is not None else old_name
+        if kind != CONFIG_CHANGED:
+            self.catalog_version += 1
+        if kind == ITEM_UPDATED:
+            # Edited twice in one tick: keep the name from before the first edit
+            earlier = self._pending.pop((ITEM_UPDATED, old_name), None)
+            if earlier is not None:
+                old_name = earlier.old_name
+        # A repeated (kind, name) moves to the end, so e.g. REMOVED, ADDED,
+        # REMOVED is delivered as ADDED then REMOVED and the item ends up removed
+        self._pending.pop((kind, name), None)
+        self._pending[(kind, name)] = ChangeEvent(kind, name, item, old_name)
+        if self._flush_job is None:
+            self._flush_job = self.tk_widget.after_idle(self.flush)
+
+    def flush(self):
+        """Delivers the queued events now."""
+        if self._flush_job is not None:
+            try:
+                self.tk_widget.after_cancel(self._flush_job)
+            except Exception:
+                pass
+            self._flush_job = None
+        if not self._pending:
+            return
+        events = self._coalesce(list(self._pending.values()))
+        self._pending = {}
+        for callback, kinds in list(self._subscribers):
+            wanted = events if kinds is None else [e for e in events if e.kind in kinds]
+            if not wanted:
+                continue
+            try:
+                callback(wanted)
+            except Exception as e:
+                print(f"Error delivering change events to {callback}: {e}")
+
+    @staticmethod
+    def _coalesce(events):
+        """Drops stock events for items that were also added, edited or removed."""
+        replaced = set()
+        for e in events:
+            if e.kind in CATALOG_EVENTS:
+                replaced.update((e.name, e.old_name))
+        return [e for e in events if e.kind != STOCK_CHANGED or e.name not in replaced]
@@ -0,0 +1,262 @@
+"""E-wallet/QR payments.
+
+A payment request is created with a provider, shown to the customer as a
+QR payload, and then confirmed asynchronously: an `EWalletSession` polls
+the provider from a coroutine (on the app's asyncio bridge, or on its own
+thread without one) and, once the provider reports the request as paid,
+credits the amount through the `EWalletDevice` on the payment device
+bus. The Tk thread only reads `session.status`, so it never waits on the
+network.
+
+Providers:
+- `LocalProviderClient` talks HTTP to the stand-in provider process
+  (`python src/ewallet_standin.py`), which plays the part of a real
+  e-wallet gateway on localhost.
+- `MockProvider` is in-memory and can confirm instantly, for tests and
+  throughput runs without a network.
+
+Configured with the "ewallet" config key, e.g.
+    "ewallet": {"provider": "local", "url": "http://127.0.0.1:8765", "timeout_seconds": 120}
+"""
+import asyncio
+import json
+import threading
+import time
+import uuid
+import urllib.request
+from money import Money
+from async_bridge import run_blocking
+
+PENDING = "pending"
+PAID = "paid"
+EXPIRED = "expired"
+CANCELLED = "cancelled"
+FAILED = "failed"
+REFUNDED = "refunded"
+FINAL_STATES = (PAID, EXPIRED, CANCELLED, FAILED, REFUNDED)
+
+
+def new_reference():
+    return f"RAON-{uuid.uuid4().hex[:10].upper()}"
+
+
+class PaymentRequest:
+    """A payment the customer is asked to make from their e-wallet."""
+
+    def __init__(self, reference, amount, qr_payload):
+        self.reference = reference
+        self.amount = amount  # Money
+        self.qr_payload = qr_payload
+
+
+class EWalletProvider:
+    """Interface of an e-wallet gateway."""
+
+    def create_request(self, amount, reference):
+        """Registers a payment request. Returns a PaymentRequest."""
+        raise NotImplementedError
+
+    def get_status(self, reference):
+        """Returns one of PENDING, PAID, EXPIRED, CANCELLED, FAILED."""
+        raise NotImplementedError
+
+    def cancel(self, reference):
+        raise NotImplementedError
+
+    def refund(self, reference, amount):
+        """Returns a paid request's money to the customer. Raises if it can't."""
+        raise NotImplementedError
+
+
+class MockProvider(EWalletProvider):
+    """In-memory provider. Requests are paid after `auto_confirm_after` seconds, or by confirm()."""
+
+    def __init__(self, auto_confirm_after=None):
+        self.auto_confirm_after = auto_confirm_after
+        self._requests = {}  # reference -> [status, created]
+        self._lock = threading.Lock()
+
+    def create_request(self, amount, reference):
+        with self._lock:
+            self._requests[reference] = [PENDING, time.monotonic()]
+        return PaymentRequest(reference, Money.of(amount), f"mock://pay/{reference}?amount={Money.of(amount)}")
+
+    def confirm(self, reference):
+        with self._lock:
+            if reference in self._requests and self._requests[reference][0] == PENDING:
+                self._requests[reference][0] = PAID
+
+    def get_status(self, reference):
+        with self._lock:
+            entry = self._requests.get(reference)
+            if entry is None:
+                return FAILED
+            if (entry[0] == PENDING and self.auto_confirm_after is not None
+                    and time.monotonic() - entry[1] >= self.auto_confirm_after):
+                entry[0] = PAID
+            return entry[0]
+
+    def cancel(self, reference):
+        with self._lock:
+            if reference in self._requests and self._requests[reference][0] == PENDING:
+                self._requests[reference][0] = CANCELLED
+
+    def refund(self, reference, amount):
+        with self._lock:
+            entry = self._requests.get(reference)
+            if entry is None or entry[0] != PAID:
+                raise ValueError(f"{reference} is not a paid request")
+            entry[0] = REFUNDED
+
+
+class LocalProviderClient(EWalletProvider):
+    """HTTP client for the stand-in provider process (see ewallet_standin.py)."""
+
+    def __init__(self, url="http://127.0.0.1:8765", request_timeout=2.0):
+        self.url = url.rstrip("/")
+        self.request_timeout = request_timeout
+
+    def _call(self, method, path, payload=None):
+        data = json.dumps(payload).encode("utf-8") if payload is not None else None
+        request = urllib.request.Request(
+            self.url + path, data=data, method=method,
+            headers={"Content-Type": "application/json"},
+        )
+        with urllib.request.urlopen(request, timeout=self.request_timeout) as response:
+            return json.loads(response.read().decode("utf-8") or "{}")
+
+    def create_request(self, amount, reference):
+        reply = self._call("POST", "/requests", {"reference": reference, "amount": Money.of(amount).pesos})
+        return PaymentRequest(reference, Money.of(amount), reply.get("qr_payload", reference))
+
+    def get_status(self, reference):
+        return self._call("GET", f"/requests/{reference}").get("status", FAILED)
+
+    def cancel(self, reference):
+        self._call("POST", f"/requests/{reference}/cancel", {})
+
+    def refund(self, reference, amount):
+        self._call("POST", f"/requests/{reference}/refund", {"amount": Money.of(amount).pesos})
+
+
+def build_provider(config):
+    """Creates the provider named in config["ewallet"], or None if e-wallet is off."""
+    options = config.get("ewallet")
+    if not options:
+        return None
+    kind = options.get("provider", "local")
+    if kind == "mock":
+        return MockProvider(auto_confirm_after=options.get("auto_confirm_after"))
+    if kind == "local":
+        return LocalProviderClient(options.get("url", "http://127.0.0.1:8765"))
+    print(f"Unknown e-wallet provider: {kind}")
+    return None
+
+
+class EWalletSession:
+    """Creates a payment request and waits for it in the background."""
+
+    def __init__(self, provider, device, amount, timeout_seconds=120, poll_interval=1.0,
+                 on_late_payment=None):
+        """Initialize the session (call start() to begin).
+
+        Args:
+            provider (EWalletProvider): Gateway to create and poll the request with
+            device (EWalletDevice): Bus device the confirmed amount is credited through
+            amount (Money): Amount to request
+            timeout_seconds (float): Give up (and cancel the request) after this long
+            poll_interval (float): Seconds between status polls
+            on_late_payment (callable, optional): on_late_payment(session), called
+                on the session's thread when the request is paid after cancel()
+        """
+        self.provider = provider
+        self.device = device
+        self.amount = Money.of(amount)
+        self.timeout_seconds = timeout_seconds
+        self.poll_interval = poll_interval
+        self.on_late_payment = on_late_payment
+        self.reference = new_reference()
+        self.request = None
+        self.status = PENDING  # read by the UI thread; written only by _run
+        self.error = None
+        self._stop = threading.Event()
+        # Held by cancel() and around the final confirm, so a payment is
+        # either credited before cancel() returns or treated as late
+        self._confirm_lock = threading.Lock()
+
+    def start(self, bridge=None):
+        """Runs the session on `bridge`'s event loop, or on a thread of its own."""
+        if bridge is not None:
+            bridge.submit(self._run())
+        else:
+            threading.Thread(target=asyncio.run, args=(self._run(),), daemon=True).start()
+        return self
+
+    def cancel(self):
+        """Stops waiting; the session cancels the request with the provider.
+
+        Once this returns the session credits nothing more to the device; a
+        payment that arrives later goes to on_late_payment.
+        """
+        with self._confirm_lock:
+            self._stop.set()
+
+    def _poll(self):
+        try:
+            return self.provider.get_status(self.reference)
+        except Exception as e:
+            # A dropped poll is retried until the deadline
+            print(f"E-wallet status poll failed: {e}")
+            return PENDING
+
+    @property
+    def qr_payload(self):
+        return self.request.qr_payload if self.request is not None else None
+
+    async def _wait(self, seconds):
+        """Sleeps up to `seconds`, waking early on cancel(). Returns True if cancelled."""
+        deadline = time.monotonic() + seconds
+        while not self._stop.is_set():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            await asyncio.sleep(min(remaining, 0.1))
+        return True
+
+    async def _run(self):
+        # Provider calls may block on the network, so they run in the executor
+        deadline = time.monotonic() + self.timeout_seconds
+        try:
+            self.request = await run_blocking(self.provider.create_request, self.amount, self.reference)
+        except Exception as e:
+            self.error = f"Could not reach the e-wallet provider: {e}"
+            self.status = FAILED
+            return
+
+        status = PENDING
+        while True:
+            stopped = await self._wait(self.poll_interval)
+            # Poll once more after a cancel or timeout: the customer may have just paid
+            status = await run_blocking(self._poll)
+            if stopped or status in FINAL_STATES or time.monotonic() >= deadline:
+                break
+
+        if status == PAID:
+            # cancel() may have landed while the last poll was in flight
+            with self._confirm_lock:
+                stopped = self._stop.is_set()
+                if not stopped:
+                    self.device.confirm(self.amount, self.reference)
+        if status == PAID and stopped:
+            # The payment session is already over; nothing can take this credit
+            self.error = f"E-wallet payment {self.reference} arrived after the session ended"
+            print(self.error)
+            if self.on_late_payment is not None:
+                self.on_late_payment(self)
+        elif status == PENDING:
+            status = CANCELLED if self._stop.is_set() else EXPIRED
+            try:
+                await run_blocking(self.provider.cancel, self.reference)
+            except Exception as e:
+                print(f"E-wallet cancel failed: {e}")
+        self.status = status
@@ -0,0 +1,177 @@
+"""Local stand-in for an e-wallet payment gateway.
+
+Runs a small HTTP server that the kiosk's LocalProviderClient talks to,
+so the e-wallet flow can be exercised without a real gateway account.
+
+Usage (from project root):
+    python src/ewallet_standin.py --port 8765
+    python src/ewallet_standin.py --auto-pay 5     # every request is paid after 5 s
+
+A request is paid by opening its QR payload (a /pay URL) in a browser,
+e.g. by scanning the QR code with a phone on the same network, or with
+    curl -X POST http://127.0.0.1:8765/requests/<reference>/pay
+
+API:
+    POST /requests                     {"reference", "amount"} -> {"reference", "qr_payload", "status"}
+    GET  /requests/<reference>         -> {"reference", "amount", "status"}
+    POST /requests/<reference>/cancel  -> {"status"}
+    POST /requests/<reference>/refund  -> {"status"} (409 unless paid)
+    GET|POST /requests/<reference>/pay -> {"status"}
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StandInGateway:
+    """In-memory payment requests with expiry and optional auto-pay."""
+
+    def __init__(self, public_url, expire_seconds=300, auto_pay=None):
+        self.public_url = public_url.rstrip("/")
+        self.expire_seconds = expire_seconds
+        self.auto_pay = auto_pay
+        self._requests = {}  # reference -> dict
+        self._lock = threading.Lock()
+
+    def create(self, reference, amount):
+        with self._lock:
+            self._requests[reference] = {
+                "reference": reference, "amount": amount,
+                "status": "pending", "created": time.monotonic(),
+            }
+        return {
+            "reference": reference,
+            "qr_payload": f"{self.public_url}/requests/{reference}/pay",
+            "status": "pending",
+        }
+
+    def _refresh(self, entry):
+        if entry["status"] != "pending":
+            return
+        age = time.monotonic() - entry["created"]
+        if self.auto_pay is not None and age >= self.auto_pay:
+            entry["status"] = "paid"
+        elif age >= self.expire_seconds:
+            entry["status"] = "expired"
+
+    def get(self, reference):
+        with self._lock:
+            entry = self._requests.get(reference)
+            if entry is None:
+                return None
+            self._refresh(entry)
+            return {k: entry[k] for k in ("reference", "amount", "status")}
+
+    def set_status(self, reference, status):
+        """Moves a pending request to `status`. Returns the resulting status or None."""
+        with self._lock:
+            entry = self._requests.get(reference)
+            if entry is None:
+                return None
+            self._refresh(entry)
+            if entry["status"] == "pending":
+                entry["status"] = status
+            return entry["status"]
+
+    def refund(self, reference):
+        """Refunds a paid request. Returns the resulting status, or None if unknown."""
+        with self._lock:
+            entry = self._requests.get(reference)
+            if entry is None:
+                return None
+            self._refresh(entry)
+            if entry["status"] == "paid":
+                entry["status"] = "refunded"
+            return entry["status"]
+
+
+def make_handler(gateway):
+    class Handler(BaseHTTPRequestHandler):
+        def _send(self, code, payload):
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _read_json(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            if not length:
+                return {}
+            try:
+                return json.loads(self.rfile.read(length).decode("utf-8"))
+            except ValueError:
+                return None
+
+        def _parts(self):
+            return [p for p in self.path.split("?")[0].split("/") if p]
+
+        def do_GET(self):
+            parts = self._parts()
+            if len(parts) == 2 and parts[0] == "requests":
+                entry = gateway.get(parts[1])
+                return self._send(200, entry) if entry else self._send(404, {"error": "unknown reference"})
+            if len(parts) == 3 and parts[0] == "requests" and parts[2] == "pay":
+                return self._transition(parts[1], "paid")
+            self._send(404, {"error": "not found"})
+
+        def do_POST(self):
+            parts = self._parts()
+            if parts == ["requests"]:
+                payload = self._read_json()
+                if not payload or "reference" not in payload or "amount" not in payload:
+                    return self._send(400, {"error": "reference and amount are required"})
+                return self._send(201, gateway.create(str(payload["reference"]), payload["amount"]))
+            if len(parts) == 3 and parts[0] == "requests" and parts[2] == "refund":
+                result = gateway.refund(parts[1])
+                if result is None:
+                    return self._send(404, {"error": "unknown reference"})
+                if result != "refunded":
+                    return self._send(409, {"reference": parts[1], "status": result})
+                return self._send(200, {"reference": parts[1], "status": result})
+            if len(parts) == 3 and parts[0] == "requests" and parts[2] in ("pay", "cancel"):
+                return self._transition(parts[1], "paid" if parts[2] == "pay" else "cancelled")
+            self._send(404, {"error": "not found"})
+
+        def _transition(self, reference, status):
+            result = gateway.set_status(reference, status)
+            if result is None:
+                return self._send(404, {"error": "unknown reference"})
+            self._send(200, {"reference": reference, "status": result})
+
+        def log_message(self, format, *args):
+            print(f"[ewallet] {self.address_string()} {format % args}")
+
+    return Handler
+
+
+def serve(host="127.0.0.1", port=8765, public_url=None, expire_seconds=300, auto_pay=None):
+    """Creates the stand-in server (call serve_forever() on the result)."""
+    gateway = StandInGateway(public_url or f"http://{host}:{port}", expire_seconds, auto_pay)
+    return ThreadingHTTPServer((host, port), make_handler(gateway))
+
+
+def main():
+    p = argparse.ArgumentParser(description="Local stand-in e-wallet gateway")
+    p.add_argument('--host', default='127.0.0.1')
+    p.add_argument('--port', type=int, default=8765)
+    p.add_argument('--public-url', default=None, help='Base URL put in QR payloads (e.g. the Pi LAN address)')
+    p.add_argument('--expire', type=float, default=300, help='Seconds before an unpaid request expires')
+    p.add_argument('--auto-pay', type=float, default=None, help='Mark every request paid after this many seconds')
+    args = p.parse_args()
+
+    server = serve(args.host, args.port, args.public_url, args.expire, args.auto_pay)
+    print(f"E-wallet stand-in listening on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+"""Category facet index with precomputed per-category counts.
+
+Keeps, for every category, the set of member item names together with
+the total and in-stock counts. Adding, editing or removing an item and
+stock changes update the counts incrementally.
+"""
+
+ALL_CATEGORIES = "All"
+UNCATEGORIZED = "Uncategorized"
+
+
+def category_of(item):
+    """Returns the item's category, falling back to UNCATEGORIZED."""
+    return (item.get("category") or "").strip() or UNCATEGORIZED
+
+
+class FacetIndex:
+    """Category -> members index with total and in-stock counts."""
+
+    def __init__(self):
+        self._members = {}  # category -> set of item names
+        self._in_stock = {}  # category -> number of members with quantity > 0
+        self._item_state = {}  # item name -> (category, in stock)
+
+    def build(self, items):
+        self._members.clear()
+        self._in_stock.clear()
+        self._item_state.clear()
+        for item in items:
+            self.add(item)
+
+    def add(self, item):
+        key = item["name"]
+        if key in self._item_state:
+            self.remove(key)
+        category = category_of(item)
+        in_stock = item.get("quantity", 0) > 0
+        self._members.setdefault(category, set()).add(key)
+        self._in_stock[category] = self._in_stock.get(category, 0) + (1 if in_stock else 0)
+        self._item_state[key] = (category, in_stock)
+
+    def remove(self, key):
+        state = self._item_state.pop(key, None)
+        if state is None:
+            return
+        category, in_stock = state
+        members = self._members.get(category)
+        if members is not None:
+            members.discard(key)
+            if in_stock:
+                self._in_stock[category] -= 1
+            if not members:
+                del self._members[category]
+                del self._in_stock[category]
+
+    def update(self, old_key, item):
+        self.remove(old_key)
+        self.add(item)
+
+    def stock_changed(self, item):
+        """Updates the in-stock count after `item["quantity"]` changed. O(1)."""
+        state = self._item_state.get(item["name"])
+        if state is None:
+            return
+        category, was_in_stock = state
+        in_stock = item.get("quantity", 0) > 0
+        if in_stock != was_in_stock:
+            self._in_stock[category] += 1 if in_stock else -1
+            self._item_state[item["name"]] = (category, in_stock)
+
+    def categories(self):
+        """Category names, sorted, with UNCATEGORIZED last."""
+        return sorted(self._members, key=lambda c: (c == UNCATEGORIZED, c.lower()))
+
+    def members(self, category):
+        """Names of the items in `category`; None for ALL_CATEGORIES (no filter)."""
+        if category == ALL_CATEGORIES:
+            return None
+        return self._members.get(category, set())
+
+    def count(self, category=ALL_CATEGORIES):
+        if category == ALL_CATEGORIES:
+            return len(self._item_state)
+        return len(self._members.get(category, ()))
+
+    def in_stock_count(self, category=ALL_CATEGORIES):
+        if category == ALL_CATEGORIES:
+            return sum(self._in_stock.values())
+        return self._in_stock.get(category, 0)
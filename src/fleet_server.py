@@ -0,0 +1,243 @@
+"""Local stand-in for the fleet's central inventory store.
+
+Speaks the protocols of fleet_sync.FleetClient and
+sales_uploader.SalesClient so the sync agent and the sales uploader can
+be tried without the real backend, including over a flaky or busy link.
+
+Usage (from project root):
+    python src/fleet_server.py --port 8766
+    python src/fleet_server.py --drop 0.3          # fail 30% of requests
+    python src/fleet_server.py --busy 0.5          # answer 50% of sales uploads with 429
+    python src/fleet_server.py --price "Arduino Uno=450"
+
+Change a price for every machine while it runs:
+    curl -X POST -d '{"Arduino Uno": 460}' http://127.0.0.1:8766/catalog/prices
+
+API (bodies are JSON, gzip-compressed when Content-Encoding/Accept-Encoding say so):
+    GET  /catalog/changes?since=<version> -> {"version", "changes": [{"name", "price"}]}
+    POST /catalog/prices                  {name: price} -> {"version"}
+    POST /machines/<id>/levels            {"seq", "levels": {name: level|null}} -> {"acked"}
+    GET  /machines/<id>                   -> {"seq", "levels"}
+    GET  /machines                        -> {id: {"seq", "items"}}
+    GET  /sales/<id>/ack                  -> {"acked"}
+    POST /sales/<id>/chunks/<seq>         gzip JSON lines, X-Dropped-Records -> {"acked"}
+    GET  /sales/<id>                      -> {"acked", "records", "dropped", "total"}
+"""
+import argparse
+import gzip
+import json
+import random
+import threading
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FleetStore:
+    """In-memory central store: a versioned price log and per-machine levels."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.version = 0
+        self._prices = {}  # name -> (version, price)
+        self._machines = {}  # machine id -> {"seq", "levels"}
+        self._sales = {}  # machine id -> {"acked", "ids", "records", "dropped"}
+
+    def set_prices(self, prices):
+        with self._lock:
+            self.version += 1
+            for name, price in prices.items():
+                self._prices[name] = (self.version, price)
+            return self.version
+
+    def changes_since(self, since):
+        with self._lock:
+            changes = [{"name": name, "price": price}
+                       for name, (version, price) in self._prices.items() if version > since]
+            return {"version": self.version, "changes": changes}
+
+    def apply_levels(self, machine_id, seq, levels):
+        """Applies a batch once; a resent batch (same or older seq) is only acknowledged."""
+        with self._lock:
+            machine = self._machines.setdefault(machine_id, {"seq": 0, "levels": {}})
+            if seq > machine["seq"]:
+                for name, level in levels.items():
+                    if level is None:
+                        machine["levels"].pop(name, None)
+                    else:
+                        machine["levels"][name] = level
+                machine["seq"] = seq
+            return {"acked": seq}
+
+    def machine(self, machine_id):
+        with self._lock:
+            machine = self._machines.get(machine_id)
+            return json.loads(json.dumps(machine)) if machine else None
+
+    def _sales_for(self, machine_id):
+        return self._sales.setdefault(machine_id, {"acked": 0, "ids": set(), "records": [], "dropped": 0})
+
+    def sales_acked(self, machine_id):
+        with self._lock:
+            return {"acked": self._sales_for(machine_id)["acked"]}
+
+    def add_sales_chunk(self, machine_id, seq, records, dropped=0):
+        """Stores a chunk of sales once; acknowledgements are cumulative."""
+        with self._lock:
+            sales = self._sales_for(machine_id)
+            if seq > sales["acked"]:
+                for record in records:
+                    # A sale spooled twice around a crash is kept once
+                    if record.get("id") not in sales["ids"]:
+                        sales["ids"].add(record.get("id"))
+                        sales["records"].append(record)
+                sales["dropped"] += dropped
+                sales["acked"] = seq
+            return {"acked": sales["acked"]}
+
+    def sales(self, machine_id):
+        with self._lock:
+            sales = self._sales.get(machine_id)
+            if sales is None:
+                return None
+            total = sum(record.get("total", 0) for record in sales["records"])
+            return {"acked": sales["acked"], "records": len(sales["records"]),
+                    "dropped": sales["dropped"], "total": total}
+
+    def summary(self):
+        with self._lock:
+            return {mid: {"seq": m["seq"], "items": len(m["levels"])} for mid, m in self._machines.items()}
+
+
+def make_handler(store, drop_rate=0.0, busy_rate=0.0):
+    class Handler(BaseHTTPRequestHandler):
+        def _send(self, code, payload):
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            if "gzip" in (self.headers.get("Accept-Encoding") or ""):
+                body = gzip.compress(body)
+                self.send_header("Content-Encoding", "gzip")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _read_body(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            data = self.rfile.read(length) if length else b""
+            if self.headers.get("Content-Encoding") == "gzip":
+                data = gzip.decompress(data)
+            return data.decode("utf-8")
+
+        def _read_json(self):
+            return json.loads(self._read_body() or "{}")
+
+        def _dropped(self):
+            # Simulated bad link: fail before (or after) doing the work
+            if drop_rate and random.random() < drop_rate:
+                self._send(503, {"error": "simulated link failure"})
+                return True
+            return False
+
+        def do_GET(self):
+            if self._dropped():
+                return
+            url = urllib.parse.urlsplit(self.path)
+            parts = [urllib.parse.unquote(p) for p in url.path.split("/") if p]
+            if parts == ["catalog", "changes"]:
+                query = urllib.parse.parse_qs(url.query)
+                return self._send(200, store.changes_since(int(query.get("since", ["0"])[0])))
+            if parts == ["machines"]:
+                return self._send(200, store.summary())
+            if len(parts) == 3 and parts[0] == "sales" and parts[2] == "ack":
+                return self._send(200, store.sales_acked(parts[1]))
+            if len(parts) == 2 and parts[0] == "sales":
+                sales = store.sales(parts[1])
+                return self._send(200, sales) if sales else self._send(404, {"error": "unknown machine"})
+            if len(parts) == 2 and parts[0] == "machines":
+                machine = store.machine(parts[1])
+                return self._send(200, machine) if machine else self._send(404, {"error": "unknown machine"})
+            self._send(404, {"error": "not found"})
+
+        def do_POST(self):
+            if self._dropped():
+                return
+            parts = [urllib.parse.unquote(p) for p in urllib.parse.urlsplit(self.path).path.split("/") if p]
+            if len(parts) == 4 and parts[0] == "sales" and parts[2] == "chunks":
+                return self._sales_chunk(parts[1], parts[3])
+            try:
+                payload = self._read_json()
+            except (ValueError, OSError):
+                return self._send(400, {"error": "bad body"})
+            if parts == ["catalog", "prices"]:
+                return self._send(200, {"version": store.set_prices(payload)})
+            if len(parts) == 3 and parts[0] == "machines" and parts[2] == "levels":
+                if "seq" not in payload:
+                    return self._send(400, {"error": "seq is required"})
+                reply = store.apply_levels(parts[1], int(payload["seq"]), payload.get("levels", {}))
+                if drop_rate and random.random() < drop_rate:
+                    # Applied, but the acknowledgement is lost: the client must resend safely
+                    return self._send(503, {"error": "simulated lost reply"})
+                return self._send(200, reply)
+            self._send(404, {"error": "not found"})
+
+        def _sales_chunk(self, machine_id, seq):
+            if busy_rate and random.random() < busy_rate:
+                # Backpressure: the uploader keeps the chunk and waits
+                self.send_response(429)
+                self.send_header("Retry-After", "2")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            try:
+                records = [json.loads(line) for line in self._read_body().splitlines() if line.strip()]
+                seq = int(seq)
+            except (ValueError, OSError):
+                return self._send(400, {"error": "bad chunk"})
+            dropped = int(self.headers.get("X-Dropped-Records") or 0)
+            reply = store.add_sales_chunk(machine_id, seq, records, dropped)
+            if drop_rate and random.random() < drop_rate:
+                return self._send(503, {"error": "simulated lost reply"})
+            self._send(200, reply)
+
+        def log_message(self, format, *args):
+            print(f"[fleet] {self.address_string()} {format % args}")
+
+    return Handler
+
+
+def serve(host="127.0.0.1", port=8766, drop_rate=0.0, prices=None, busy_rate=0.0):
+    """Creates the stand-in server (call serve_forever() on the result)."""
+    store = FleetStore()
+    if prices:
+        store.set_prices(prices)
+    server = ThreadingHTTPServer((host, port), make_handler(store, drop_rate, busy_rate))
+    server.store = store
+    return server
+
+
+def main():
+    p = argparse.ArgumentParser(description="Local stand-in for the fleet inventory store")
+    p.add_argument('--host', default='127.0.0.1')
+    p.add_argument('--port', type=int, default=8766)
+    p.add_argument('--drop', type=float, default=0.0, help='Fraction of requests to fail (simulates a flaky link)')
+    p.add_argument('--busy', type=float, default=0.0, help='Fraction of sales uploads answered with 429 (backpressure)')
+    p.add_argument('--price', action='append', default=[], metavar='NAME=PRICE', help='Initial center price')
+    args = p.parse_args()
+
+    prices = {}
+    for spec in args.price:
+        name, _, price = spec.rpartition("=")
+        prices[name] = float(price)
+
+    server = serve(args.host, args.port, args.drop, prices, args.busy)
+    print(f"Fleet store stand-in listening on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,259 @@
+"""Fleet inventory sync with a central store.
+
+Each machine keeps its own item_list.json. The sync agent replicates it
+with a central store in small versioned deltas:
+
+- machine -> center: stock levels (on-hand quantity and sales count) of
+  the items that changed, as absolute values. Changes to one item are
+  coalesced, so a busy hour sends each item once. Every batch carries a
+  sequence number and is resent unchanged until acknowledged, so the
+  center can ignore duplicates after a dropped reply.
+- center -> machine: price changes made since the last catalog version
+  the machine applied.
+
+Bodies are gzip-compressed JSON. Unsent levels, the unacknowledged batch
+and the applied catalog version are kept in a state file, so a dropped
+link or a restart only delays the sync. The agent runs as a coroutine on
+the app's asyncio bridge and retries with exponential backoff.
+
+Configured with the "fleet_sync" config key, e.g.
+    "fleet_sync": {"url": "http://127.0.0.1:8766", "machine_id": "raon-01"}
+A local stand-in for the central store is in fleet_server.py.
+"""
+import asyncio
+import gzip
+import json
+import socket
+import urllib.parse
+import urllib.request
+from async_bridge import BackgroundWriter, run_blocking
+from event_bus import ITEM_ADDED, ITEM_UPDATED, ITEM_REMOVED, STOCK_CHANGED
+from fix_paths import get_absolute_path
+from money import Money, json_default
+
+
+def encode_body(payload):
+    """Gzip-compressed JSON request/response body."""
+    return gzip.compress(json.dumps(payload, separators=(",", ":"), default=json_default).encode("utf-8"))
+
+
+def decode_body(data, content_encoding=None):
+    if content_encoding == "gzip":
+        data = gzip.decompress(data)
+    return json.loads(data.decode("utf-8") or "{}")
+
+
+class FleetClient:
+    """HTTP client for the central store (see fleet_server.py for the API)."""
+
+    def __init__(self, url, machine_id, request_timeout=10.0):
+        self.url = url.rstrip("/")
+        self.machine_id = machine_id
+        self.request_timeout = request_timeout
+
+    def _call(self, method, path, payload=None):
+        headers = {"Accept-Encoding": "gzip"}
+        data = None
+        if payload is not None:
+            data = encode_body(payload)
+            headers.update({"Content-Type": "application/json", "Content-Encoding": "gzip"})
+        request = urllib.request.Request(self.url + path, data=data, method=method, headers=headers)
+        with urllib.request.urlopen(request, timeout=self.request_timeout) as response:
+            return decode_body(response.read(), response.headers.get("Content-Encoding"))
+
+    def push_levels(self, seq, levels):
+        """Sends one batch of item levels. Returns the acknowledged sequence number."""
+        machine = urllib.parse.quote(self.machine_id, safe="")
+        reply = self._call("POST", f"/machines/{machine}/levels", {"seq": seq, "levels": levels})
+        return reply.get("acked")
+
+    def pull_prices(self, since):
+        """Returns (catalog_version, [{"name", "price"}]) for price changes after `since`."""
+        reply = self._call("GET", f"/catalog/changes?since={int(since)}")
+        return reply.get("version", since), reply.get("changes", [])
+
+
+class FleetSyncAgent:
+    """Replicates stock levels to the central store and applies its price changes."""
+
+    def __init__(self, app, client, state_path, interval_seconds=60, max_batch=200,
+                 retry_max_seconds=300):
+        """Initialize the agent (call start() to begin syncing).
+
+        Args:
+            app (MainApp): Catalog owner; levels are read and prices applied on its Tk thread
+            client (FleetClient): Connection to the central store
+            state_path (str): File keeping unsent levels and sync versions
+            interval_seconds (float): Time between syncs while nothing goes wrong
+            max_batch (int): Most item levels sent in one request
+            retry_max_seconds (float): Longest backoff after failed syncs
+        """
+        self.app = app
+        self.bridge = app.async_bridge
+        self.client = client
+        self.interval_seconds = interval_seconds
+        self.max_batch = max_batch
+        self.retry_max_seconds = retry_max_seconds
+        self._writer = BackgroundWriter(self.bridge, state_path)
+        # Loop-thread state (loaded once here, before the loop sees it)
+        self._seq = 0  # sequence number of the last batch created
+        self._price_version = 0  # last center catalog version applied
+        self._pending = {}  # name -> level, or None for a removed item
+        self._in_flight = None  # {"seq", "levels"} sent but not acknowledged
+        self._stopped = False
+        self._wake = None
+        self._load_state(state_path)
+
+    def _load_state(self, path):
+        try:
+            with open(path, "r") as file:
+                state = json.load(file)
+        except FileNotFoundError:
+            # First sync: the center gets every item
+            self._pending = {item["name"]: self._level(item) for item in self.app.items}
+            return
+        except Exception as e:
+            print(f"Error reading fleet sync state, starting over: {e}")
+            self._pending = {item["name"]: self._level(item) for item in self.app.items}
+            return
+        self._seq = state.get("seq", 0)
+        self._price_version = state.get("price_version", 0)
+        self._pending = state.get("pending", {})
+        self._in_flight = state.get("in_flight")
+
+    def _save_state(self):
+        self._writer.write(json.dumps({
+            "seq": self._seq,
+            "price_version": self._price_version,
+            "pending": self._pending,
+            "in_flight": self._in_flight,
+        }))
+
+    def _level(self, item):
+        """An item's replicated level: on-hand stock (including cart reservations) and sales."""
+        return {
+            "quantity": item.get("quantity", 0) + self.app.reservations.reserved(item["name"]),
+            "sold": item.get("sold", 0),
+        }
+
+    # --- Tk thread ---
+
+    def start(self):
+        self.app.events.subscribe(
+            self.on_catalog_changed, kinds=(ITEM_ADDED, ITEM_UPDATED, ITEM_REMOVED, STOCK_CHANGED))
+        self.bridge.submit(self._run())
+        return self
+
+    def stop(self):
+        self.app.events.unsubscribe(self.on_catalog_changed)
+        self.bridge.call_soon(self._stop)
+
+    def sync_now(self):
+        """Syncs without waiting for the next interval."""
+        self.bridge.call_soon(self._poke)
+
+    def on_catalog_changed(self, events):
+        """Queues the new levels of the changed items for the next sync."""
+        changes = {}
+        for event in events:
+            if event.old_name and event.old_name != event.name:
+                changes[event.old_name] = None  # Renamed: the old name is gone
+            changes[event.name] = None if event.kind == ITEM_REMOVED else self._level(event.item)
+        self.bridge.call_soon(self._mark, changes)
+
+    def _apply_prices(self, changes, version):
+        """Applies center price changes through the normal edit path, then records the version."""
+        for change in changes:
+            item = self.app.find_item(change.get("name"))
+            if item is None:
+                continue  # Not stocked on this machine
+            try:
+                price = Money.of(change.get("price"))
+            except ValueError:
+                print(f"Ignoring bad fleet price for {item['name']}: {change.get('price')!r}")
+                continue
+            if price != item["price"]:
+                self.app.update_item(item["name"], dict(item, price=price))
+        self.bridge.call_soon(self._prices_applied, version)
+
+    # --- Loop thread ---
+
+    def _mark(self, changes):
+        self._pending.update(changes)
+        self._save_state()
+        if len(self._pending) >= self.max_batch:
+            self._poke()
+
+    def _poke(self):
+        if self._wake is not None:
+            self._wake.set()
+
+    def _stop(self):
+        self._stopped = True
+        self._poke()
+
+    def _prices_applied(self, version):
+        self._price_version = max(self._price_version, version)
+        self._save_state()
+
+    async def _run(self):
+        self._wake = asyncio.Event()
+        failures = 0
+        while not self._stopped:
+            try:
+                await self._sync_once()
+                failures = 0
+                delay = self.interval_seconds
+            except Exception as e:
+                # Link down or center unavailable: everything stays queued
+                failures += 1
+                delay = min(self.retry_max_seconds, 5 * 2 ** (failures - 1))
+                print(f"Fleet sync failed ({e}); retrying in {delay}s")
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _sync_once(self):
+        # Push: resend an unacknowledged batch first, so batches arrive in order
+        while self._in_flight is not None or self._pending:
+            if self._in_flight is None:
+                names = list(self._pending)[:self.max_batch]
+                self._seq += 1
+                self._in_flight = {"seq": self._seq,
+                                   "levels": {name: self._pending.pop(name) for name in names}}
+                self._save_state()
+            batch = self._in_flight
+            acked = await run_blocking(self.client.push_levels, batch["seq"], batch["levels"])
+            if acked != batch["seq"]:
+                raise RuntimeError(f"batch {batch['seq']} not acknowledged (got {acked})")
+            self._in_flight = None
+            self._save_state()
+            if self._stopped:
+                return
+
+        # Pull: price changes are applied on the Tk thread
+        version, changes = await run_blocking(self.client.pull_prices, self._price_version)
+        if version > self._price_version:
+            if changes:
+                self.bridge.call_in_tk(self._apply_prices, changes, version)
+            else:
+                self._prices_applied(version)
+
+
+def build_fleet_sync(app):
+    """Starts the agent configured in app.config["fleet_sync"], or returns None."""
+    options = app.config.get("fleet_sync")
+    if not options or not options.get("url"):
+        return None
+    machine_id = options.get("machine_id") or socket.gethostname()
+    client = FleetClient(options["url"], machine_id,
+                         request_timeout=options.get("request_timeout", 10.0))
+    return FleetSyncAgent(
+        app,
+        client,
+        get_absolute_path(options.get("state_file", "fleet_sync_state.json")),
+        interval_seconds=options.get("interval_seconds", 60),
+        max_batch=options.get("max_batch", 200),
+    ).start()
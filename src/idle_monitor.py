@@ -0,0 +1,131 @@
+"""Inactivity detection for customer sessions.
+
+Input events only record a timestamp; a single `after` timer wakes up at
+the next point something could happen (the warning, a countdown step or
+the timeout), checks how long the machine has really been idle and
+reschedules itself. No timer is created or cancelled per input event.
+"""
+import math
+import time
+import tkinter as tk
+from tkinter import font as tkfont
+
+
+class IdleMonitor:
+    """Escalates from a warning to a timeout when a session sees no input."""
+
+    EVENTS = ("<ButtonPress>", "<KeyPress>", "<B1-Motion>", "<MouseWheel>")
+
+    def __init__(self, root, timeout_seconds, warning_seconds, is_active,
+                 on_warning, on_resume, on_timeout, clock=time.monotonic):
+        """Initialize the monitor and hook it into the global input events.
+
+        Args:
+            root: The Tk root window
+            timeout_seconds (float): Idle time after which on_timeout is called
+            warning_seconds (float): How long before the timeout to start warning
+            is_active (callable): is_active() -> True while a session needs watching
+            on_warning (callable): on_warning(seconds_left), called once per second
+            on_resume (callable): on_resume() when input arrives during a warning
+            on_timeout (callable): on_timeout() when the session timed out
+        """
+        self.root = root
+        self.timeout_seconds = max(1.0, float(timeout_seconds))
+        self.warning_seconds = min(max(0.0, float(warning_seconds)), self.timeout_seconds)
+        self.is_active = is_active
+        self.on_warning = on_warning
+        self.on_resume = on_resume
+        self.on_timeout = on_timeout
+        self.clock = clock
+        self._last_input = clock()
+        self._warning = False
+        self._job = None
+        for sequence in self.EVENTS:
+            root.bind_all(sequence, self.touch, add="+")
+        self._schedule(self._warn_after)
+
+    @property
+    def _warn_after(self):
+        return self.timeout_seconds - self.warning_seconds
+
+    def touch(self, event=None):
+        """Records activity. Also called for non-input activity such as coin insertion."""
+        self._last_input = self.clock()
+        if self._warning:
+            self._warning = False
+            self.on_resume()
+
+    def _schedule(self, seconds):
+        if self._job is not None:
+            self.root.after_cancel(self._job)
+        self._job = self.root.after(max(1, int(seconds * 1000)), self._check)
+
+    def _check(self):
+        self._job = None
+        now = self.clock()
+        if not self.is_active():
+            if self._warning:
+                self._warning = False
+                self.on_resume()
+            # A session starts with input, so idle time only counts from here
+            self._last_input = now
+            self._schedule(self._warn_after)
+            return
+
+        idle = now - self._last_input
+        if idle < self._warn_after:
+            self._schedule(self._warn_after - idle)
+            return
+
+        remaining = self.timeout_seconds - idle
+        if remaining <= 0:
+            self._warning = False
+            self._last_input = now
+            try:
+                self.on_timeout()
+            except Exception as e:
+                print(f"Error resetting idle session: {e}")
+            self._schedule(self._warn_after)
+            return
+
+        self._warning = True
+        self.on_warning(int(math.ceil(remaining)))
+        # Wake up on the next whole second of the countdown
+        self._schedule(remaining - math.floor(remaining) or 1.0)
+
+
+class IdleWarningOverlay:
+    """'Are you still there?' box shown on top of the active window."""
+
+    def __init__(self, root):
+        self.root = root
+        self.frame = None
+        self.label = None
+        self.font = tkfont.Font(family="Helvetica", size=16, weight="bold")
+
+    def show(self, seconds_left):
+        # Inside a modal window (e.g. the payment window) the box must go there
+        grab = self.root.grab_current()
+        parent = grab.winfo_toplevel() if grab is not None else self.root
+        if self.frame is None or self.frame.master is not parent:
+            self.hide()
+            self.frame = tk.Frame(parent, bg="#2c3e50", padx=30, pady=20)
+            self.label = tk.Label(
+                self.frame, font=self.font, bg="#2c3e50", fg="#ffffff", justify="center"
+            )
+            self.label.pack()
+            self.frame.place(relx=0.5, rely=0.5, anchor="center")
+        self.label.config(
+            text=f"Are you still there?\nTouch the screen to continue.\n\n"
+                 f"Starting over in {seconds_left} s"
+        )
+        self.frame.lift()
+
+    def hide(self):
+        if self.frame is not None:
+            try:
+                self.frame.destroy()
+            except tk.TclError:
+                pass
+            self.frame = None
+            self.label = None
@@ -0,0 +1,176 @@
+"""Background image decoding for the Tk UI.
+
+PIL work (open, decode, resize) runs on a small pool of worker threads.
+Finished bitmaps are handed back to the Tk thread through a queue that is
+drained with `after`, and only the `ImageTk.PhotoImage` creation happens on
+the Tk thread.
+"""
+import itertools
+import os
+import queue
+from collections import OrderedDict
+from threading import Lock, Thread
+
+from PIL import Image, ImageTk
+
+# Size of the image on the item detail screen (fit inside this box)
+DETAIL_SIZE = (400, 400)
+
+# Lower value = decoded first
+PRIORITY_HIGH = 0  # the user is about to look at it (press, detail screen)
+PRIORITY_NORMAL = 5  # on-screen placeholders waiting for their bitmap
+PRIORITY_IDLE = 10  # speculative prefetch
+
+# Resize modes
+MODE_FIT = "fit"  # thumbnail into a (width, height) box, keeping aspect ratio
+MODE_HEIGHT = "height"  # scale to a fixed height, keeping aspect ratio
+
+
+class ImageLoader:
+    """Worker-thread image decoder with an LRU of decoded bitmaps."""
+
+    DRAIN_MS = 15
+    DRAIN_BATCH = 8  # results turned into PhotoImages per Tk tick
+
+    def __init__(self, tk_widget, workers=2, max_cached=64):
+        """Initialize the loader and start its worker threads.
+
+        Args:
+            tk_widget: Any Tk widget, used to schedule queue draining
+            workers (int): Number of decode threads
+            max_cached (int): Decoded images kept in memory
+        """
+        self.widget = tk_widget
+        self.max_cached = max_cached
+        self._jobs = queue.PriorityQueue()
+        self._results = queue.Queue()
+        self._seq = itertools.count()
+        self._lock = Lock()
+        self._queued = {}  # key -> best priority queued (guarded by _lock)
+        self._in_flight = set()  # keys queued or decoding (Tk thread only)
+        self._decoded = OrderedDict()  # key -> PIL image, None if decoding failed
+        self._waiters = {}  # key -> [callback(photo or None)]
+        self._uncached = set()  # keys whose bitmap is only handed to waiters
+        self._drain_job = None
+
+        for i in range(workers):
+            Thread(target=self._worker, name=f"image-loader-{i}", daemon=True).start()
+
+    @staticmethod
+    def _key(path, size, mode):
+        return (path, tuple(size) if isinstance(size, (list, tuple)) else size, mode)
+
+    def prefetch(self, path, size=DETAIL_SIZE, mode=MODE_FIT, priority=PRIORITY_IDLE):
+        """Starts decoding `path` in the background if it isn't cached already."""
+        if not path or not os.path.exists(path):
+            return
+        key = self._key(path, size, mode)
+        if key in self._decoded:
+            self._decoded.move_to_end(key)
+            return
+        self._submit(key, priority)
+
+    def request(self, path, size=DETAIL_SIZE, mode=MODE_FIT, callback=None,
+                priority=PRIORITY_HIGH, cache=True):
+        """Delivers a PhotoImage for `path` to callback(photo) on the Tk thread.
+
+        The callback runs immediately when the image is already decoded and
+        receives None if the image could not be loaded. Pass cache=False when
+        the caller keeps the PhotoImage itself (e.g. card thumbnails), so the
+        bitmap does not push prefetched detail images out of the LRU.
+        """
+        key = self._key(path, size, mode)
+        if key in self._decoded:
+            self._decoded.move_to_end(key)
+            if callback:
+                callback(self._make_photo(self._decoded[key]))
+            return
+        if callback:
+            self._waiters.setdefault(key, []).append(callback)
+        if cache:
+            self._uncached.discard(key)
+        elif key not in self._in_flight:
+            self._uncached.add(key)
+        self._submit(key, priority)
+
+    def cancel(self, callback):
+        """Removes a pending callback (e.g. the screen moved on to another item)."""
+        for key, callbacks in list(self._waiters.items()):
+            if callback in callbacks:
+                callbacks.remove(callback)
+                if not callbacks:
+                    del self._waiters[key]
+
+    def _submit(self, key, priority):
+        with self._lock:
+            queued = self._queued.get(key)
+            if queued is not None and queued <= priority:
+                return
+            self._queued[key] = priority
+        self._in_flight.add(key)
+        # Re-queueing with a better priority leaves a stale entry that workers skip
+        self._jobs.put((priority, next(self._seq), key))
+        self._ensure_drain()
+
+    def _worker(self):
+        while True:
+            priority, _, key = self._jobs.get()
+            with self._lock:
+                if self._queued.get(key) != priority:
+                    continue  # already decoded, or superseded by a higher-priority entry
+                del self._queued[key]
+            try:
+                img = self._decode(*key)
+                self._results.put((key, img, None))
+            except Exception as e:
+                self._results.put((key, None, e))
+
+    @staticmethod
+    def _decode(path, size, mode):
+        """Opens and resizes an image. Runs on a worker thread."""
+        img = Image.open(path)
+        if mode == MODE_HEIGHT:
+            h_percent = size / float(img.size[1])
+            w_size = max(1, int(float(img.size[0]) * h_percent))
+            img = img.resize((w_size, size), Image.Resampling.LANCZOS)
+        else:
+            img.thumbnail(size, Image.Resampling.LANCZOS)
+            img.load()
+        return img
+
+    def _make_photo(self, img):
+        return ImageTk.PhotoImage(img) if img is not None else None
+
+    def _ensure_drain(self):
+        if self._drain_job is None:
+            self._drain_job = self.widget.after(self.DRAIN_MS, self._drain)
+
+    def _drain(self):
+        """Moves finished decodes into the cache and notifies waiters (Tk thread).
+
+        At most DRAIN_BATCH results are handled per tick so a burst of
+        finished thumbnails never blocks touch input for long.
+        """
+        self._drain_job = None
+        for _ in range(self.DRAIN_BATCH):
+            try:
+                key, img, error = self._results.get_nowait()
+            except queue.Empty:
+                break
+            self._in_flight.discard(key)
+            if error is not None:
+                print(f"Error loading image {key[0]}: {error}")
+            if key in self._uncached:
+                self._uncached.discard(key)
+            else:
+                self._decoded[key] = img
+                self._decoded.move_to_end(key)
+                while len(self._decoded) > self.max_cached:
+                    self._decoded.popitem(last=False)
+            for callback in self._waiters.pop(key, []):
+                try:
+                    callback(self._make_photo(img))
+                except Exception as e:
+                    print(f"Image callback error: {e}")
+        if self._in_flight:
+            self._ensure_drain()
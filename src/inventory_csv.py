@@ -0,0 +1,255 @@
+"""Bulk CSV import/export of the item catalog.
+
+Export writes one row per item. Import reads a CSV row by row, checks
+each row and collects the changes; nothing is applied until the whole
+file has been read, and then everything is applied as one batch
+(MainApp.apply_bulk_changes: one save, one screen refresh). Rows that
+fail validation are reported with their line number and skipped.
+
+Import rules:
+- "name" is required and identifies the item. Unknown names add a new
+  item, which needs a price and a quantity.
+- Empty cells and missing columns keep the item's current value.
+- "quantity" is stock on hand. "+10" / "-3" adjust the current stock
+  instead of setting it (handy for restocking).
+- The "sold" column is exported for reference and ignored on import.
+
+Usage (from project root; run it while the app is closed, as the app
+rewrites item_list.json from memory):
+    python src/inventory_csv.py export items.csv
+    python src/inventory_csv.py import items.csv --dry-run
+    python src/inventory_csv.py import items.csv
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+from collections import namedtuple
+from fix_paths import get_absolute_path
+from money import Money, json_default
+
+COLUMNS = ("name", "category", "description", "price", "quantity", "image", "sold")
+IMPORT_COLUMNS = ("name", "category", "description", "price", "quantity", "image")
+
+RowError = namedtuple("RowError", "line name message")
+
+
+def _no_reservations(name):
+    return 0
+
+
+def write_csv(items, file, reserved=_no_reservations):
+    """Writes `items` to an open text file as CSV. Returns the number of rows.
+
+    Quantities are written as stock on hand, i.e. including `reserved(name)`.
+    """
+    writer = csv.DictWriter(file, COLUMNS, extrasaction="ignore")
+    writer.writeheader()
+    count = 0
+    for item in items:
+        writer.writerow({
+            "name": item["name"],
+            "category": item.get("category", ""),
+            "description": item.get("description", ""),
+            "price": str(Money.of(item.get("price", 0))),
+            "quantity": item.get("quantity", 0) + reserved(item["name"]),
+            "image": item.get("image", ""),
+            "sold": item.get("sold", 0),
+        })
+        count += 1
+    return count
+
+
+class ImportPlan:
+    """Changes read from a CSV file, in the form MainApp.apply_bulk_changes takes."""
+
+    def __init__(self):
+        self.added = []  # new item dicts
+        self.updated = []  # (name, new item dict)
+        self.unchanged = 0
+        self.errors = []  # RowError
+
+    @property
+    def changes(self):
+        return len(self.added) + len(self.updated)
+
+    def summary(self):
+        return (f"{len(self.updated)} updated, {len(self.added)} added, "
+                f"{self.unchanged} unchanged, {len(self.errors)} rows with errors")
+
+    def error_report(self, limit=None):
+        """The row errors as text, one per line (the first `limit` of them)."""
+        errors = self.errors if limit is None else self.errors[:limit]
+        lines = [f"Line {e.line}: {e.name + ': ' if e.name else ''}{e.message}" for e in errors]
+        if limit is not None and len(self.errors) > limit:
+            lines.append(f"... and {len(self.errors) - limit} more")
+        return "\n".join(lines)
+
+
+def read_csv(file, items, reserved=_no_reservations):
+    """Reads an open CSV file against the current `items`. Returns an ImportPlan.
+
+    Args:
+        file: Open text file (or any iterable of CSV lines)
+        items (list): Current catalog; it is not modified
+        reserved (callable): Stock of an item held by carts, which the
+            in-memory quantity excludes
+    """
+    plan = ImportPlan()
+    reader = csv.DictReader(file)
+    if reader.fieldnames is None:
+        return plan  # Empty file
+    reader.fieldnames = [(field or "").strip().lower() for field in reader.fieldnames]
+    if "name" not in reader.fieldnames:
+        plan.errors.append(RowError(1, "", "the header has no 'name' column"))
+        return plan
+
+    by_name = {item["name"]: item for item in items}
+    taken = {name.lower() for name in by_name}
+    seen = set()
+    for row in reader:
+        name = (row.get("name") or "").strip()
+        try:
+            if not any((value or "").strip() for value in row.values() if isinstance(value, str)):
+                continue  # Blank line
+            if not name:
+                raise ValueError("name is empty")
+            if name.lower() in seen:
+                raise ValueError("appears more than once in the file")
+            seen.add(name.lower())
+            fields = _parse_fields(row)
+            item = by_name.get(name)
+            if item is not None:
+                new_item = _updated_item(item, fields, reserved(name))
+                if new_item == item:
+                    plan.unchanged += 1
+                else:
+                    plan.updated.append((name, new_item))
+            elif name.lower() in taken:
+                raise ValueError("differs only in case from an existing item")
+            else:
+                plan.added.append(_new_item(name, fields))
+        except ValueError as e:
+            plan.errors.append(RowError(reader.line_num, name, str(e)))
+    return plan
+
+
+def _parse_fields(row):
+    """Non-empty cells of a row, converted. Quantity is ("set" | "add", int)."""
+    fields = {}
+    for key in IMPORT_COLUMNS[1:]:
+        value = (row.get(key) or "").strip()
+        if not value:
+            continue
+        if key == "price":
+            try:
+                price = Money.of(value)
+            except ValueError:
+                raise ValueError(f"invalid price {value!r}")
+            if price < 0:
+                raise ValueError("price can't be negative")
+            fields[key] = price
+        elif key == "quantity":
+            try:
+                number = int(value)
+            except ValueError:
+                raise ValueError(f"invalid quantity {value!r}")
+            if value[0] in "+-":
+                fields[key] = ("add", number)
+            else:
+                fields[key] = ("set", number)
+        else:
+            fields[key] = value
+    return fields
+
+
+def _updated_item(item, fields, reserved):
+    new_item = dict(item)
+    for key, value in fields.items():
+        if key != "quantity":
+            new_item[key] = value
+            continue
+        mode, number = value
+        on_hand = item.get("quantity", 0) + reserved
+        on_hand = on_hand + number if mode == "add" else number
+        if on_hand < 0:
+            raise ValueError(f"stock would go negative ({on_hand})")
+        if on_hand < reserved:
+            raise ValueError(f"{reserved} are held in a customer's cart; stock can't go below that")
+        new_item["quantity"] = on_hand - reserved
+    return new_item
+
+
+def _new_item(name, fields):
+    if "price" not in fields or "quantity" not in fields:
+        raise ValueError("new items need a price and a quantity")
+    mode, quantity = fields["quantity"]
+    if mode == "add" or quantity < 0:
+        raise ValueError("a new item's quantity must be a plain non-negative number")
+    return {
+        "name": name,
+        "description": fields.get("description", ""),
+        "category": fields.get("category", ""),
+        "price": fields["price"],
+        "quantity": quantity,
+        "image": fields.get("image", ""),
+    }
+
+
+# --- Command line (works on item_list.json directly) ---
+
+def _load_items(path):
+    with open(path, "r") as file:
+        items = json.load(file)
+    for item in items:
+        item["price"] = Money.of(item.get("price", 0))
+    return items
+
+
+def _save_items(items, path):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as file:
+        file.write(json.dumps(items, indent=4, default=json_default))
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(tmp_path, path)
+
+
+def apply_plan(items, plan):
+    """Applies an ImportPlan to a plain item list (the CLI's MainApp.apply_bulk_changes)."""
+    positions = {item["name"]: i for i, item in enumerate(items)}
+    for name, new_item in plan.updated:
+        items[positions[name]] = new_item
+    items.extend(plan.added)
+
+
+def main():
+    p = argparse.ArgumentParser(description="Bulk CSV import/export of item_list.json")
+    p.add_argument('command', choices=('import', 'export'))
+    p.add_argument('csv_file')
+    p.add_argument('--items', default=get_absolute_path("item_list.json"), help='Item file (default: item_list.json)')
+    p.add_argument('--dry-run', action='store_true', help='Check the file and report, without saving')
+    args = p.parse_args()
+
+    items = _load_items(args.items)
+    if args.command == 'export':
+        with open(args.csv_file, "w", newline="", encoding="utf-8") as file:
+            count = write_csv(items, file)
+        print(f"Exported {count} items to {args.csv_file}")
+        return 0
+
+    with open(args.csv_file, "r", newline="", encoding="utf-8-sig") as file:
+        plan = read_csv(file, items)
+    if plan.errors:
+        print(plan.error_report())
+    print(plan.summary())
+    if plan.changes and not args.dry_run:
+        apply_plan(items, plan)
+        _save_items(items, args.items)
+        print(f"Saved {args.items}")
+    return 1 if plan.errors else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
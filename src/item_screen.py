@@ -1,7 +1,7 @@
 import tkinter as tk
-from tkinter import font as tkfont
-from PIL import Image, ImageTk
+from tkinter import font as tkfont, messagebox
 import os
+from image_loader import DETAIL_SIZE
 
 class ItemScreen(tk.Frame):
     def __init__(self, parent, controller):
@@ -152,8 +152,19 @@ class ItemScreen(tk.Frame):
     def add_to_cart(self):
         """Handles adding the item to the cart via the controller."""
         if self.current_item:
-            self.controller.add_to_cart(self.current_item, self.selected_quantity)            
-            self.controller.reduce_item_quantity(self.current_item, self.selected_quantity)
+            # Reserves the stock; fails if it sold out since the screen was opened
+            if not self.controller.add_to_cart(self.current_item, self.selected_quantity):
+                messagebox.showwarning(
+                    "Out of Stock",
+                    f"Sorry, there isn't enough {self.current_item['name']} left. "
+                    "Please choose a smaller quantity.",
+                    parent=self,
+                )
+                # Stay here, showing what is still available
+                item = self.controller.find_item(self.current_item["name"])
+                if item is not None:
+                    self.set_item(item)
+                    return
             # Navigate to the cart screen after adding an item
             self.controller.show_kiosk()
 
@@ -183,28 +194,33 @@ class ItemScreen(tk.Frame):
         self.quantity_display_label.config(text="1")
         
         # --- Update Image ---
+        # The image is normally already decoded: the kiosk prefetches it on
+        # press and during idle. Otherwise it arrives from the loader's worker.
+        self.controller.image_loader.cancel(self._on_detail_image)
         image_path = item_data.get("image")
         if image_path and os.path.exists(image_path):
-            try:
-                # Open, resize, and display the image
-                img = Image.open(image_path)
-
-                # Resize to fit a 400x400 box while maintaining aspect ratio
-                img.thumbnail((400, 400), Image.Resampling.LANCZOS)
-
-                self.photo_image = ImageTk.PhotoImage(img)
-                self.image_label.config(image=self.photo_image, text="")
-            except Exception as e:
-                print(f"Error loading image {image_path}: {e}")
-                self.image_label.config(
-                    image="", # Clear previous image
-                    text="Image Error",
-                    font=self.fonts['image_placeholder']
-                )
+            self.image_label.config(
+                image="", # Clear previous image
+                text="Loading...",
+                font=self.fonts['image_placeholder'],
+            )
+            self.controller.image_loader.request(image_path, DETAIL_SIZE, callback=self._on_detail_image)
         else:
             # Show placeholder if no image
             self.image_label.config(
                 image="", # Clear previous image
                 text="No Image",
                 font=self.fonts['image_placeholder'],
-            )
\ No newline at end of file
+            )
+
+    def _on_detail_image(self, photo):
+        """Shows the decoded detail image (called on the Tk thread)."""
+        if photo is not None:
+            self.photo_image = photo
+            self.image_label.config(image=self.photo_image, text="")
+        else:
+            self.image_label.config(
+                image="", # Clear previous image
+                text="Image Error",
+                font=self.fonts['image_placeholder']
+            )
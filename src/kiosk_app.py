@@ -1,21 +1,41 @@
 import tkinter as tk
 from tkinter import font as tkfont
-from PIL import Image, ImageTk
 import os
+from touch_gestures import TouchScroller
+from canvas_cards import CanvasCardRenderer
+from facet_index import ALL_CATEGORIES
+from sort_index import SORT_CATALOG, SORT_LABELS, order_for_label
+from event_bus import CATALOG_EVENTS, CONFIG_CHANGED, ITEM_ADDED, ITEM_REMOVED, ITEM_UPDATED, STOCK_CHANGED
+from image_loader import DETAIL_SIZE, MODE_HEIGHT, PRIORITY_HIGH, PRIORITY_NORMAL
 
 class KioskFrame(tk.Frame):
+    CARD_IMAGE_HEIGHT = 150
+
     def __init__(self, parent, controller):
         tk.Frame.__init__(self, parent)
         self.controller = controller
-        self.scan_start_x = 0 # To hold the initial x-coordinate for scrolling
         self._last_canvas_width = 0 # To prevent unnecessary redraws
-
-        # --- Drag vs. Click state ---
-        self._is_dragging = False
-        self._click_job = None
-        self._clicked_item_data = None
         self._resize_job = None
-        self.image_cache = {} # To prevent images from being garbage-collected
+        self._prefetch_job = None
+        self.image_cache = {} # Card PhotoImages by path (False if the image failed to load)
+
+        # --- Delegated card events ---
+        # Every widget inside a card carries this bindtag, so the three
+        # handlers below are bound once for the whole grid instead of per widget.
+        self.card_bindtag = f"KioskCard{id(self)}"
+        self._card_items = {} # card widget path -> item data
+        self._widget_cards = {} # any tagged widget path -> card widget path (resolved lazily)
+        self._card_widgets = {} # card widget path -> widget paths resolved to it, for _drop_card
+        self._cards_by_name = {} # item name -> card widget (widget renderer)
+        self._shown_cards = [] # (card, item) currently gridded, in display order
+        self._positions = {} # item name -> index in controller.items
+        self._num_cols = 1
+        self.active_category = ALL_CATEGORIES
+        self._category_tabs = {} # category -> tab button
+        self._pending_events = [] # change events received while hidden
+        self.bind_class(self.card_bindtag, "<ButtonPress-1>", self.on_card_press)
+        self.bind_class(self.card_bindtag, "<B1-Motion>", self.on_card_drag)
+        self.bind_class(self.card_bindtag, "<ButtonRelease-1>", self.on_card_release)
 
         # --- Color and Font Scheme ---
         self.colors = {
@@ -72,50 +92,141 @@ class KioskFrame(tk.Frame):
         self.machine_name = cfg.get('machine_name', 'RAON')
         self.machine_subtitle = cfg.get('machine_subtitle', 'RApid Access Outlet for Electronic Necessities')
         self.header_logo_path = cfg.get('header_logo_path', '')
+        # 'widgets' builds a Frame/Label tree per card; 'canvas' draws cards as canvas items
+        self.card_renderer = cfg.get('kiosk_card_renderer', 'widgets')
 
         self.items = controller.items
         self.configure(bg=self.colors['background'])
         # Create widgets and expose header/footer widgets so they can be updated
         self.create_widgets()
+        # Catalog changes are applied card by card; while hidden they wait until shown
+        controller.events.subscribe(self.on_catalog_changed)
+        self.bind("<<ShowFrame>>", lambda e: self.apply_pending_changes())
 
 
     def on_canvas_press(self, event):
-        """Records the starting y-position and fixed x-position of a mouse drag."""
-        self.canvas.scan_mark(event.x, event.y)
-        self.scan_start_x = event.x
+        """Starts a touch on the canvas; canvas-drawn cards are hit-tested by tag."""
+        if self.canvas_cards is not None:
+            item_data = self.canvas_cards.item_at(event.x, event.y)
+            if item_data is not None and item_data['quantity'] > 0:
+                self.on_item_press(event, item_data)
+                return
+        self.gestures.press(event)
 
     def on_canvas_drag(self, event):
-        """Moves the canvas view vertically based on mouse drag."""
-        # Use the stored scan_start_x to prevent horizontal movement
-        self.canvas.scan_dragto(self.scan_start_x, event.y, gain=1)
+        """Feeds drag motion to the gesture recognizer."""
+        self.gestures.motion(event)
+
+    def on_canvas_release(self, event):
+        """Ends a touch; a fast drag continues as an inertial scroll."""
+        self.gestures.release(event)
+        self.schedule_idle_prefetch()
 
     def on_item_press(self, event, item_data):
         """Handles the initial press on an item card."""
-        # Prepare for a potential drag
-        self.on_canvas_press(event)
-        # Store item data for a potential click
-        self._clicked_item_data = item_data
-        # Schedule the click action, but don't execute it yet
-        self._click_job = self.after(150, self.perform_item_click)
+        # Start decoding the detail image now, while the tap is still undecided
+        self.controller.image_loader.prefetch(item_data.get("image"), DETAIL_SIZE, priority=PRIORITY_HIGH)
+        # The tap is decided on release by touch slop, with no fixed delay
+        self.gestures.press(event, item_data)
 
     def on_item_drag(self, event):
         """Handles dragging that starts on an item card."""
-        # If a click was scheduled, cancel it because this is a drag
-        if self._click_job:
-            self.after_cancel(self._click_job)
-            self._click_job = None
-        # Perform the canvas drag
-        self.on_canvas_drag(event)
+        self.gestures.motion(event)
 
     def on_item_release(self, event):
-        """Resets state on mouse release."""
-        # This is intentionally left simple. The click is handled by the after() job.
-        pass
-
-    def perform_item_click(self):
-        """Navigates to the item screen. Called only if no drag occurs."""
-        if self._clicked_item_data:
-            self.controller.show_item(self._clicked_item_data)
+        """Resolves the touch: a tap opens the item, a drag may fling."""
+        self.gestures.release(event)
+        self.schedule_idle_prefetch()
+
+    def on_item_tap(self, event, item_data):
+        """Navigates to the item screen. Called only if no drag occurred."""
+        if item_data is not None:
+            self.controller.show_item(item_data)
+
+    def schedule_idle_prefetch(self, delay=400):
+        """Prefetches detail images of the visible cards once the grid settles."""
+        if self._prefetch_job:
+            self.after_cancel(self._prefetch_job)
+        self._prefetch_job = self.after(delay, self._prefetch_visible)
+
+    def _prefetch_visible(self):
+        self._prefetch_job = None
+        if self.gestures.is_dragging:
+            self.schedule_idle_prefetch()
+            return
+        for item_data in self.visible_items():
+            if item_data['quantity'] > 0:
+                self.controller.image_loader.prefetch(item_data.get("image"), DETAIL_SIZE)
+
+    def visible_items(self):
+        """Returns the items whose cards intersect the visible part of the canvas."""
+        top = self.canvas.canvasy(0)
+        bottom = top + self.canvas.winfo_height()
+        if self.canvas_cards is not None:
+            return self.canvas_cards.items_in_view(top, bottom)
+        frame_y = self.canvas.coords(self.canvas_window)[1]
+        visible = []
+        for card, item_data in self._shown_cards:
+            try:
+                card_top = frame_y + card.winfo_y()
+            except tk.TclError:
+                continue
+            if card_top < bottom and card_top + card.winfo_height() > top:
+                visible.append(item_data)
+        return visible
+
+    def _resolve_card_item(self, widget):
+        """Returns the item data of the card containing `widget`, or None."""
+        path = str(widget)
+        card_path = self._widget_cards.get(path)
+        if card_path is None:
+            # Walk up the widget hierarchy until we hit a registered card
+            w = widget
+            while w is not None and w is not self and str(w) not in self._card_items:
+                w = getattr(w, 'master', None)
+            if w is None or w is self:
+                return None
+            card_path = str(w)
+            self._widget_cards[path] = card_path
+            self._card_widgets.setdefault(card_path, []).append(path)
+        return self._card_items.get(card_path)
+
+    def on_card_press(self, event):
+        """Dispatches a press anywhere on a card to the owning item."""
+        item_data = self._resolve_card_item(event.widget)
+        if item_data is not None and item_data['quantity'] > 0:
+            self.on_item_press(event, item_data)
+        else:
+            self.on_canvas_press(event)
+
+    def on_card_drag(self, event):
+        """Dispatches drag motion on any card widget."""
+        self.on_item_drag(event)
+
+    def on_card_release(self, event):
+        """Dispatches a release on any card widget."""
+        self.on_item_release(event)
+
+    def _tag_card(self, card, item_data):
+        """Registers `card` and adds the card bindtag to it and all its descendants."""
+        self._card_items[str(card)] = item_data
+        pending = [card]
+        while pending:
+            widget = pending.pop()
+            widget.bindtags((self.card_bindtag,) + widget.bindtags())
+            pending.extend(widget.winfo_children())
+
+    def _on_card_image(self, label, image_path, photo):
+        """Fills a card's image placeholder once its bitmap has been decoded."""
+        self.image_cache[image_path] = photo if photo is not None else False
+        if not label.winfo_exists():
+            return # The grid was rebuilt while decoding
+        if photo is not None:
+            label.config(image=photo, text='')
+            label.image = photo # Keep a reference!
+        else:
+            label.config(text="Image Error")
+
     def create_item_card(self, parent, item_data):
         """Creates a single item card widget."""
         card = tk.Frame(
@@ -126,7 +237,7 @@ class KioskFrame(tk.Frame):
         )
 
         # 3. Image Placeholder
-        image_frame = tk.Frame(card, bg=self.colors['card_bg'], height=150)
+        image_frame = tk.Frame(card, bg=self.colors['card_bg'], height=self.CARD_IMAGE_HEIGHT)
         image_frame.pack(fill='x', padx=10, pady=10)
         image_frame.pack_propagate(False) # Prevents child widgets from resizing it
         
@@ -135,22 +246,20 @@ class KioskFrame(tk.Frame):
 
         image_path = item_data.get("image")
         if image_path and os.path.exists(image_path):
-            try:
-                # Open, resize, and display the image
-                img = Image.open(image_path)
-                
-                # Resize image to fit the frame height while maintaining aspect ratio
-                base_height = 150
-                h_percent = (base_height / float(img.size[1]))
-                w_size = int((float(img.size[0]) * float(h_percent)))
-                img = img.resize((w_size, base_height), Image.Resampling.LANCZOS)
-
-                photo = ImageTk.PhotoImage(img)
+            photo = self.image_cache.get(image_path)
+            if photo:
                 image_label.config(image=photo)
                 image_label.image = photo # Keep a reference!
-            except Exception as e:
-                print(f"Error loading image {image_path}: {e}")
+            elif photo is False:
                 image_label.config(text="Image Error", font=self.fonts['image_placeholder'], fg=self.colors['gray_fg'])
+            else:
+                # Paint the card now; the bitmap is decoded on a worker thread
+                image_label.config(text="Loading...", font=self.fonts['image_placeholder'], fg=self.colors['gray_fg'])
+                self.controller.image_loader.request(
+                    image_path, self.CARD_IMAGE_HEIGHT, MODE_HEIGHT,
+                    callback=lambda photo, label=image_label, path=image_path: self._on_card_image(label, path, photo),
+                    priority=PRIORITY_NORMAL, cache=False,
+                )
         else:
             # Show placeholder if no image
             image_label.config(text="No Image", font=self.fonts['image_placeholder'], fg=self.colors['gray_fg'])
@@ -205,22 +314,6 @@ class KioskFrame(tk.Frame):
                 fg=self.colors['gray_fg']
             ).pack(side='right')
 
-            # --- Bind click event to all widgets on the card ---
-            # We now need to handle press, drag (motion), and release separately
-            press_action = lambda e, data=item_data: self.on_item_press(e, data)
-            
-            card.bind("<ButtonPress-1>", press_action)
-            card.bind("<B1-Motion>", self.on_item_drag)
-            card.bind("<ButtonRelease-1>", self.on_item_release)
-            for widget in card.winfo_children():
-                widget.bind("<ButtonPress-1>", press_action)
-                widget.bind("<B1-Motion>", self.on_item_drag)
-                widget.bind("<ButtonRelease-1>", self.on_item_release)
-                if isinstance(widget, tk.Frame): # Bind children of inner frames too
-                    for child in widget.winfo_children():
-                        child.bind("<ButtonPress-1>", press_action)
-                        child.bind("<B1-Motion>", self.on_item_drag)
-                        child.bind("<ButtonRelease-1>", self.on_item_release)
         else: # Item is out of stock
             # Change background of all frames on the card
             disabled_bg = self.colors['disabled_bg']
@@ -234,6 +327,9 @@ class KioskFrame(tk.Frame):
             # Display "Out of Stock" message
             tk.Label(bottom_frame, text="Out of Stock", font=self.fonts['out_of_stock'], bg=disabled_bg, fg=self.colors['out_of_stock_fg']).pack()
 
+        # Route press/drag/release through the shared card bindtag. Out-of-stock
+        # cards are tagged too so dragging on them still scrolls the grid.
+        self._tag_card(card, item_data)
         return card
 
     def create_widgets(self):
@@ -276,6 +372,54 @@ class KioskFrame(tk.Frame):
         )
         cart_button.pack(side='right', padx=8, pady=2)
 
+        # Sort selector; orders come precomputed from the controller's sort index
+        self.sort_var = tk.StringVar(value=SORT_LABELS[SORT_CATALOG])
+        sort_menu = tk.OptionMenu(
+            cart_frame, self.sort_var, *SORT_LABELS.values(),
+            command=lambda _: self.apply_filter()
+        )
+        sort_menu.configure(
+            font=self.fonts['quantity'],
+            bg=self.colors['background'],
+            fg=self.colors['gray_fg'],
+            relief='flat',
+            highlightthickness=0
+        )
+        sort_menu.pack(side='right', pady=2)
+        tk.Label(
+            cart_frame,
+            text="Sort:",
+            font=self.fonts['quantity'],
+            bg=self.colors['background'],
+            fg=self.colors['gray_fg']
+        ).pack(side='right', padx=(8, 4), pady=2)
+
+        # Search box: filters the grid on every keystroke via the search index
+        self.search_var = tk.StringVar()
+        tk.Label(
+            cart_frame,
+            text="Search:",
+            font=self.fonts['quantity'],
+            bg=self.colors['background'],
+            fg=self.colors['gray_fg']
+        ).pack(side='left', padx=(8, 4), pady=2)
+        search_entry = tk.Entry(cart_frame, textvariable=self.search_var, font=self.fonts['quantity'], width=30)
+        search_entry.pack(side='left', pady=2)
+        tk.Button(
+            cart_frame,
+            text="✕",
+            font=self.fonts['quantity'],
+            bg=self.colors['background'],
+            fg=self.colors['gray_fg'],
+            relief='flat',
+            command=lambda: self.search_var.set('')
+        ).pack(side='left', padx=(2, 0))
+        self.search_var.trace_add('write', lambda *args: self.apply_filter())
+
+        # Category tabs; rebuilt only when the set of categories changes
+        self.tabs_frame = tk.Frame(self, bg=self.colors['background'])
+        self.tabs_frame.pack(fill='x', padx=8, pady=(0, 4))
+
         # Container for the scrollable area - sits between header and footer
         scroll_container = tk.Frame(self, bg=self.colors['background'])
         scroll_container.pack(fill='both', expand=True)
@@ -286,14 +430,22 @@ class KioskFrame(tk.Frame):
         # The scrollbar is no longer created or packed.
         scrollable_frame = tk.Frame(self.canvas, bg=self.colors['background'])
 
+        # Tap vs. drag discrimination and kinetic scrolling for the grid
+        self.gestures = TouchScroller(self.canvas, on_tap=self.on_item_tap)
+        self.canvas_cards = CanvasCardRenderer(self) if self.card_renderer == 'canvas' else None
+
         # Bind drag-to-scroll to the frame itself (for the space between items)
         scrollable_frame.bind("<ButtonPress-1>", self.on_canvas_press)
         scrollable_frame.bind("<B1-Motion>", self.on_canvas_drag)
-
-        scrollable_frame.bind(
-            "<Configure>",
-            lambda e: self.canvas.configure(scrollregion=self.canvas.bbox("all"))
-        )
+        scrollable_frame.bind("<ButtonRelease-1>", self.on_canvas_release)
+
+        # The canvas renderer sets the scrollregion from its own layout; the
+        # (empty) frame's bbox would overwrite it on every resize
+        if self.canvas_cards is None:
+            scrollable_frame.bind(
+                "<Configure>",
+                lambda e: self.canvas.configure(scrollregion=self.canvas.bbox("all"))
+            )
 
         # The canvas window that holds the frame
         self.canvas_window = self.canvas.create_window((0, 0), window=scrollable_frame, anchor="nw")
@@ -306,6 +458,7 @@ class KioskFrame(tk.Frame):
         # We only need to bind to the canvas itself.
         self.canvas.bind("<ButtonPress-1>", self.on_canvas_press)
         self.canvas.bind("<B1-Motion>", self.on_canvas_drag)
+        self.canvas.bind("<ButtonRelease-1>", self.on_canvas_release)
 
         self.canvas.pack(side="left", fill="both", expand=True)
         # The scrollbar.pack() call is removed.
@@ -329,43 +482,53 @@ class KioskFrame(tk.Frame):
         self.logo_image = None
         logo_path = getattr(self, 'header_logo_path', '')
         if logo_path and os.path.exists(logo_path):
-            try:
-                img = Image.open(logo_path)
-                # Target height slightly smaller than header to allow padding
-                target_h = max(1, self.header_px - 12)
-                h_percent = (target_h / float(img.size[1]))
-                w_size = int((float(img.size[0]) * float(h_percent)))
-                img = img.resize((w_size, target_h), Image.Resampling.LANCZOS)
-                self.logo_image = ImageTk.PhotoImage(img)
-                self.logo_label.config(image=self.logo_image, text='')
-            except Exception as e:
-                print(f"Error loading header logo {logo_path}: {e}")
-                # Fall back to textual placeholder
-                self.logo_label.config(image='', text=self.machine_name if self.machine_name else 'RAON', font=self.fonts['logo_placeholder'], fg=self.colors['text_fg'], bg=self.colors['background'], relief='groove', bd=1, padx=6, pady=4)
-        else:
-            # No logo; show a concise textual placeholder (initials) to avoid
-            # repeating the full machine name in the header.
-            name = self.machine_name or 'RAON'
-            # Build initials from words in the name (max 4 chars)
-            initials = ''.join([p[0].upper() for p in name.split() if p])[:4]
-            # If initials would be too short (single char) and the name is short,
-            # use up to the first 4 characters of the name instead for clarity.
-            if len(initials) == 1 and len(name) <= 4:
-                placeholder_text = name.upper()[:4]
-            else:
-                placeholder_text = initials
-
-            self.logo_label.config(
-                image='',
-                text=placeholder_text,
-                font=self.fonts['logo_placeholder'],
-                fg=self.colors['text_fg'],
-                bg=self.colors['background'],
-                relief='groove',
-                bd=1,
-                padx=6,
-                pady=4,
+            # Keep the textual placeholder until the worker has decoded the logo
+            self._show_logo_placeholder()
+            # Target height slightly smaller than header to allow padding
+            target_h = max(1, self.header_px - 12)
+            self.controller.image_loader.request(
+                logo_path, target_h, MODE_HEIGHT,
+                callback=lambda photo, path=logo_path: self._on_header_logo(path, photo),
+                priority=PRIORITY_HIGH, cache=False,
             )
+        else:
+            self._show_logo_placeholder()
+
+    def _on_header_logo(self, logo_path, photo):
+        """Swaps the placeholder for the decoded logo (Tk thread)."""
+        if logo_path != self.header_logo_path:
+            return # Config changed while decoding
+        if photo is not None:
+            self.logo_image = photo
+            self.logo_label.config(image=self.logo_image, text='', relief='flat')
+        else:
+            # Fall back to textual placeholder
+            self.logo_label.config(image='', text=self.machine_name if self.machine_name else 'RAON', font=self.fonts['logo_placeholder'], fg=self.colors['text_fg'], bg=self.colors['background'], relief='groove', bd=1, padx=6, pady=4)
+
+    def _show_logo_placeholder(self):
+        """Show a concise textual placeholder (initials) to avoid
+        repeating the full machine name in the header."""
+        name = self.machine_name or 'RAON'
+        # Build initials from words in the name (max 4 chars)
+        initials = ''.join([p[0].upper() for p in name.split() if p])[:4]
+        # If initials would be too short (single char) and the name is short,
+        # use up to the first 4 characters of the name instead for clarity.
+        if len(initials) == 1 and len(name) <= 4:
+            placeholder_text = name.upper()[:4]
+        else:
+            placeholder_text = initials
+
+        self.logo_label.config(
+            image='',
+            text=placeholder_text,
+            font=self.fonts['logo_placeholder'],
+            fg=self.colors['text_fg'],
+            bg=self.colors['background'],
+            relief='groove',
+            bd=1,
+            padx=6,
+            pady=4,
+        )
 
     def update_kiosk_config(self):
         """Reload configuration from controller and update header/footer (can be called after saving config)."""
@@ -427,6 +590,16 @@ class KioskFrame(tk.Frame):
         # Clear existing items
         for widget in scrollable_frame.winfo_children():
             widget.destroy()
+        self._card_items.clear()
+        self._widget_cards.clear()
+        self._card_widgets.clear()
+        self._cards_by_name.clear()
+        self._shown_cards = []
+        # A full rebuild covers every pending item change
+        self._pending_events = [e for e in self._pending_events if e.kind == CONFIG_CHANGED]
+        # Catalog positions keep filtered results in catalog order without rescanning it
+        self._positions = {item['name']: i for i, item in enumerate(self.controller.items)}
+        self.update_category_tabs()
 
         # --- Dynamic Column Calculation ---
         canvas_width = self.canvas.winfo_width()
@@ -434,21 +607,153 @@ class KioskFrame(tk.Frame):
             return
 
         card_plus_padding_width = 300 + 30 # Approx. card width + (padx * 2)
-        num_cols = max(1, canvas_width // card_plus_padding_width)
+        self._num_cols = max(1, canvas_width // card_plus_padding_width)
 
         self._last_canvas_width = canvas_width # Update last known width
 
-        # Repopulate grid with item cards from the controller's master list
-        max_cols = num_cols
-        for i, item in enumerate(self.controller.items):
+        if self.canvas_cards is None:
+            # Build a card for every item once; filtering only re-grids them
+            for item in self.controller.items:
+                self._cards_by_name[item['name']] = self.create_item_card(scrollable_frame, item)
+
+        self._layout_cards(self.filtered_items())
+
+    def on_catalog_changed(self, events):
+        """Event bus callback; applies the changes now only if the kiosk is showing."""
+        self._pending_events.extend(events)
+        if self.controller.active_frame_name == "KioskFrame":
+            self.apply_pending_changes()
+
+    def apply_pending_changes(self, relayout=True):
+        """Rebuilds only the cards of changed items, then re-lays out the grid."""
+        events, self._pending_events = self._pending_events, []
+        if not events:
+            return
+        if any(e.kind == CONFIG_CHANGED for e in events):
+            self.update_kiosk_config()
+        item_events = [e for e in events if e.kind != CONFIG_CHANGED]
+        if not item_events or self._last_canvas_width < 2:
+            return # Grid not built yet; populate_items will pick up the catalog as is
+        if any(e.kind in CATALOG_EVENTS for e in item_events):
+            self._positions = {item['name']: i for i, item in enumerate(self.controller.items)}
+
+        if self.canvas_cards is None:
+            scrollable_frame = self.canvas.nametowidget(self.canvas.itemcget(self.canvas_window, 'window'))
+            for event in item_events:
+                if event.kind in (ITEM_REMOVED, ITEM_UPDATED):
+                    self._drop_card(event.old_name)
+                if event.kind in (ITEM_ADDED, ITEM_UPDATED, STOCK_CHANGED):
+                    if event.kind == STOCK_CHANGED:
+                        self._drop_card(event.name)
+                    self._cards_by_name[event.name] = self.create_item_card(scrollable_frame, event.item)
+
+        self.update_category_tabs()
+        if relayout:
+            self._layout_cards(self.filtered_items())
+
+    def _drop_card(self, name):
+        """Destroys the card of item `name` and forgets its event routing."""
+        card = self._cards_by_name.pop(name, None)
+        if card is None:
+            return
+        card_path = str(card)
+        self._card_items.pop(card_path, None)
+        for path in self._card_widgets.pop(card_path, ()):
+            del self._widget_cards[path]
+        self._shown_cards = [(c, item) for c, item in self._shown_cards if c is not card]
+        card.destroy()
+
+    def update_category_tabs(self):
+        """Syncs the tab buttons with the facet index and refreshes their counts."""
+        facets = self.controller.facet_index
+        categories = [ALL_CATEGORIES] + facets.categories()
+        if self.active_category not in categories:
+            self.active_category = ALL_CATEGORIES
+        if list(self._category_tabs) != categories:
+            for button in self._category_tabs.values():
+                button.destroy()
+            self._category_tabs = {}
+            for category in categories:
+                button = tk.Button(
+                    self.tabs_frame,
+                    font=self.fonts['quantity'],
+                    relief='flat',
+                    padx=8,
+                    command=lambda c=category: self.select_category(c)
+                )
+                button.pack(side='left', padx=(0, 4))
+                self._category_tabs[category] = button
+
+        for category, button in self._category_tabs.items():
+            active = category == self.active_category
+            button.config(
+                text=f"{category} ({facets.in_stock_count(category)})",
+                bg=self.colors['price_fg'] if active else self.colors['card_bg'],
+                fg=self.colors['card_bg'] if active else self.colors['text_fg'],
+            )
+
+    def select_category(self, category):
+        """Switches the visible set to one category without rebuilding cards."""
+        if category == self.active_category:
+            return
+        self.active_category = category
+        self.update_category_tabs()
+        self.apply_filter()
+
+    def filtered_items(self):
+        """Returns the items matching the category tab and search box, in the selected order."""
+        matches = self.controller.search_index.search(self.search_var.get())
+        members = self.controller.facet_index.members(self.active_category)
+        if members is not None:
+            matches = members if matches is None else matches & members
+        order = order_for_label(self.sort_var.get())
+        if order != SORT_CATALOG:
+            sort_index = self.controller.sort_index
+            if matches is None:
+                return sort_index.ordered_items(order)
+            return [sort_index.item(name) for name in sort_index.sort_names(matches, order)]
+        if matches is None:
+            return self.controller.items
+        positions = self._positions
+        items = self.controller.items
+        return [items[positions[name]] for name in sorted(matches, key=lambda n: positions.get(n, len(items))) if name in positions]
+
+    def apply_filter(self):
+        """Shows only the matching cards without rebuilding any of them."""
+        if self._last_canvas_width < 2:
+            return
+        self.canvas.yview_moveto(0)
+        self._layout_cards(self.filtered_items())
+
+    def _layout_cards(self, items):
+        """Places the cards of `items` in the grid (or draws them on the canvas)."""
+        if self.canvas_cards is not None:
+            # Cards are drawn straight onto the canvas; no widgets to grid or center
+            self.canvas_cards.render(items, self._last_canvas_width)
+            self.schedule_idle_prefetch()
+            return
+
+        shown = []
+        for item in items:
+            card = self._cards_by_name.get(item['name'])
+            if card is not None:
+                shown.append((card, item))
+        keep = {str(card) for card, _ in shown}
+        for card, _ in self._shown_cards:
+            if str(card) not in keep:
+                card.grid_remove()
+
+        max_cols = self._num_cols
+        for i, (card, _) in enumerate(shown):
             row = i // max_cols
             col = i % max_cols
-            card = self.create_item_card(scrollable_frame, item)
             card.grid(row=row, column=col, padx=15, pady=15, sticky="nsew")
-        
+        self._shown_cards = shown
+
         # Schedule center_frame to run after the layout has been updated
         # This ensures we get the correct width for the scrollable_frame
         self.after(10, self.center_frame)
+        self.schedule_idle_prefetch()
 
     def center_frame(self, event=None):
         """Callback function to center the scrollable frame inside the canvas."""
@@ -468,4 +773,13 @@ class KioskFrame(tk.Frame):
 
     def reset_state(self):
         """Resets the kiosk screen to its initial state."""
-        self.populate_items()
\ No newline at end of file
+        self.gestures.stop()
+        if self.search_var.get():
+            self.search_var.set('')
+        self.sort_var.set(SORT_LABELS[SORT_CATALOG])
+        if self._last_canvas_width < 2:
+            self.populate_items()
+            return
+        # Only the cards of items changed since the last visit are rebuilt
+        self.apply_pending_changes(relayout=False)
+        self.apply_filter()
\ No newline at end of file
@@ -6,6 +6,19 @@ from admin_screen import AdminScreen
 from item_screen import ItemScreen
 from cart_screen import CartScreen
 from fix_paths import get_absolute_path
+from image_loader import ImageLoader
+from async_bridge import AsyncBridge, BackgroundWriter
+from fleet_sync import build_fleet_sync
+from sales_uploader import build_sales_uploader
+from admin_api import build_admin_api
+from window_state import WindowStateController
+from search_index import SearchIndex, TrigramIndex
+from facet_index import FacetIndex
+from sort_index import SortIndex
+from reservations import ReservationManager, KIOSK_CART
+from idle_monitor import IdleMonitor, IdleWarningOverlay
+from money import Money, json_default
+from event_bus import EventBus, ITEM_ADDED, ITEM_UPDATED, ITEM_REMOVED, STOCK_CHANGED, CONFIG_CHANGED
 import subprocess
 import platform
 import os
@@ -15,6 +28,13 @@ class MainApp(tk.Tk):
     def __init__(self, *args, **kwargs):
         tk.Tk.__init__(self, *args, **kwargs)
         self.cart = []
+        # Catalog/config change notifications for the screens, batched per Tk tick
+        self.events = EventBus(self)
+        # asyncio loop for hopper payouts, e-wallet polling and file writes
+        self.async_bridge = AsyncBridge(self)
+        self.protocol("WM_DELETE_WINDOW", self.on_closing)
+        # Only issues window-manager calls whose value actually changes
+        self.window_state = WindowStateController(self)
 
         # Start in windowed mode for SelectionScreen
         self.is_fullscreen = False
@@ -27,14 +47,35 @@ class MainApp(tk.Tk):
         # Special handling for Raspberry Pi
         if platform.system() == "Linux":
             # Ensure window can go fullscreen on Raspberry Pi
-            self.attributes('-zoomed', '1')
+            self.window_state.set_attribute('-zoomed', '1')
             # Remove window decorations on Pi
-            self.attributes('-type', 'splash')
+            self.window_state.set_attribute('-type', 'splash')
         self.items_file_path = get_absolute_path("item_list.json")
         self.config_path = get_absolute_path("config.json")
         self.items = self.load_items_from_json(self.items_file_path)
+        self._items_writer = BackgroundWriter(self.async_bridge, self.items_file_path)
         self.config = self.load_config_from_json(self.config_path)
         self.currency_symbol = self.config.get("currency_symbol", "$")
+        # Token/prefix index for the kiosk search box
+        self.search_index = SearchIndex()
+        # Fuzzy (trigram) index for the admin filter field
+        self.admin_index = TrigramIndex()
+        # Category membership and in-stock counts for the kiosk category tabs
+        self.facet_index = FacetIndex()
+        # Precomputed name/price/stock/popularity orders for the sort selectors
+        self.sort_index = SortIndex()
+        # All of the above are kept in sync by add/update/remove_item
+        self._indexes = (self.search_index, self.admin_index, self.facet_index, self.sort_index)
+        for index in self._indexes:
+            index.build(self.items)
+        # Stock held by the cart; released in bulk if the cart is abandoned
+        self.reservations = ReservationManager(
+            self,
+            lookup=self.find_item,
+            on_stock_changed=self._stock_changed,
+            on_expired=self._on_cart_expired,
+            ttl_seconds=float(self.config.get("cart_reservation_ttl_seconds", 300)),
+        )
         self.title("Vending Machine UI")
         # Apply fullscreen and rotation according to config
         always_fs = bool(self.config.get('always_fullscreen', True))
@@ -98,6 +139,9 @@ class MainApp(tk.Tk):
         container.grid_rowconfigure(0, weight=1)
         container.grid_columnconfigure(0, weight=1)
 
+        # Shared background image decoder used by the kiosk and item screens
+        self.image_loader = ImageLoader(self)
+
         self.frames = {}
         for F in (SelectionScreen, KioskFrame, AdminScreen, ItemScreen, CartScreen):
             page_name = F.__name__
@@ -110,12 +154,37 @@ class MainApp(tk.Tk):
 
         self.active_frame_name = None
         self.show_frame("SelectionScreen")
+        # Settle a payment left open by a crash before anyone can start a new one
+        self.after_idle(self.frames["CartScreen"].recover_interrupted_payment)
+
+        # Walk-away protection: warn, then cancel payment, empty the cart and start over
+        self.idle_overlay = IdleWarningOverlay(self)
+        self.idle_monitor = IdleMonitor(
+            self,
+            timeout_seconds=self.config.get("idle_timeout_seconds", 120),
+            warning_seconds=self.config.get("idle_warning_seconds", 20),
+            is_active=self._customer_session_active,
+            on_warning=self.idle_overlay.show,
+            on_resume=self.idle_overlay.hide,
+            on_timeout=self._on_idle_timeout,
+        )
+
+        # Optional: replicate stock levels to the fleet store and take its price changes
+        self.fleet_sync = build_fleet_sync(self)
+        # Optional: store-and-forward upload of completed sales
+        self.sales_uploader = build_sales_uploader(self)
+        # Optional: localhost REST/JSON admin API
+        self.admin_api = build_admin_api(self)
 
     def load_items_from_json(self, file_path):
         """Loads item data from a JSON file."""
         try:
             with open(file_path, "r") as file:
-                return json.load(file)
+                items = json.load(file)
+            # Prices are exact centavo amounts in memory, pesos in the file
+            for item in items:
+                item["price"] = Money.of(item.get("price", 0))
+            return items
         except FileNotFoundError:
             print(
                 f"Warning: {file_path} not found. Generating a new one with default items."
@@ -146,95 +215,124 @@ class MainApp(tk.Tk):
             return []
 
     def save_items_to_json(self):
-        """Saves the current item list to the JSON file."""
-        with open(self.items_file_path, "w") as file:
-            json.dump(self.items, file, indent=4)
+        """Saves the current item list to the JSON file.
+
+        Quantities are saved as stock on hand: stock reserved by carts is
+        added back, so a crash or restart never loses it. The JSON is built
+        here; the file is written on the asyncio loop, so a slow SD card
+        never stalls the UI.
+        """
+        items = []
+        for item in self.items:
+            reserved = self.reservations.reserved(item["name"])
+            items.append(dict(item, quantity=item["quantity"] + reserved) if reserved else item)
+        self._items_writer.write(json.dumps(items, indent=4, default=json_default))
+
+    def on_closing(self):
+        """Releases hardware and lets pending background writes finish before exiting."""
+        if self.fleet_sync is not None:
+            self.fleet_sync.stop()
+        if self.sales_uploader is not None:
+            self.sales_uploader.stop()
+        if self.admin_api is not None:
+            self.admin_api.stop()
+        try:
+            self.frames["CartScreen"].on_closing()
+        except Exception as e:
+            print(f"Error cleaning up payment hardware: {e}")
+        self.async_bridge.close()
+        self.destroy()
+
+    def save_config(self, new_config):
+        """Writes `new_config` to config.json, makes it current and notifies the screens."""
+        with open(self.config_path, "w") as file:
+            json.dump(new_config, file, indent=4)
+        self.config = new_config
+        self.events.publish(CONFIG_CHANGED)
 
     def toggle_fullscreen(self, event=None):
         """Toggles fullscreen mode for the SelectionScreen."""
         if self.active_frame_name == "SelectionScreen":
             self.is_fullscreen = not self.is_fullscreen
             if self.is_fullscreen:
-                self.attributes("-fullscreen", True)
-                self.overrideredirect(True)
+                self.window_state.apply([
+                    ('attribute', '-fullscreen', True),
+                    ('overrideredirect', True),
+                ])
             else:
-                self.attributes("-fullscreen", False)
-                self.overrideredirect(False)
-                self.state('normal')
-                # Set a reasonable default size
-                width = min(1024, self.winfo_screenwidth() - 100)
-                height = min(768, self.winfo_screenheight() - 100)
-                x = (self.winfo_screenwidth() - width) // 2
-                y = (self.winfo_screenheight() - height) // 2
-                self.geometry(f"{width}x{height}+{x}+{y}")
+                self.window_state.apply([
+                    ('attribute', '-fullscreen', False),
+                    ('overrideredirect', False),
+                    ('state', 'normal'),
+                    ('geometry', self._windowed_geometry()),
+                ])
+
+    def _windowed_geometry(self):
+        """A reasonable default size for the windowed SelectionScreen, centered."""
+        width = min(1024, self.winfo_screenwidth() - 100)
+        height = min(768, self.winfo_screenheight() - 100)
+        x = (self.winfo_screenwidth() - width) // 2
+        y = (self.winfo_screenheight() - height) // 2
+        return f"{width}x{height}+{x}+{y}"
+
+    def _fullscreen_geometry(self):
+        return f"{self.winfo_screenwidth()}x{self.winfo_screenheight()}+0+0"
 
     def show_frame(self, page_name):
         """Show a frame for the given page name"""
         frame = self.frames[page_name]
+        if page_name == self.active_frame_name:
+            # Same-screen refresh: the caller has already updated the content,
+            # so there is no window state or focus to change.
+            return
         self.active_frame_name = page_name
 
-        # Handle window state differently for Linux/Raspberry Pi
-        is_linux = platform.system() == "Linux"
-
-        if page_name == "SelectionScreen":
-            try:
-                if is_linux:
-                    # On Pi: use normal window with decorations
-                    self.attributes('-type', 'normal')
-                    self.attributes('-zoomed', '0')
-                    self.state('normal')
-                else:
-                    # On Windows: standard window control
-                    self.overrideredirect(False)
-                    self.attributes("-fullscreen", False)
-                
-                # Set a reasonable default size
-                width = min(1024, self.winfo_screenwidth() - 100)
-                height = min(768, self.winfo_screenheight() - 100)
-                x = (self.winfo_screenwidth() - width) // 2
-                y = (self.winfo_screenheight() - height) // 2
-                self.geometry(f"{width}x{height}+{x}+{y}")
-            except Exception as e:
-                print(f"Error setting window state: {e}")
-        else:
-            try:
-                if is_linux:
-                    # On Pi: use splash window type and zoomed state
-                    self.attributes('-type', 'splash')
-                    self.attributes('-zoomed', '1')
-                    # Force fullscreen size
-                    self.geometry(f"{self.winfo_screenwidth()}x{self.winfo_screenheight()}+0+0")
-                else:
-                    # On Windows: use standard fullscreen
-                    self.attributes("-fullscreen", True)
-                    self.overrideredirect(True)
-                    self.geometry(f"{self.winfo_screenwidth()}x{self.winfo_screenheight()}+0+0")
-            except Exception as e:
-                print(f"Error setting fullscreen: {e}")
+        try:
+            wm_changed = self.window_state.apply(self._window_steps(page_name))
+        except Exception as e:
+            print(f"Error setting window state: {e}")
+            self.window_state.invalidate()
+            wm_changed = True
 
-        # Raise the frame and ensure it has focus
         frame.tkraise()
-        self.update_idletasks()  # Process any pending window manager tasks
-        
-        # Multiple focus attempts for reliable key handling
-        for focus_method in [self.focus_force, self.focus_set, frame.focus_set]:
-            try:
-                focus_method()
-                break
-            except Exception:
-                continue
+        if wm_changed:
+            self.update_idletasks()  # Let the window manager settle before focusing
 
         frame.event_generate("<<ShowFrame>>")
-        frame.tkraise()
-        # Force focus back to the main window so global bindings (Escape) are received
+        # Keep focus on the main window so global bindings (Escape) are received.
+        # Only needed after the window manager state changed or focus was lost.
         try:
-            self.focus_force()
+            if wm_changed or self.focus_get() is None:
+                self.focus_force()
         except Exception:
             try:
                 self.focus_set()
             except Exception:
                 pass
 
+    def _window_steps(self, page_name):
+        """Window-manager steps for a page, in the order they must be applied."""
+        # Handle window state differently for Linux/Raspberry Pi
+        is_linux = platform.system() == "Linux"
+
+        if page_name == "SelectionScreen":
+            if is_linux:
+                # On Pi: use normal window with decorations
+                steps = [('attribute', '-type', 'normal'), ('attribute', '-zoomed', '0'), ('state', 'normal')]
+            else:
+                # On Windows: standard window control
+                steps = [('overrideredirect', False), ('attribute', '-fullscreen', False)]
+            return steps + [('geometry', self._windowed_geometry())]
+
+        if is_linux:
+            # On Pi: use splash window type and zoomed state
+            steps = [('attribute', '-type', 'splash'), ('attribute', '-zoomed', '1')]
+        else:
+            # On Windows: use standard fullscreen
+            steps = [('attribute', '-fullscreen', True), ('overrideredirect', True)]
+        # Force fullscreen size
+        return steps + [('geometry', self._fullscreen_geometry())]
+
     def set_kiosk_mode(self, enable: bool):
         """Enable or disable kiosk mode: fullscreen and no window decorations.
 
@@ -246,26 +344,26 @@ class MainApp(tk.Tk):
             self.is_fullscreen = True
             # Try to remove window decorations first, then set fullscreen
             try:
-                self.overrideredirect(True)
+                self.window_state.set_overrideredirect(True)
             except Exception:
                 pass
             try:
-                self.attributes("-fullscreen", True)
+                self.window_state.set_attribute("-fullscreen", True)
             except Exception:
                 pass
             # Ensure geometry covers the entire screen
             try:
-                self.geometry(f"{self.winfo_screenwidth()}x{self.winfo_screenheight()}+0+0")
+                self.window_state.set_geometry(f"{self.winfo_screenwidth()}x{self.winfo_screenheight()}+0+0")
             except Exception:
                 pass
         else:
             # Restore decorations and exit fullscreen
             try:
-                self.attributes("-fullscreen", False)
+                self.window_state.set_attribute("-fullscreen", False)
             except Exception:
                 pass
             try:
-                self.overrideredirect(False)
+                self.window_state.set_overrideredirect(False)
             except Exception:
                 pass
             # Optionally set a sensible windowed geometry
@@ -275,19 +373,15 @@ class MainApp(tk.Tk):
                 width = screen_width // 2
                 height = screen_height
                 x = screen_width // 2
-                self.geometry(f"{width}x{height}+{x}+0")
+                self.window_state.set_geometry(f"{width}x{height}+{x}+0")
             except Exception:
                 pass
 
     def show_kiosk(self):
         """Show the kiosk interface and reset its state."""
         self.frames["KioskFrame"].reset_state()
-        # First update the frame name
-        self.active_frame_name = "KioskFrame"
-        # Then show the frame (which will make it fullscreen)
+        # Show the frame (which will make it fullscreen)
         self.show_frame("KioskFrame")
-        # Force focus back to main window for key bindings
-        self.focus_force()
 
     def show_item(self, item_data):
         """Passes item data to the ItemScreen and displays it."""
@@ -297,21 +391,25 @@ class MainApp(tk.Tk):
     def show_cart(self):
         """Passes cart data to the CartScreen and displays it."""
         self.frames["CartScreen"].update_cart(self.cart)
-        self.show_frame("CartScreen")
+        if self.active_frame_name != "CartScreen":
+            self.show_frame("CartScreen")
 
     def add_to_cart(self, added_item, quantity):
-        """Adds an item and its quantity to the cart."""
+        """Reserves stock and adds the item to the cart. Returns False if out of stock."""
+        if not self.reservations.reserve(KIOSK_CART, added_item["name"], quantity):
+            return False
         # Check if item is already in cart
         for item_info in self.cart:
             if item_info["item"]["name"] == added_item["name"]:
                 item_info["quantity"] += quantity
-                return  # Exit after updating
+                return True  # Exit after updating
 
         # If not in cart, add as a new entry
         self.cart.append({"item": added_item, "quantity": quantity})
+        return True
 
     def remove_from_cart(self, item_to_remove):
-        """Removes an item entirely from the cart and restores its quantity."""
+        """Removes an item entirely from the cart and releases its reservation."""
         item_found = None
         for item_info in self.cart:
             if item_info["item"]["name"] == item_to_remove["name"]:
@@ -319,23 +417,18 @@ class MainApp(tk.Tk):
                 break
 
         if item_found:
-            self.increase_item_quantity(item_found["item"], item_found["quantity"])
+            self.reservations.release(KIOSK_CART, item_found["item"]["name"])
             self.cart.remove(item_found)
-            self.show_cart()  # Refresh cart screen
+            self.frames["CartScreen"].update_cart_line(item_found["item"]["name"])
 
     def increase_cart_item_quantity(self, item_to_increase):
-        """Increases an item's quantity in the cart by 1."""
-        # First, check if there is available stock
-        for master_item in self.items:
-            if master_item["name"] == item_to_increase["name"]:
-                if master_item["quantity"] > 0:
-                    master_item["quantity"] -= 1  # Reduce from master list
-                    # Now, increase in cart
-                    for cart_item_info in self.cart:
-                        if cart_item_info["item"]["name"] == item_to_increase["name"]:
-                            cart_item_info["quantity"] += 1
-                            self.show_cart()  # Refresh cart screen
-                            return
+        """Increases an item's quantity in the cart by 1, if there is stock to reserve."""
+        for cart_item_info in self.cart:
+            if cart_item_info["item"]["name"] == item_to_increase["name"]:
+                if self.reservations.reserve(KIOSK_CART, item_to_increase["name"], 1):
+                    cart_item_info["quantity"] += 1
+                    self.frames["CartScreen"].update_cart_line(item_to_increase["name"])
+                return
 
     def decrease_cart_item_quantity(self, item_to_decrease):
         """Decreases an item's quantity in the cart by 1."""
@@ -343,16 +436,45 @@ class MainApp(tk.Tk):
             if item_info["item"]["name"] == item_to_decrease["name"]:
                 if item_info["quantity"] > 1:
                     item_info["quantity"] -= 1
-                    self.increase_item_quantity(item_to_decrease, 1)
-                    self.show_cart()  # Refresh cart screen
+                    self.reservations.release(KIOSK_CART, item_to_decrease["name"], 1)
+                    self.frames["CartScreen"].update_cart_line(item_to_decrease["name"])
                 else:  # If quantity is 1, remove it completely
                     self.remove_from_cart(item_to_decrease)
                 return
 
     def clear_cart(self):
-        """Empties the cart."""
+        """Empties the cart, returning any stock it still holds."""
+        self.reservations.release_cart(KIOSK_CART)
         self.cart.clear()
 
+    def _on_cart_expired(self, cart_id, released):
+        """Drops the lines of an abandoned cart whose reservations timed out."""
+        if cart_id != KIOSK_CART:
+            return
+        print(f"Cart reservation expired; released {released}")
+        self.cart[:] = [line for line in self.cart if line["item"]["name"] not in released]
+        self.frames["CartScreen"].update_cart(self.cart)
+
+    def _customer_session_active(self):
+        """A session is worth timing out if it holds a cart or is past the grid."""
+        return bool(self.cart) or self.active_frame_name in ("ItemScreen", "CartScreen")
+
+    def _on_idle_timeout(self):
+        """Resets an abandoned session: payment, then cart stock, then the screen."""
+        self.idle_overlay.hide()
+        if self.frames["CartScreen"].payout_in_progress:
+            # The sale is being settled; it clears the cart itself
+            return
+        print("Session idle; returning to the kiosk")
+        self.frames["CartScreen"].cancel_payment(notify=False)
+        self.clear_cart()
+        self.frames["CartScreen"].update_cart(self.cart)
+        self.show_kiosk()
+
+    def find_item(self, name):
+        """Returns the master item called `name`, or None. O(1)."""
+        return self.sort_index.item(name)
+
     def handle_checkout(self, checked_out_items):
         """
         Processes items at checkout. In a real app, this would handle payment.
@@ -372,20 +494,59 @@ class MainApp(tk.Tk):
         self.save_items_to_json()  # Persist the new quantities
         return True
 
+    def record_sale(self, cart_items):
+        """Commits the cart's reservations as a sale and persists the new stock.
+
+        Stock was already taken when the items were put in the cart, so only
+        the reservations and the items' sales counts change here.
+        """
+        sold = self.reservations.commit(KIOSK_CART)
+        for item_info in cart_items:
+            master_item = self.find_item(item_info["item"]["name"])
+            if master_item is not None:
+                master_item["sold"] = master_item.get("sold", 0) + sold.get(master_item["name"], item_info["quantity"])
+                self.sort_index.item_changed(master_item)
+                self.events.publish(STOCK_CHANGED, master_item)
+        self.save_items_to_json()
+
+    def record_recovered_sale(self, lines):
+        """Records a sale replayed from the payment journal after a restart.
+
+        The cart's reservations did not survive the restart, so the sold
+        items are still counted as on hand and are taken out here.
+        """
+        for line in lines:
+            master_item = self.find_item(line.get("name"))
+            if master_item is None:
+                print(f"Recovered sale of unknown item {line.get('name')}")
+                continue
+            quantity = line.get("quantity", 0)
+            master_item["quantity"] = max(0, master_item["quantity"] - quantity)
+            master_item["sold"] = master_item.get("sold", 0) + quantity
+            self._stock_changed(master_item)
+        self.save_items_to_json()
+
+    def _stock_changed(self, item):
+        """Keeps the quantity-dependent indexes in step and notifies the screens."""
+        self.facet_index.stock_changed(item)
+        self.sort_index.item_changed(item)
+        self.events.publish(STOCK_CHANGED, item)
+
     def reduce_item_quantity(self, item, quantity):
-        """Reduces the quantity of the item in the KioskFrame."""
-        kiosk_frame = self.frames["KioskFrame"]
-        for index in range(len(kiosk_frame.items)):
-            kiosk_item = kiosk_frame.items[index]
-            if kiosk_item["name"] == item["name"]:
+        """Reduces the quantity of an item in the master item list."""
+        for master_item in self.items:
+            if master_item["name"] == item["name"]:
                 print(f"Reducing {item['name']} quantity by {quantity}")
-                self.items[index]["quantity"] -= quantity
+                master_item["quantity"] -= quantity
+                self._stock_changed(master_item)
+                return
 
     def increase_item_quantity(self, item, quantity):
         """Increases the quantity of an item in the master item list."""
         for master_item in self.items:
             if master_item["name"] == item["name"]:
                 master_item["quantity"] += quantity
+                self._stock_changed(master_item)
                 return
 
     def add_item(self, new_item_data):
@@ -395,31 +556,94 @@ class MainApp(tk.Tk):
         """
         new_item_name = new_item_data.get("name", "").strip()
         # Check for existing item with the same name (case-insensitive)
-        if any(item.get("name", "").strip().lower() == new_item_name.lower() for item in self.items):
+        if self.name_taken(new_item_name):
             return False  # Item with this name already exists
 
         self.items.append(new_item_data)
+        for index in self._indexes:
+            index.add(new_item_data)
         self.save_items_to_json()
-        # Refresh screens that show items
-        self.frames["AdminScreen"].populate_items()
-        self.frames["KioskFrame"].populate_items()
+        self.events.publish(ITEM_ADDED, new_item_data)
         return True
 
     def update_item(self, original_item_name, updated_item_data):
-        """Updates an existing item in the master list and saves to JSON."""
+        """
+        Updates an existing item in the master list and saves to JSON.
+        Returns False if the new name is taken by another item (case-insensitive).
+        """
+        if self.name_taken(updated_item_data["name"], ignore=original_item_name):
+            return False
         for i, item in enumerate(self.items):
             if item["name"] == original_item_name:
                 self.items[i] = updated_item_data
+                for index in self._indexes:
+                    index.update(original_item_name, updated_item_data)
+                self._rename_in_cart(original_item_name, updated_item_data)
+                self.events.publish(ITEM_UPDATED, updated_item_data, old_name=original_item_name)
                 break
         self.save_items_to_json()
-        self.frames["AdminScreen"].populate_items()
-        self.frames["KioskFrame"].populate_items()
+        return True
+
+    def name_taken(self, name, ignore=None):
+        """True if another item than `ignore` is named `name` (case-insensitive)."""
+        lowered = name.strip().lower()
+        return any(item.get("name", "").strip().lower() == lowered
+                   for item in self.items if item["name"] != ignore)
+
+    def _rename_in_cart(self, original_name, new_data):
+        """Keeps reservations and cart lines of a renamed item under its new name."""
+        if new_data["name"] == original_name:
+            return
+        self.reservations.rename(original_name, new_data["name"])
+        for item_info in self.cart:
+            if item_info["item"]["name"] == original_name:
+                item_info["item"] = new_data
 
     def remove_item(self, item_to_remove):
         """Removes an item from the master list and saves to JSON."""
         self.items.remove(item_to_remove)
+        for index in self._indexes:
+            index.remove(item_to_remove["name"])
+        self.save_items_to_json()
+        self.events.publish(ITEM_REMOVED, old_name=item_to_remove["name"])
+
+    def apply_bulk_changes(self, added=(), updated=(), removed=()):
+        """Applies many catalog changes with one save and one screen refresh.
+
+        Args:
+            added (list): New item dicts; names must not exist yet
+            updated (list): (original name, new item dict) pairs
+            removed (list): Names of items to remove
+
+        The indexes are updated item by item as in add/update/remove_item;
+        the change events all land in the same Tk tick, so each screen
+        refreshes once, and the item file is written once.
+        """
+        positions = {item["name"]: i for i, item in enumerate(self.items)}
+        for original_name, new_data in updated:
+            i = positions.pop(original_name, None)
+            if i is None:
+                print(f"Bulk update of unknown item {original_name}")
+                continue
+            self.items[i] = new_data
+            positions[new_data["name"]] = i
+            for index in self._indexes:
+                index.update(original_name, new_data)
+            self._rename_in_cart(original_name, new_data)
+            self.events.publish(ITEM_UPDATED, new_data, old_name=original_name)
+        removed = {name for name in removed if name in positions}
+        if removed:
+            self.items[:] = [item for item in self.items if item["name"] not in removed]
+            for name in removed:
+                for index in self._indexes:
+                    index.remove(name)
+                self.events.publish(ITEM_REMOVED, old_name=name)
+        for new_data in added:
+            self.items.append(new_data)
+            for index in self._indexes:
+                index.add(new_data)
+            self.events.publish(ITEM_ADDED, new_data)
         self.save_items_to_json()
-        self.frames["AdminScreen"].populate_items()
 
     def show_admin(self):
         self.show_frame("AdminScreen")
@@ -439,7 +663,7 @@ class MainApp(tk.Tk):
             # Handle window state in show_frame
             self.show_frame("SelectionScreen")
         else:
-            self.destroy()
+            self.on_closing()
 
 
 if __name__ == "__main__":
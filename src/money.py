@@ -0,0 +1,130 @@
+"""Fixed-point money in integer centavos.
+
+Floats can't represent most decimal amounts exactly, so summing coins
+and prices drifts (0.1 + 0.2 != 0.3) and `received >= total` or change
+calculations can come out wrong by a centavo. `Money` stores a single
+int; arithmetic and comparisons are plain integer operations.
+
+Amounts enter as pesos (JSON numbers, form fields) through `Money.of`
+and leave through `pesos` (or `json_default` when dumping JSON). Plain
+numbers used in arithmetic or comparisons with Money are taken as pesos,
+so `amount > 0` works.
+"""
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+
+
+class Money:
+    """An exact amount of money in centavos. Treated as immutable."""
+
+    __slots__ = ("centavos",)
+
+    def __init__(self, centavos=0):
+        self.centavos = int(centavos)
+
+    @classmethod
+    def of(cls, value):
+        """Converts pesos (int, float, str or Money) to Money, rounding to the centavo."""
+        if isinstance(value, Money):
+            return value
+        if isinstance(value, int):
+            return cls(value * 100)
+        try:
+            amount = Decimal(str(value).strip() or "0")
+        except InvalidOperation:
+            raise ValueError(f"Invalid amount: {value!r}")
+        if not amount.is_finite():
+            raise ValueError(f"Invalid amount: {value!r}")
+        return cls(int((amount * 100).to_integral_value(ROUND_HALF_UP)))
+
+    @property
+    def pesos(self):
+        """The amount as a float in pesos, e.g. for JSON (25.0, like the catalog)."""
+        return self.centavos / 100
+
+    # --- Arithmetic (exact integer operations) ---
+
+    def __add__(self, other):
+        return Money(self.centavos + _centavos(other))
+
+    __radd__ = __add__  # also lets sum() start from 0
+
+    def __sub__(self, other):
+        return Money(self.centavos - _centavos(other))
+
+    def __rsub__(self, other):
+        return Money(_centavos(other) - self.centavos)
+
+    def __mul__(self, factor):
+        if not isinstance(factor, int):
+            return NotImplemented  # quantities only; no float scaling
+        return Money(self.centavos * factor)
+
+    __rmul__ = __mul__
+
+    def __neg__(self):
+        return Money(-self.centavos)
+
+    def __abs__(self):
+        return Money(abs(self.centavos))
+
+    def __bool__(self):
+        return self.centavos != 0
+
+    # --- Comparisons ---
+
+    def __eq__(self, other):
+        try:
+            return self.centavos == _centavos(other)
+        except TypeError:
+            return NotImplemented
+
+    def __lt__(self, other):
+        return self.centavos < _centavos(other)
+
+    def __le__(self, other):
+        return self.centavos <= _centavos(other)
+
+    def __gt__(self, other):
+        return self.centavos > _centavos(other)
+
+    def __ge__(self, other):
+        return self.centavos >= _centavos(other)
+
+    def __hash__(self):
+        # Equal to plain pesos (Money.of(1) == 1), so it must hash like them
+        return hash(self._decimal())
+
+    # --- Display ---
+
+    def _decimal(self):
+        return Decimal(self.centavos).scaleb(-2)
+
+    def __format__(self, spec):
+        return format(self._decimal(), spec or ".2f")
+
+    def __str__(self):
+        return format(self._decimal(), ".2f")
+
+    def __repr__(self):
+        return f"Money({str(self)})"
+
+    def __reduce__(self):
+        return (Money, (self.centavos,))
+
+
+ZERO = Money(0)
+
+
+def _centavos(value):
+    if isinstance(value, Money):
+        return value.centavos
+    if isinstance(value, (int, float, Decimal)):
+        return Money.of(value).centavos
+    raise TypeError(f"cannot combine Money with {type(value).__name__}")
+
+
+def json_default(obj):
+    """`default=` hook for json.dump so Money is written as pesos."""
+    if isinstance(obj, Money):
+        return obj.pesos
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
@@ -0,0 +1,265 @@
+"""Payment devices feeding one credit event stream.
+
+Every money source (coin acceptor, bill validator, e-wallet/QR) is a
+`PaymentDevice` registered on a `DeviceBus`. Devices push timestamped
+`CreditEvent`s from whatever thread they run on (GPIO callbacks, network
+workers); the payment session drains them from its existing 100 ms UI
+poll. The queue is a collections.deque, so neither side takes a lock and
+adding a device adds no polling loop. A credit is passed to the bus's
+`on_credit` hook (the payment journal) before it is queued, so money is
+on disk the moment it is counted, not when the UI next polls. That runs
+on the producer's own thread with no bus lock held, so no producer waits
+on another device's credit (only on the journal's own append).
+
+Each credit carries the bus's session epoch. `reset()` starts a new
+epoch, and credits from an older one are neither drained nor journaled,
+which keeps the UI total and the journal in step without a lock.
+
+Devices are created from the "payment_devices" config list, e.g.
+
+    "payment_devices": [
+        {"type": "coin_acceptor", "pin": 17},
+        {"type": "bill_validator", "pin": 5, "pulse_value": 10},
+        {"type": "ewallet"}
+    ]
+
+Without that key a single coin acceptor on the given coin pin is used.
+"""
+import time
+from collections import deque, namedtuple
+from threading import Lock, Timer
+from coin_handler import CoinAcceptor
+from money import Money
+
+try:
+    import RPi.GPIO as GPIO
+except Exception:
+    import rpi_gpio_mock as GPIO
+
+KIND_COIN = "coin"
+KIND_BILL = "bill"
+KIND_EWALLET = "ewallet"
+
+# amount is Money; reference identifies e.g. an e-wallet transaction;
+# epoch is the DeviceBus session epoch the credit arrived in
+CreditEvent = namedtuple("CreditEvent", "timestamp source kind amount reference epoch")
+
+
+class DeviceBus:
+    """Registry of payment devices and the queue of credits they produce."""
+
+    def __init__(self):
+        self._events = deque()
+        self._devices = {}  # name -> device
+        # on_credit(event), called on the producer's thread before the credit is queued
+        self.on_credit = None
+        self.epoch = 0  # bumped by reset() (Tk thread only)
+
+    def register(self, device):
+        if device.name in self._devices:
+            raise ValueError(f"Duplicate payment device name: {device.name}")
+        self._devices[device.name] = device
+        device.attach(self)
+        return device
+
+    def device(self, name):
+        return self._devices.get(name)
+
+    def devices(self, kind=None):
+        return [d for d in self._devices.values() if kind is None or d.kind == kind]
+
+    def credit(self, source, kind, amount, reference=None):
+        """Records (on_credit) and queues a credit. Safe to call from any thread."""
+        event = CreditEvent(time.time(), source, kind, Money.of(amount), reference, self.epoch)
+        if self.on_credit is not None:
+            try:
+                self.on_credit(event)
+            except Exception as e:
+                print(f"Error recording credit {event}: {e}")
+        self._events.append(event)
+
+    def reset(self, callback=None):
+        """Starts a new epoch: credits queued or arriving from before it are dropped.
+
+        `callback(epoch)` runs first with the new epoch, so a session started
+        there (e.g. its journal record written) is in place before any
+        credit of that epoch exists. Call from the Tk thread.
+        """
+        epoch = self.epoch + 1
+        if callback is not None:
+            callback(epoch)
+        self.epoch = epoch
+        self._events.clear()
+
+    def drain(self):
+        """Removes and returns every credit of the current epoch, oldest first (single consumer)."""
+        events = []
+        popleft = self._events.popleft
+        while True:
+            try:
+                event = popleft()
+            except IndexError:
+                return events
+            if event.epoch == self.epoch:
+                events.append(event)
+
+    def enable(self):
+        """Lets every device accept money (start of a payment session)."""
+        for device in self._devices.values():
+            device.enable()
+
+    def disable(self):
+        for device in self._devices.values():
+            device.disable()
+
+    def cleanup(self):
+        for device in self._devices.values():
+            try:
+                device.cleanup()
+            except Exception as e:
+                print(f"Error cleaning up payment device {device.name}: {e}")
+
+
+class PaymentDevice:
+    """Base class for a money source. Subclasses call self.credit(amount)."""
+
+    kind = None
+
+    def __init__(self, name):
+        self.name = name
+        self.bus = None
+
+    def attach(self, bus):
+        self.bus = bus
+
+    def credit(self, amount, reference=None):
+        if self.bus is not None:
+            self.bus.credit(self.name, self.kind, amount, reference)
+
+    def enable(self):
+        """Starts accepting money, if the device can be inhibited."""
+
+    def disable(self):
+        """Stops accepting money, if the device can be inhibited."""
+
+    def cleanup(self):
+        """Releases hardware resources."""
+
+
+class CoinAcceptorDevice(PaymentDevice):
+    """Allan 123A-Pro coin acceptor (see coin_handler.CoinAcceptor)."""
+
+    kind = KIND_COIN
+
+    def __init__(self, name="coin", pin=17, counter_pin=None):
+        super().__init__(name)
+        self.acceptor = CoinAcceptor(coin_pin=pin, counter_pin=counter_pin)
+        self.acceptor.on_coin = lambda value, total: self.credit(value)
+
+    def cleanup(self):
+        self.acceptor.cleanup()
+
+
+class BillValidatorDevice(PaymentDevice):
+    """Pulse-output bill validator: each bill is sent as a burst of pulses.
+
+    A burst ends when no pulse arrives for `pulse_gap` seconds; the bill
+    is then credited as pulses x `pulse_value`. An optional inhibit pin
+    stops the validator from taking bills outside a payment session.
+    """
+
+    kind = KIND_BILL
+
+    def __init__(self, name="bill", pin=5, pulse_value=10, pulse_gap=0.2, inhibit_pin=None):
+        super().__init__(name)
+        self.pin = pin
+        self.pulse_value = Money.of(pulse_value)
+        self.pulse_gap = pulse_gap
+        self.inhibit_pin = inhibit_pin
+        self._pulses = 0
+        self._burst_timer = None
+        # The GPIO thread counts pulses while the timer thread ends bursts
+        self._lock = Lock()
+
+        GPIO.setmode(GPIO.BCM)
+        GPIO.setup(self.pin, GPIO.IN, pull_up_down=GPIO.PUD_UP)
+        if self.inhibit_pin is not None:
+            GPIO.setup(self.inhibit_pin, GPIO.OUT)
+            self.disable()
+        GPIO.add_event_detect(self.pin, GPIO.FALLING, callback=self._pulse, bouncetime=20)
+
+    def _pulse(self, channel):
+        # Runs on the GPIO thread; the timer restarts with every pulse of the burst
+        with self._lock:
+            self._pulses += 1
+            if self._burst_timer is not None:
+                self._burst_timer.cancel()
+            self._burst_timer = Timer(self.pulse_gap, self._end_burst)
+            self._burst_timer.daemon = True
+            self._burst_timer.start()
+
+    def _end_burst(self):
+        with self._lock:
+            pulses, self._pulses = self._pulses, 0
+            self._burst_timer = None
+        if pulses:
+            self.credit(self.pulse_value * pulses)
+
+    def enable(self):
+        if self.inhibit_pin is not None:
+            GPIO.output(self.inhibit_pin, GPIO.LOW)
+
+    def disable(self):
+        if self.inhibit_pin is not None:
+            GPIO.output(self.inhibit_pin, GPIO.HIGH)
+
+    def cleanup(self):
+        with self._lock:
+            if self._burst_timer is not None:
+                self._burst_timer.cancel()
+        GPIO.remove_event_detect(self.pin)
+
+
+class EWalletDevice(PaymentDevice):
+    """E-wallet/QR payments. Confirmed payments are credited with their reference."""
+
+    kind = KIND_EWALLET
+
+    def __init__(self, name="ewallet"):
+        super().__init__(name)
+        self._credited = set()  # references already credited
+
+    def confirm(self, amount, reference):
+        """Credits a confirmed payment once, however often it is reported."""
+        if reference in self._credited:
+            return False
+        self._credited.add(reference)
+        self.credit(amount, reference)
+        return True
+
+
+_DEVICE_TYPES = {
+    "coin_acceptor": CoinAcceptorDevice,
+    "bill_validator": BillValidatorDevice,
+    "ewallet": EWalletDevice,
+}
+
+
+def build_device_bus(config, coin_pin=17, counter_pin=None):
+    """Creates a DeviceBus with the devices listed in config["payment_devices"]."""
+    bus = DeviceBus()
+    specs = config.get("payment_devices")
+    if not specs:
+        specs = [{"type": "coin_acceptor", "pin": coin_pin, "counter_pin": counter_pin}]
+    for spec in specs:
+        options = dict(spec)
+        device_type = options.pop("type", None)
+        device_class = _DEVICE_TYPES.get(device_type)
+        if device_class is None:
+            print(f"Unknown payment device type: {device_type}")
+            continue
+        try:
+            bus.register(device_class(**options))
+        except Exception as e:
+            print(f"Error initializing payment device {spec}: {e}")
+    return bus
@@ -1,19 +1,55 @@
-from threading import Lock
-from coin_handler import CoinAcceptor
+import asyncio
+import threading
 from coin_hopper import CoinHopper
+from async_bridge import run_blocking
+from payment_devices import build_device_bus, EWalletDevice, KIND_COIN, KIND_EWALLET
+from ewallet import EWalletSession, build_provider
+from payment_journal import PaymentJournal
+from money import Money, ZERO
 
 class PaymentHandler:
-    """Payment handler that manages the Allan 123A-Pro coin acceptor and coin hoppers."""
-    def __init__(self, config, coin_pin=17, counter_pin=None):
-        """Initialize the payment handler with coin acceptor and hoppers.
+    """Payment handler that collects credits from the payment devices and pays change from the hoppers."""
+    def __init__(self, config, coin_pin=17, counter_pin=None, journal_path=None, bridge=None):
+        """Initialize the payment handler with payment devices and hoppers.
         
         Args:
-            config (dict): Configuration containing coin hopper pin settings
-            coin_pin (int): GPIO pin number (BCM) for the coin signal
+            config (dict): Configuration with payment device and coin hopper settings
+            coin_pin (int): GPIO pin number (BCM) for the coin signal, if
+                config has no "payment_devices" list
             counter_pin (int, optional): GPIO pin for the counter signal if used
+            journal_path (str, optional): Write-ahead payment journal file
+            bridge (AsyncBridge, optional): Event loop for e-wallet sessions
         """
-        # Setup coin acceptor
-        self.coin_acceptor = CoinAcceptor(coin_pin=coin_pin, counter_pin=counter_pin)
+        self.bridge = bridge
+        # Every payment step is journaled so a restart can't lose inserted money
+        self.journal = PaymentJournal(journal_path) if journal_path else None
+
+        # Coin acceptors, bill validators, e-wallet... all feed one credit queue
+        self.devices = build_device_bus(config, coin_pin=coin_pin, counter_pin=counter_pin)
+        coin_devices = self.devices.devices(KIND_COIN)
+        self.coin_acceptor = coin_devices[0].acceptor if coin_devices else None
+        self._received = ZERO
+        self._journaled = ZERO  # session total as journaled
+        self._session_epoch = None  # DeviceBus epoch of the current session
+        self._journal_lock = threading.Lock()  # in-memory total only; no I/O under it
+        self.devices.on_credit = self._journal_credit
+        # Amount received per device kind in the current (or last) session
+        self.received_by_kind = {}
+        # Change the hoppers couldn't pay out in the last session (e.g. centavos)
+        self.change_owed = ZERO
+
+        # E-wallet payments are confirmed by the provider and credited on the bus
+        self.ewallet_provider = build_provider(config)
+        self.ewallet_options = config.get("ewallet") or {}
+        self.ewallet_session = None
+        self.ewallet_device = None
+        self._ewallet_credits = []  # (reference, amount) credited in the current session
+        # Tk-thread callback(message, owed) for e-wallet refunds the customer must hear about
+        self.on_ewallet_refund = None
+        if self.ewallet_provider is not None:
+            ewallet_devices = self.devices.devices(KIND_EWALLET)
+            self.ewallet_device = (ewallet_devices[0] if ewallet_devices
+                                   else self.devices.register(EWalletDevice()))
         
         # Setup coin hoppers if configured
         self.coin_hopper = None
@@ -33,66 +69,276 @@ class PaymentHandler:
             print(f"Error initializing coin hoppers: {e}")
             self.coin_hopper = None
             
-        self._lock = Lock()
         self._callback = None  # Optional callback for UI updates
         self._change_callback = None  # Optional callback for change status
 
-    def start_payment_session(self, required_amount=None, on_payment_update=None):
+    def start_payment_session(self, required_amount=None, on_payment_update=None, items=None):
         """Start a new payment session.
         
         Args:
-            required_amount (float, optional): Target amount to collect
-            on_payment_update (callable, optional): Callback(amount) when coins received
+            required_amount (Money, optional): Target amount to collect
+            on_payment_update (callable, optional): Callback(amount) when money is received
+            items (list, optional): Cart lines ({name, quantity, price}) for the journal
         """
         self._callback = on_payment_update
-        self.coin_acceptor.reset_amount()
+        self._received = ZERO
+        self.received_by_kind = {}
+        self.change_owed = ZERO
+        self._ewallet_credits = []
+
+        def begin(epoch):
+            with self._journal_lock:
+                self._session_epoch = epoch
+                self._journaled = ZERO
+            if self.journal:
+                self.journal.start(Money.of(required_amount or 0), items or [])
+
+        # Credits from before the session (e.g. a coin dropped in while idle) are not counted
+        self.devices.reset(begin)
+        self.devices.enable()
         return True
 
+    def start_ewallet_payment(self, amount):
+        """Requests `amount` from the customer's e-wallet in the current session.
+
+        The request is created and polled on a background thread; the
+        confirmed amount arrives on the device bus like any other credit.
+        A previous e-wallet request in this session is cancelled.
+
+        Args:
+            amount (Money): Amount to request (normally the remaining balance)
+
+        Returns:
+            The EWalletSession (read its status/qr_payload), or None if
+            e-wallet payments are not configured
+        """
+        if self.ewallet_provider is None:
+            return None
+        self.cancel_ewallet_payment()
+        self.ewallet_session = EWalletSession(
+            self.ewallet_provider,
+            self.ewallet_device,
+            amount,
+            timeout_seconds=self.ewallet_options.get("timeout_seconds", 120),
+            poll_interval=self.ewallet_options.get("poll_interval", 1.0),
+            on_late_payment=self._ewallet_paid_late,
+        ).start(self.bridge)
+        return self.ewallet_session
+
+    def cancel_ewallet_payment(self):
+        """Stops waiting for the active e-wallet request, if any."""
+        if self.ewallet_session is not None:
+            self.ewallet_session.cancel()
+            self.ewallet_session = None
+
+    def _journal_credit(self, event):
+        """DeviceBus hook: journals a credit on the device's thread as it arrives."""
+        with self._journal_lock:
+            if event.epoch != self._session_epoch:
+                return  # From before the session; the bus drops it too
+            self._journaled += event.amount
+            total = self._journaled
+        # Totals are assigned in order; recovery takes the highest, so the
+        # lines may land on disk in any order
+        if self.journal:
+            self.journal.coin(event.amount, total, source=event.source)
+
     def get_current_amount(self):
-        """Get the total amount received in the current session."""
-        with self._lock:
-            return self.coin_acceptor.get_received_amount()
+        """Get the total amount received in the current session.
+
+        Drains the device bus, so this is the session's only consumer of
+        credit events. Credits were already journaled when they arrived.
+        """
+        events = self.devices.drain()
+        for event in events:
+            self._received += event.amount
+            self.received_by_kind[event.kind] = self.received_by_kind.get(event.kind, ZERO) + event.amount
+            if event.kind == KIND_EWALLET:
+                self._ewallet_credits.append((event.reference, event.amount))
+        if events and self._callback:
+            self._callback(self._received)
+        return self._received
+
+    def cancel_payment_session(self):
+        """Ends the current session without a purchase; no change is paid out.
+
+        Returns:
+            Money: Total received (e-wallet credits are refunded by the provider)
+        """
+        total_received, _ = self._close_session(None)
+        return total_received
+
+    async def stop_payment_session_async(self, required_amount=None, change_callback=None):
+        """Stop the current payment session and pay out change if needed.
+
+        A coroutine for the asyncio bridge: the hopper payout is awaited, so
+        the UI keeps running while coins are dispensed.
 
-    def stop_payment_session(self, required_amount=None):
-        """Stop the current payment session and handle change if needed.
-        
         Args:
-            required_amount (float, optional): If provided, calculate and dispense change
-            
+            required_amount (Money, optional): If provided, calculate and dispense change
+            change_callback (callable, optional): Callback(message) with payout progress
+
         Returns:
             Tuple of (total_received, change_amount, change_status)
         """
-        total_received = self.coin_acceptor.get_received_amount()
-        change_amount = 0
-        change_status = ""
-        
-        # Calculate change if needed
+        total_received, change_needed = self._close_session(required_amount)
+        outcome = None
+        if change_needed and self.coin_hopper:
+            outcome = await self.coin_hopper.dispense_change_async(
+                change_needed,
+                callback=change_callback or self._change_callback
+            )
+        return (total_received,) + self._change_result(change_needed, outcome)
+
+    def _close_session(self, required_amount):
+        """Stops taking money and journals the end of the session.
+
+        Returns:
+            Tuple of (total_received, change_needed)
+        """
+        self.cancel_ewallet_payment()
+        self.devices.disable()
+        total_received = self.get_current_amount()
+        change_needed = ZERO
         if required_amount is not None and total_received > required_amount:
             change_needed = total_received - required_amount
-            if self.coin_hopper:
-                success, dispensed, message = self.coin_hopper.dispense_change(
-                    change_needed,
-                    callback=self._change_callback
-                )
-                if success:
-                    change_amount = dispensed
-                    change_status = f"Change dispensed: ₱{dispensed}"
+            # Journaled before paying out: a crash mid-payout never pays twice
+            if self.coin_hopper and self.journal:
+                self.journal.change(change_needed)
+        if required_amount is None:
+            # No purchase: the session ends as a cancel, and e-wallet money goes back the way it came
+            if self.journal:
+                self.journal.cancel(total_received)
+            if self._ewallet_credits:
+                self._refund_ewallet(self._ewallet_credits)
+            self._ewallet_credits = []
+        self._received = ZERO
+        self._callback = None
+        return total_received, change_needed
+
+    def _change_result(self, change_needed, outcome):
+        """Turns a hopper (success, dispensed, message) outcome into (change_amount, change_status)."""
+        if not change_needed:
+            return ZERO, ""
+        if outcome is None:
+            self.change_owed = change_needed
+            return ZERO, f"Change dispenser not available; ₱{change_needed:.2f} is owed to the customer"
+        success, dispensed, message = outcome
+        # The hoppers pay whole pesos only; whatever they didn't pay is still owed
+        self.change_owed = change_needed - dispensed
+        # A failed payout still reports what the hopper paid before it stopped
+        status = f"Change dispensed: ₱{dispensed}" if success else f"Error: {message}"
+        if self.change_owed > 0:
+            status += f"\n₱{self.change_owed:.2f} is owed to the customer"
+        return dispensed, status
+
+    def _ewallet_paid_late(self, session):
+        """EWalletSession hook: the customer paid after the session ended."""
+        self._refund_ewallet([(session.reference, session.amount)], late=True)
+
+    def _refund_ewallet(self, credits, late=False, notify=True):
+        """Refunds e-wallet credits through the provider, in the background.
+
+        Each refund is journaled as owed before it is tried and settled once
+        the provider accepts it, so a failed refund or a crash leaves a record
+        (retried at the next start). The customer is told about late payments
+        and failed refunds through on_ewallet_refund.
+
+        Args:
+            credits (list): (reference, amount) pairs
+            late (bool): The payments arrived after their session ended
+            notify (bool): Tell the customer (off for retries at startup)
+        """
+        if self.journal:
+            for reference, amount in credits:
+                self.journal.owed(amount, reference, source=KIND_EWALLET)
+
+        async def refund_all():
+            for reference, amount in credits:
+                try:
+                    await run_blocking(self.ewallet_provider.refund, reference, amount)
+                except Exception as e:
+                    print(f"E-wallet refund of {reference} failed: {e}")
+                    message = (f"Your e-wallet payment of ₱{amount:.2f} could not be refunded "
+                               f"automatically. Please contact staff with reference {reference}.")
+                    owed = amount
                 else:
-                    change_status = f"Error: {message}"
+                    if self.journal:
+                        self.journal.settled(reference)
+                    if not late:
+                        continue  # The cancel dialog already said it is being refunded
+                    message = f"₱{amount:.2f} has been refunded to your e-wallet ({reference})."
+                    owed = ZERO
+                if late:
+                    message = "An e-wallet payment arrived after the payment had ended.\n" + message
+                if notify and self.on_ewallet_refund is not None and self.bridge is not None:
+                    self.bridge.call_in_tk(self.on_ewallet_refund, message, owed)
+
+        if self.bridge is not None:
+            self.bridge.submit(refund_all())
+        else:
+            threading.Thread(target=asyncio.run, args=(refund_all(),), daemon=True).start()
+
+    def mark_vend_done(self):
+        """Closes the journaled session once the sale has been recorded."""
+        if self.journal:
+            self.journal.vend_done()
+
+    async def recover_interrupted_session_async(self):
+        """Settles a session left open by a crash or power cut.
+
+        A fully paid session is reported back to be completed (its change is
+        paid out here); anything less is refunded through the hoppers. A
+        coroutine for the asyncio bridge, like stop_payment_session_async.
+
+        Returns:
+            Tuple of (session, action, message) with action 'complete' or
+            'refund', or None if there was nothing to recover
+        """
+        if not self.journal:
+            return None
+        if self.ewallet_provider is not None:
+            # E-wallet refunds that failed (or were cut off) before the restart
+            owed = [(record.get("reference"), Money.of(record.get("amount", 0)))
+                    for record in self.journal.owed_payments() if record.get("source") == KIND_EWALLET]
+            if owed:
+                self._refund_ewallet(owed, notify=False)
+        session = self.journal.recover()
+        if session is None:
+            return None
+        print(f"Recovering interrupted payment session: {session}")
+
+        if session.fully_paid:
+            action = "complete"
+            owed = session.received - session.required - session.change_paid
+        else:
+            action = "refund"
+            owed = session.received - session.change_paid
+
+        message = ""
+        if owed > 0:
+            self.journal.change(owed, session.session_id)
+            if self.coin_hopper:
+                success, dispensed, error = await self.coin_hopper.dispense_change_async(owed)
+                if not success:
+                    message = f"Could not pay out ₱{owed - dispensed:.2f}: {error}"
+                elif dispensed < owed:
+                    message = f"₱{owed - dispensed:.2f} is owed to the customer (hoppers pay whole pesos only)"
             else:
-                change_status = "Change dispenser not available"
-        
-        self.coin_acceptor.reset_amount()
-        self._callback = None
-        self._change_callback = None
-        return total_received, change_amount, change_status
+                message = f"₱{owed:.2f} is owed to the customer (no change dispenser)"
+
+        if action == "complete":
+            self.journal.vend_done(session.session_id)
+        else:
+            self.journal.cancel(session.received, session.session_id)
+        return session, action, message
 
     def cleanup(self):
         """Clean up GPIO resources."""
-        try:
-            self.coin_acceptor.cleanup()
-        except Exception:
-            pass
+        self.cancel_ewallet_payment()
+        if self.journal:
+            self.journal.close()
+        self.devices.cleanup()
             
         if self.coin_hopper:
             try:
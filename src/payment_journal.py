@@ -0,0 +1,203 @@
+"""Write-ahead journal of payment sessions.
+
+Every step of a payment (session start, coin credited, change paid out,
+vend done, cancel) is appended as one JSON line and fsync'ed before the
+app acts on it. After a crash or power cut, `recover()` replays the
+journal to find a session that was still open and how much money it
+holds, so it can be completed or refunded at the next start.
+
+The journal only needs the current session: it is truncated whenever a
+new session starts with no session open, so replay reads a few lines.
+Money owed to a customer outside any session (an e-wallet payment that
+must be refunded) is kept across truncation until it is settled.
+"""
+import json
+import os
+import time
+import uuid
+from threading import Lock
+from money import Money, ZERO, json_default
+
+START = "start"
+COIN = "coin"
+CHANGE = "change"
+VEND_DONE = "vend_done"
+CANCEL = "cancel"
+OWED = "owed"
+SETTLED = "settled"
+
+
+class OpenSession:
+    """State of a session rebuilt from the journal."""
+
+    def __init__(self, session_id, required, items, started_at):
+        self.session_id = session_id
+        self.required = required  # Money
+        self.items = items  # [{"name", "quantity", "price"}]
+        self.started_at = started_at
+        self.received = ZERO
+        self.change_paid = ZERO
+
+    @property
+    def fully_paid(self):
+        return self.received >= self.required
+
+    def __repr__(self):
+        return (f"OpenSession({self.session_id}, required={self.required}, "
+                f"received={self.received}, change_paid={self.change_paid})")
+
+
+class PaymentJournal:
+    """Append-only, fsync'ed JSON-lines journal. Safe to call from the GPIO thread."""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = Lock()
+        self._session_id = None
+        self._file = None
+
+    def _append(self, record):
+        record["t"] = round(time.time(), 3)
+        line = json.dumps(record, separators=(",", ":"), default=json_default) + "\n"
+        with self._lock:
+            if self._file is None:
+                self._file = open(self.path, "a+", encoding="utf-8")
+                # Terminate a line torn by a power cut so it can't swallow this one
+                if self._file.tell() > 0:
+                    self._file.seek(self._file.tell() - 1)
+                    if self._file.read(1) != "\n":
+                        line = "\n" + line
+            self._file.write(line)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def start(self, required, items):
+        """Opens a session. Returns its id."""
+        if self._session_id is None:
+            self.compact()
+        self._session_id = uuid.uuid4().hex[:12]
+        self._append({"event": START, "session": self._session_id,
+                      "required": required, "items": items})
+        return self._session_id
+
+    def coin(self, value, total, source=None):
+        """Records a credit (coin, bill or e-wallet) and the new session total."""
+        if self._session_id is not None:
+            self._append({"event": COIN, "session": self._session_id,
+                          "value": value, "total": total, "source": source})
+
+    def change(self, amount, session_id=None):
+        """Records change about to be paid out (written before the hopper runs)."""
+        session_id = session_id or self._session_id
+        if session_id is not None:
+            self._append({"event": CHANGE, "session": session_id, "amount": amount})
+
+    def vend_done(self, session_id=None):
+        self._close(VEND_DONE, session_id)
+
+    def cancel(self, refunded, session_id=None):
+        self._close(CANCEL, session_id, refunded=refunded)
+
+    def _close(self, event, session_id, **fields):
+        session_id = session_id or self._session_id
+        if session_id is None:
+            return
+        self._append(dict({"event": event, "session": session_id}, **fields))
+        if session_id == self._session_id:
+            self._session_id = None
+
+    def owed(self, amount, reference, source=None):
+        """Records money owed to a customer (written before the refund is tried)."""
+        self._append({"event": OWED, "reference": reference, "amount": amount, "source": source})
+
+    def settled(self, reference):
+        """Records that the money owed under `reference` was returned."""
+        self._append({"event": SETTLED, "reference": reference})
+
+    def owed_payments(self):
+        """Owed records not yet settled, oldest first."""
+        with self._lock:
+            return self._read_owed()
+
+    def _read_owed(self):
+        owed = {}  # reference -> record
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue
+                    if record.get("event") == OWED:
+                        owed[record.get("reference")] = record
+                    elif record.get("event") == SETTLED:
+                        owed.pop(record.get("reference"), None)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"Error reading payment journal: {e}")
+        return list(owed.values())
+
+    def recover(self):
+        """Replays the journal. Returns the OpenSession left open, or None."""
+        sessions = {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue  # Line torn by a power cut
+                    event = record.get("event")
+                    session_id = record.get("session")
+                    if event == START:
+                        sessions[session_id] = OpenSession(
+                            session_id, Money.of(record.get("required", 0)),
+                            record.get("items", []), record.get("t"))
+                    elif session_id not in sessions:
+                        continue
+                    elif event == COIN:
+                        # Totals are cumulative, so a lost line can't undercount
+                        session = sessions[session_id]
+                        session.received = max(session.received, Money.of(record.get("total", 0)))
+                    elif event == CHANGE:
+                        sessions[session_id].change_paid += Money.of(record.get("amount", 0))
+                    elif event in (VEND_DONE, CANCEL):
+                        del sessions[session_id]
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"Error reading payment journal: {e}")
+            return None
+        if not sessions:
+            return None
+        # Only one session is ever open at a time; take the latest
+        return list(sessions.values())[-1]
+
+    def compact(self):
+        """Drops closed sessions from the journal (only call with no session open).
+
+        Unsettled owed records are written back.
+        """
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            try:
+                owed = self._read_owed()
+                tmp_path = self.path + ".tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    for record in owed:
+                        f.write(json.dumps(record, separators=(",", ":")) + "\n")
+                    f.flush()
+                    os.fsync(f.fileno())
+                # Replaced in one step, so a power cut can't lose what is owed
+                os.replace(tmp_path, self.path)
+            except Exception as e:
+                print(f"Error compacting payment journal: {e}")
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
@@ -0,0 +1,205 @@
+"""Cart stock reservations with TTL expiry.
+
+Putting an item in a cart takes it out of the available quantity right
+away (so the kiosk never oversells), but the stock is only *reserved*: if
+the cart is abandoned, its reservations expire and the stock goes back.
+Deadlines live on a hashed timer wheel driven by a single Tk `after`
+timer, so scheduling, refreshing and expiring a cart are O(1) and every
+cart that expires in the same tick is released in one batch.
+"""
+import math
+import time
+
+KIOSK_CART = "kiosk"  # reservation id of the single on-screen cart
+
+
+class TimerWheel:
+    """Hashed timer wheel: keys are bucketed by the tick their deadline falls in."""
+
+    def __init__(self, tick_seconds=1.0, slots=64, clock=time.monotonic):
+        self.tick_seconds = tick_seconds
+        self.clock = clock
+        self._slots = [dict() for _ in range(slots)]  # key -> deadline
+        self._where = {}  # key -> slot index
+        self._tick = self._tick_of(clock())  # last tick processed
+
+    def __len__(self):
+        return len(self._where)
+
+    def __contains__(self, key):
+        return key in self._where
+
+    def _tick_of(self, t):
+        return int(math.floor(t / self.tick_seconds))
+
+    def schedule(self, key, deadline):
+        """(Re)schedules `key` to expire at `deadline` (clock seconds)."""
+        self.cancel(key)
+        slot = max(self._tick_of(deadline), self._tick + 1) % len(self._slots)
+        self._slots[slot][key] = deadline
+        self._where[key] = slot
+
+    def cancel(self, key):
+        slot = self._where.pop(key, None)
+        if slot is not None:
+            del self._slots[slot][key]
+
+    def advance(self, now=None):
+        """Returns every key whose deadline has passed, removing them from the wheel."""
+        now = self.clock() if now is None else now
+        target = self._tick_of(now)
+        # A long gap only needs one trip round the wheel
+        ticks = min(target - self._tick, len(self._slots))
+        expired = []
+        for tick in range(target - ticks + 1, target + 1):
+            slot = self._slots[tick % len(self._slots)]
+            # Entries more than one revolution away stay for a later round
+            due = [key for key, deadline in slot.items() if deadline <= now]
+            for key in due:
+                del slot[key]
+                del self._where[key]
+            expired.extend(due)
+        self._tick = max(self._tick, target)
+        return expired
+
+
+class ReservationManager:
+    """Holds stock per cart until the cart is committed, released or expires."""
+
+    def __init__(self, tk_widget, lookup, on_stock_changed, on_expired,
+                 ttl_seconds=300, tick_seconds=1.0):
+        """Initialize the manager.
+
+        Args:
+            tk_widget: Any Tk widget, used to run the expiry timer
+            lookup (callable): lookup(name) -> current item dict or None
+            on_stock_changed (callable): on_stock_changed(item) after a quantity change
+            on_expired (callable): on_expired(cart_id, {name: quantity}) after an expiry
+            ttl_seconds (float): How long an untouched cart keeps its stock
+            tick_seconds (float): Expiry timer resolution
+        """
+        self.tk_widget = tk_widget
+        self.lookup = lookup
+        self.on_stock_changed = on_stock_changed
+        self.on_expired = on_expired
+        self.ttl_seconds = ttl_seconds
+        self.wheel = TimerWheel(tick_seconds)
+        self._carts = {}  # cart id -> {item name: reserved quantity}
+        self._reserved = {}  # item name -> quantity reserved across all carts
+        self._timer = None
+
+    def reserved(self, name):
+        """Quantity of `name` currently held by carts."""
+        return self._reserved.get(name, 0)
+
+    def cart(self, cart_id):
+        """The {item name: quantity} reservations of a cart."""
+        return dict(self._carts.get(cart_id, {}))
+
+    def reserve(self, cart_id, name, quantity):
+        """Takes `quantity` of an item out of available stock. Returns False if short."""
+        item = self.lookup(name)
+        if item is None or quantity <= 0 or item.get("quantity", 0) < quantity:
+            return False
+        item["quantity"] -= quantity
+        lines = self._carts.setdefault(cart_id, {})
+        lines[name] = lines.get(name, 0) + quantity
+        self._reserved[name] = self._reserved.get(name, 0) + quantity
+        self.touch(cart_id)
+        self.on_stock_changed(item)
+        return True
+
+    def release(self, cart_id, name, quantity=None):
+        """Returns reserved stock of one item (all of it by default). Returns the amount."""
+        lines = self._carts.get(cart_id)
+        if not lines or name not in lines:
+            return 0
+        held = lines[name]
+        quantity = held if quantity is None else min(quantity, held)
+        if quantity == held:
+            del lines[name]
+        else:
+            lines[name] = held - quantity
+        self._unreserve(name, quantity)
+        item = self.lookup(name)
+        if item is not None:
+            item["quantity"] += quantity
+            self.on_stock_changed(item)
+        if lines:
+            self.touch(cart_id)
+        else:
+            self._forget(cart_id)
+        return quantity
+
+    def release_cart(self, cart_id):
+        """Returns all stock held by a cart. Returns {name: quantity} released."""
+        lines = self._carts.get(cart_id)
+        if not lines:
+            self._forget(cart_id)
+            return {}
+        self._forget(cart_id)
+        for name, quantity in lines.items():
+            self._unreserve(name, quantity)
+            item = self.lookup(name)
+            if item is not None:
+                item["quantity"] += quantity
+                self.on_stock_changed(item)
+        return lines
+
+    def commit(self, cart_id):
+        """Turns a cart's reservations into a sale; the stock stays taken.
+
+        O(items in cart). Returns {name: quantity} committed.
+        """
+        lines = self._carts.get(cart_id, {})
+        self._forget(cart_id)
+        for name, quantity in lines.items():
+            self._unreserve(name, quantity)
+        return lines
+
+    def rename(self, old_name, new_name):
+        """Moves the reservations of a renamed item to its new name."""
+        if old_name == new_name or old_name not in self._reserved:
+            return
+        self._reserved[new_name] = self._reserved.pop(old_name)
+        for lines in self._carts.values():
+            if old_name in lines:
+                lines[new_name] = lines.pop(old_name)
+
+    def touch(self, cart_id):
+        """Restarts a cart's TTL, e.g. on any cart activity."""
+        if cart_id not in self._carts:
+            return
+        self.wheel.schedule(cart_id, self.wheel.clock() + self.ttl_seconds)
+        self._ensure_timer()
+
+    def hold(self, cart_id):
+        """Suspends expiry (e.g. while the customer is paying) until the next touch."""
+        self.wheel.cancel(cart_id)
+
+    def _unreserve(self, name, quantity):
+        remaining = self._reserved.get(name, 0) - quantity
+        if remaining > 0:
+            self._reserved[name] = remaining
+        else:
+            self._reserved.pop(name, None)
+
+    def _forget(self, cart_id):
+        self._carts.pop(cart_id, None)
+        self.wheel.cancel(cart_id)
+
+    def _ensure_timer(self):
+        if self._timer is None and len(self.wheel):
+            delay_ms = max(1, int(self.wheel.tick_seconds * 1000))
+            self._timer = self.tk_widget.after(delay_ms, self._on_tick)
+
+    def _on_tick(self):
+        self._timer = None
+        for cart_id in self.wheel.advance():
+            released = self.release_cart(cart_id)
+            if released:
+                try:
+                    self.on_expired(cart_id, released)
+                except Exception as e:
+                    print(f"Error handling expired cart {cart_id}: {e}")
+        self._ensure_timer()
@@ -4,7 +4,8 @@ This mock provides a minimal subset of the API used by the project so
 the UI can run on Windows or desktop Linux without hardware.
 
 It also exposes simulate_pulse(pin) to manually trigger registered
-callbacks (useful for testing).
+callbacks, and set_input(pin, level) to drive an input level and fire
+the matching edge callbacks (useful for testing, e.g. hopper sensors).
 """
 import time
 from threading import Thread
@@ -12,10 +13,17 @@ from threading import Thread
 # Basic constants
 BCM = 'BCM'
 IN = 'IN'
+OUT = 'OUT'
 PUD_UP = 'PUD_UP'
 FALLING = 'FALLING'
+RISING = 'RISING'
+BOTH = 'BOTH'
+LOW = 0
+HIGH = 1
 
 _callbacks = {}
+_edges = {}
+_levels = {}  # pin -> last level written or simulated
 
 def setmode(mode):
     # no-op for mock
@@ -25,18 +33,47 @@ def setup(pin, mode, pull_up_down=None):
     # no-op for mock
     return
 
+def output(pin, value):
+    _levels[pin] = HIGH if value else LOW
+
+def input(pin):
+    # Inputs idle high (pull-up) until simulated otherwise
+    return _levels.get(pin, HIGH)
+
 def add_event_detect(pin, edge, callback=None, bouncetime=0):
     # Store callback for the pin
     _callbacks[pin] = callback
+    _edges[pin] = edge
 
 def remove_event_detect(pin):
     _callbacks.pop(pin, None)
+    _edges.pop(pin, None)
 
 def cleanup(pin=None):
     if pin is None:
         _callbacks.clear()
+        _edges.clear()
+        _levels.clear()
     else:
         _callbacks.pop(pin, None)
+        _edges.pop(pin, None)
+        _levels.pop(pin, None)
+
+def set_input(pin, level):
+    """Drive an input pin to `level`, calling its callback on a matching edge.
+
+    The callback runs on the calling thread, so tests stay deterministic.
+    """
+    previous = input(pin)
+    _levels[pin] = HIGH if level else LOW
+    if _levels[pin] == previous:
+        return
+    edge = _edges.get(pin)
+    rising = _levels[pin] == HIGH
+    if edge == BOTH or (edge == RISING and rising) or (edge == FALLING and not rising):
+        cb = _callbacks.get(pin)
+        if cb:
+            cb(pin)
 
 def simulate_pulse(pin, delay=0):
     """Simulate a pulse on the given pin after optional delay (seconds).
@@ -0,0 +1,376 @@
+"""Store-and-forward upload of sales records.
+
+Every completed sale is appended (and fsync'ed) to a spool on disk
+before the payment session is closed, so it survives a dropped uplink, a
+restart or a crash. Records are grouped into chunks of about
+`chunk_records` sales (or whatever arrived within
+`chunk_age_seconds`), and each chunk is sealed as a gzip file with a
+sequence number. The uploader sends sealed chunks oldest first, one
+request per chunk instead of one per sale.
+
+Acknowledgements are cumulative ("everything up to chunk N arrived").
+On start the uploader asks the server how far it got, so a reply lost
+before a restart never makes it send a chunk twice. The server may ask
+the uploader to back off (HTTP 429/503 with Retry-After). The spool is
+bounded by `max_bytes`: when the link has been down long enough to fill
+it, the oldest chunks are dropped, and the number of dropped sales is
+reported with the next upload.
+
+Configured with the "sales_upload" config key, e.g.
+    "sales_upload": {"url": "http://127.0.0.1:8766", "machine_id": "raon-01"}
+fleet_server.py stands in for the server.
+"""
+import asyncio
+import gzip
+import json
+import os
+import re
+import socket
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+import uuid
+from async_bridge import run_blocking
+from fix_paths import get_absolute_path
+from money import json_default
+
+_CHUNK_RE = re.compile(r"^chunk-(\d+)-(\d+)\.jsonl\.gz$")
+
+
+class SalesSpool:
+    """On-disk spool: an open chunk being filled and sealed chunks waiting to upload.
+
+    Not thread-safe; the uploader serializes access with a lock.
+    """
+
+    def __init__(self, directory, max_bytes=5 * 1024 * 1024, chunk_records=50):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.chunk_records = chunk_records
+        os.makedirs(directory, exist_ok=True)
+        self._current_path = os.path.join(directory, "current.jsonl")
+        self._state_path = os.path.join(directory, "state.json")
+        self.next_seq = 1
+        self.acked = 0
+        self.dropped = 0  # sales dropped to stay under max_bytes, not yet reported
+        self._load_state()
+        self._current_count, self._current_started = self._scan_current()
+
+    def _load_state(self):
+        try:
+            with open(self._state_path, "r") as file:
+                state = json.load(file)
+            self.next_seq = state.get("next_seq", 1)
+            self.acked = state.get("acked", 0)
+            self.dropped = state.get("dropped", 0)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"Error reading sales spool state: {e}")
+        # Never reuse a sequence number that is still on disk
+        for seq, _, _ in self.chunks():
+            self.next_seq = max(self.next_seq, seq + 1)
+
+    def _save_state(self):
+        tmp_path = self._state_path + ".tmp"
+        with open(tmp_path, "w") as file:
+            json.dump({"next_seq": self.next_seq, "acked": self.acked, "dropped": self.dropped}, file)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp_path, self._state_path)
+
+    def _scan_current(self):
+        try:
+            with open(self._current_path, "r", encoding="utf-8") as file:
+                count = sum(1 for line in file if line.strip())
+            return count, os.path.getmtime(self._current_path)
+        except FileNotFoundError:
+            return 0, None
+
+    def append(self, record):
+        """Adds a sale to the open chunk (fsync'ed). Returns True once the chunk is full."""
+        line = (json.dumps(record, separators=(",", ":"), default=json_default) + "\n").encode("utf-8")
+        with open(self._current_path, "a+b") as file:
+            # Terminate a line torn by a power cut so it can't swallow this one
+            if file.tell() > 0:
+                file.seek(-1, os.SEEK_END)
+                if file.read(1) != b"\n":
+                    line = b"\n" + line
+            file.write(line)
+            file.flush()
+            os.fsync(file.fileno())
+        self._current_count += 1
+        if self._current_started is None:
+            self._current_started = time.time()
+        return self.full()
+
+    def full(self):
+        return self._current_count >= self.chunk_records
+
+    def current_age(self):
+        """Seconds since the first sale in the open chunk, or None if it is empty."""
+        if not self._current_count:
+            return None
+        return time.time() - (self._current_started or time.time())
+
+    def seal(self):
+        """Compresses the open chunk into the next numbered chunk file."""
+        if not self._current_count:
+            return None
+        with open(self._current_path, "rb") as file:
+            data = file.read()
+        # Drop a line torn by a power cut rather than uploading broken JSON
+        lines = [line for line in data.splitlines() if _is_json(line)]
+        seq = self.next_seq
+        if lines:
+            path = os.path.join(self.directory, f"chunk-{seq:08d}-{len(lines)}.jsonl.gz")
+            tmp_path = path + ".tmp"
+            with open(tmp_path, "wb") as file:
+                file.write(gzip.compress(b"\n".join(lines) + b"\n"))
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(tmp_path, path)
+            self.next_seq += 1
+            self._save_state()
+        os.remove(self._current_path)
+        self._current_count, self._current_started = 0, None
+        self.enforce_limit()
+        return seq
+
+    def chunks(self):
+        """Sealed chunks as (seq, record_count, path), oldest first."""
+        found = []
+        for name in os.listdir(self.directory):
+            match = _CHUNK_RE.match(name)
+            if match:
+                found.append((int(match.group(1)), int(match.group(2)), os.path.join(self.directory, name)))
+        return sorted(found)
+
+    def size(self):
+        return sum(os.path.getsize(path) for _, _, path in self.chunks())
+
+    def enforce_limit(self):
+        """Drops the oldest chunks until the spool fits in max_bytes."""
+        chunks = self.chunks()
+        total = sum(os.path.getsize(path) for _, _, path in chunks)
+        dropped = 0
+        while chunks and total > self.max_bytes:
+            seq, count, path = chunks.pop(0)
+            total -= os.path.getsize(path)
+            os.remove(path)
+            dropped += count
+            print(f"Sales spool full; dropped chunk {seq} ({count} sales)")
+        if dropped:
+            self.dropped += dropped
+            self._save_state()
+
+    def ack(self, seq):
+        """Deletes every chunk up to and including `seq` (cumulative acknowledgement)."""
+        for chunk_seq, _, path in self.chunks():
+            if chunk_seq <= seq:
+                os.remove(path)
+        if seq > self.acked:
+            self.acked = seq
+            # The server is ahead (e.g. the spool was wiped): don't reuse numbers it has
+            self.next_seq = max(self.next_seq, seq + 1)
+            self._save_state()
+
+    def dropped_reported(self, count):
+        self.dropped = max(0, self.dropped - count)
+        self._save_state()
+
+
+def _is_json(line):
+    try:
+        json.loads(line)
+        return True
+    except ValueError:
+        return False
+
+
+class RetryLater(Exception):
+    """The server asked the uploader to back off."""
+
+    def __init__(self, seconds):
+        super().__init__(f"server busy, retry in {seconds}s")
+        self.seconds = seconds
+
+
+class SalesClient:
+    """HTTP client for the sales endpoints (see fleet_server.py for the API)."""
+
+    def __init__(self, url, machine_id, request_timeout=15.0):
+        self.url = url.rstrip("/")
+        self.machine = urllib.parse.quote(machine_id, safe="")
+        self.request_timeout = request_timeout
+
+    def _call(self, method, path, data=None, headers=None):
+        request = urllib.request.Request(self.url + path, data=data, method=method, headers=headers or {})
+        try:
+            with urllib.request.urlopen(request, timeout=self.request_timeout) as response:
+                return json.loads(response.read().decode("utf-8") or "{}")
+        except urllib.error.HTTPError as e:
+            if e.code in (429, 503):
+                raise RetryLater(float(e.headers.get("Retry-After") or 30))
+            raise
+
+    def acked(self):
+        """Highest chunk the server has stored."""
+        return self._call("GET", f"/sales/{self.machine}/ack").get("acked", 0)
+
+    def upload(self, seq, data, dropped=0):
+        """Sends one gzip chunk. Returns the server's cumulative acknowledgement."""
+        reply = self._call("POST", f"/sales/{self.machine}/chunks/{seq}", data, {
+            "Content-Type": "application/x-ndjson",
+            "Content-Encoding": "gzip",
+            "X-Dropped-Records": str(dropped),
+        })
+        return reply.get("acked", 0)
+
+
+class SalesUploader:
+    """Spools sales records and forwards them in chunks from the asyncio bridge."""
+
+    def __init__(self, bridge, client, spool, interval_seconds=30, chunk_age_seconds=60,
+                 retry_max_seconds=600):
+        """Initialize the uploader (call start() to begin uploading).
+
+        Args:
+            bridge (AsyncBridge): Event loop sealing and uploads run on
+            client (SalesClient): Connection to the sales server
+            spool (SalesSpool): On-disk store of records not yet acknowledged
+            interval_seconds (float): How often to look for chunks to send
+            chunk_age_seconds (float): Seal a partly filled chunk after this long
+            retry_max_seconds (float): Longest backoff after failed uploads
+        """
+        self.bridge = bridge
+        self.client = client
+        self.spool = spool
+        self.interval_seconds = interval_seconds
+        self.chunk_age_seconds = chunk_age_seconds
+        self.retry_max_seconds = retry_max_seconds
+        # Guards the spool: sales are appended on the Tk thread, chunks sealed
+        # and acknowledged in the executor
+        self._lock = threading.Lock()
+        self._wake = None
+        self._stopped = False
+
+    def start(self):
+        self.bridge.submit(self._run())
+        return self
+
+    def stop(self):
+        self.bridge.call_soon(self._stop)
+
+    def record(self, sale):
+        """Spools a completed sale before returning (one fsync'ed line).
+
+        Called before the payment journal closes the session, so a crash
+        never loses a sale that neither the spool nor recovery knows about.
+        Sealing and uploading happen on the loop.
+        """
+        sale = dict(sale)
+        sale.setdefault("id", uuid.uuid4().hex)
+        sale.setdefault("t", round(time.time(), 3))
+        try:
+            full = self._spooled(self.spool.append, sale)
+        except Exception as e:
+            print(f"Error spooling sale {sale.get('id')}: {e}")
+            return
+        if full:
+            self.bridge.call_soon(self._poke)
+
+    def _spooled(self, func, *args):
+        """Runs a spool method under the spool lock (any thread)."""
+        with self._lock:
+            return func(*args)
+
+    # --- Loop thread ---
+
+    def _stop(self):
+        self._stopped = True
+        self._poke()
+
+    def _poke(self):
+        if self._wake is not None:
+            self._wake.set()
+
+    async def _run(self):
+        self._wake = asyncio.Event()
+        resumed = False
+        failures = 0
+        while not self._stopped:
+            delay = self.interval_seconds
+            try:
+                if not resumed:
+                    # Pick up where the server is, in case its last reply was lost
+                    acked = await run_blocking(self.client.acked)
+                    await run_blocking(self._spooled, self.spool.ack, acked)
+                    resumed = True
+                await self._seal_if_old()
+                await self._upload_all()
+                failures = 0
+            except RetryLater as e:
+                delay = min(self.retry_max_seconds, e.seconds)
+                print(f"Sales upload deferred by the server for {delay}s")
+            except Exception as e:
+                failures += 1
+                delay = min(self.retry_max_seconds, 5 * 2 ** (failures - 1))
+                print(f"Sales upload failed ({e}); retrying in {delay}s")
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+        # Seal what is open so nothing waits on a partly filled chunk after restart
+        await run_blocking(self._spooled, self.spool.seal)
+
+    async def _seal_if_old(self):
+        age = self.spool.current_age()
+        if self.spool.full() or (age is not None and age >= self.chunk_age_seconds):
+            await run_blocking(self._spooled, self.spool.seal)
+
+    async def _upload_all(self):
+        while not self._stopped:
+            chunks = self.spool.chunks()
+            if not chunks:
+                return
+            seq, _, path = chunks[0]
+            data = await run_blocking(self._spooled, _read_bytes, path)
+            dropped = self.spool.dropped
+            acked = await run_blocking(self.client.upload, seq, data, dropped)
+            if acked < seq:
+                raise RuntimeError(f"chunk {seq} not acknowledged (server at {acked})")
+            await run_blocking(self._spooled, self._acked, acked, dropped)
+
+    def _acked(self, acked, dropped):
+        self.spool.ack(acked)
+        if dropped:
+            self.spool.dropped_reported(dropped)
+
+
+def _read_bytes(path):
+    with open(path, "rb") as file:
+        return file.read()
+
+
+def build_sales_uploader(app):
+    """Starts the uploader configured in app.config["sales_upload"], or returns None."""
+    options = app.config.get("sales_upload")
+    if not options or not options.get("url"):
+        return None
+    machine_id = options.get("machine_id") or socket.gethostname()
+    spool = SalesSpool(
+        get_absolute_path(options.get("spool_dir", "sales_spool")),
+        max_bytes=options.get("max_spool_bytes", 5 * 1024 * 1024),
+        chunk_records=options.get("chunk_records", 50),
+    )
+    return SalesUploader(
+        app.async_bridge,
+        SalesClient(options["url"], machine_id, request_timeout=options.get("request_timeout", 15.0)),
+        spool,
+        interval_seconds=options.get("interval_seconds", 30),
+        chunk_age_seconds=options.get("chunk_age_seconds", 60),
+    ).start()
@@ -0,0 +1,290 @@
+"""In-memory search index over item names and descriptions.
+
+Text is split into normalized tokens so that component values written in
+different ways match each other: "3.3k", "3k3" and "3300" all produce the
+tokens "3300" and "3.3k" (plus the spelling used); "220 ohm", "220Ω" and
+"220ohms" all produce "220" and "ohm"; and "10µF" and "10 µF" both
+produce "10uf", "10" and "uf". Part numbers such as "2N2222" stay one
+token. Every token prefix is indexed up front, so an as-you-type query is a handful of dictionary
+lookups and set intersections instead of a scan of the catalog.
+
+`TrigramIndex` is the typo-tolerant counterpart used by the admin panel.
+"""
+import re
+
+# Resistor-style value: 3.3k, 4k7, 1M, 2meg2, 4R7, optionally followed by ohm(s)
+_VALUE_RE = re.compile(r"(\d+(?:\.\d+)?)(k|K|M|meg|MEG|R|r)?(\d*)(ohms?)?")
+_RAW_TOKEN_RE = re.compile(r"\d+(?:\.\d+)?[A-Za-z]*\d*|[^\W\d_]+")
+_NUMBER_RE = re.compile(r"\d+(?:\.\d+)?")
+# Number + unit word ("100nf"); part numbers like "2n2222" don't match
+_NUMBER_SUFFIX_RE = re.compile(r"(\d+(?:\.\d+)?)([a-z]+)")
+_MULTIPLIERS = {None: 1, "r": 1, "k": 1000, "m": 1000000, "meg": 1000000}
+_UNIT_ALIASES = {"ohms": "ohm", "Ω": "ohm", "ω": "ohm"}
+
+
+def _format_value(value):
+    if value == int(value):
+        return str(int(value))
+    return f"{value:g}"
+
+
+def _raw_tokens(text):
+    # Ohm signs (U+2126 and Greek capital omega) become a separate word
+    text = text.replace("\u2126", " ohm ").replace("\u03a9", " ohm ")
+    # Micro signs (U+00B5 and Greek mu) are typed as "u" on a keyboard
+    text = text.replace("\u00b5", "u").replace("\u03bc", "u")
+    return _RAW_TOKEN_RE.findall(text)
+
+
+def _value_forms(match):
+    """Spellings of a matched value: canonical ("3300"), as written ("3k3") and "3.3k"."""
+    number, prefix, fraction, unit = match.groups()
+    multiplier = _MULTIPLIERS[prefix.lower() if prefix else None]
+    if fraction:
+        # "4k7" style: the prefix letter stands in for the decimal point
+        value = float(f"{number}.{fraction}") if "." not in number else float(number)
+    else:
+        value = float(number)
+    value *= multiplier
+    canonical, written = _format_value(value), match.string[:match.end(3)].lower()
+    if value >= 1000000:
+        return canonical, written, _format_value(value / 1000000) + "m"
+    if value >= 1000:
+        return canonical, written, _format_value(value / 1000) + "k"
+    return canonical, written
+
+
+def normalize_tokens(text):
+    """Returns the list of normalized search tokens for `text` (for indexing).
+
+    Values are indexed in all their spellings, number+unit words both
+    whole and split ("10uf", "10", "uf"), and a number followed by a word
+    also joined ("10 uF" gives "10uf"), so a query can always be matched
+    token by token as it was typed.
+    """
+    if not text:
+        return []
+    tokens = []
+    previous = None
+    for raw in _raw_tokens(text):
+        match = _VALUE_RE.fullmatch(raw)
+        if match:
+            tokens.extend(dict.fromkeys(_value_forms(match)))
+            if match.group(4):
+                tokens.append("ohm")
+        else:
+            word = _UNIT_ALIASES.get(raw.lower(), raw.lower())
+            tokens.append(word)
+            match = _NUMBER_SUFFIX_RE.fullmatch(word)
+            if match:
+                # "100nf" is also findable as "100 nf"
+                tokens.append(_format_value(float(match.group(1))))
+                tokens.append(match.group(2))
+            elif previous is not None and _NUMBER_RE.fullmatch(previous) and word.isalpha():
+                tokens.append(_format_value(float(previous)) + word)
+        previous = raw
+    return tokens
+
+
+def query_terms(text):
+    """Returns the terms of a query, each a tuple of alternative tokens.
+
+    A value may match as written or in its canonical form: "3k3" is
+    ("3k3", "3300"). The written form is kept because the last term is
+    matched as a prefix while it is still being typed, and "3k" should
+    already show 3k3 parts rather than only 3000.
+    """
+    if not text:
+        return []
+    terms = []
+    for raw in _raw_tokens(text):
+        match = _VALUE_RE.fullmatch(raw)
+        if match:
+            canonical, written = _value_forms(match)[:2]
+            terms.append(tuple(dict.fromkeys((written, canonical))))
+            if match.group(4):
+                terms.append(("ohm",))
+        else:
+            terms.append((_UNIT_ALIASES.get(raw.lower(), raw.lower()),))
+    return terms
+
+
+class SearchIndex:
+    """Token/prefix index from normalized text to item keys (item names)."""
+
+    MAX_PREFIX = 12  # longer query tokens are checked against item tokens directly
+
+    def __init__(self, fields=("name", "description")):
+        self.fields = fields
+        self._item_tokens = {}  # key -> set of tokens
+        self._prefixes = {}  # prefix -> set of keys
+        self._postings = {}  # whole token -> set of keys
+
+    def __len__(self):
+        return len(self._item_tokens)
+
+    def build(self, items):
+        """Indexes every item from scratch."""
+        self._item_tokens.clear()
+        self._prefixes.clear()
+        self._postings.clear()
+        for item in items:
+            self.add(item)
+
+    def _tokens_for(self, item):
+        tokens = set()
+        for field in self.fields:
+            tokens.update(normalize_tokens(str(item.get(field, ""))))
+        return tokens
+
+    def add(self, item):
+        key = item["name"]
+        if key in self._item_tokens:
+            self.remove(key)
+        tokens = self._tokens_for(item)
+        self._item_tokens[key] = tokens
+        for token in tokens:
+            self._postings.setdefault(token, set()).add(key)
+            for end in range(1, min(len(token), self.MAX_PREFIX) + 1):
+                self._prefixes.setdefault(token[:end], set()).add(key)
+
+    def remove(self, key):
+        tokens = self._item_tokens.pop(key, None)
+        if not tokens:
+            return
+        for token in tokens:
+            keys = self._postings.get(token)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._postings[token]
+            for end in range(1, min(len(token), self.MAX_PREFIX) + 1):
+                keys = self._prefixes.get(token[:end])
+                if keys is not None:
+                    keys.discard(key)
+                    if not keys:
+                        del self._prefixes[token[:end]]
+
+    def update(self, old_key, item):
+        """Re-indexes an item whose name and/or text may have changed."""
+        self.remove(old_key)
+        self.add(item)
+
+    def search(self, query):
+        """Returns the set of keys matching every term of `query` as a prefix.
+
+        Numbers that are already followed by another word must match
+        exactly, so "10 ohm" does not also find "100 ohm" or "1k ohm"; the
+        last term is always a prefix because it may still be being typed.
+        Returns None for an empty query (meaning: no filter).
+        """
+        terms = query_terms(query)
+        if not terms:
+            return None
+        last = len(terms) - 1
+        candidate_sets = []
+        for position, term in enumerate(terms):
+            keys = set()
+            for token in term:
+                if position != last and token[0].isdigit():
+                    keys |= self._postings.get(token, set())
+                else:
+                    keys |= self._prefix_keys(token)
+            if not keys:
+                return set()
+            candidate_sets.append(keys)
+        candidate_sets.sort(key=len)
+        result = set(candidate_sets[0])
+        for keys in candidate_sets[1:]:
+            result &= keys
+            if not result:
+                break
+        return result
+
+    def _prefix_keys(self, token):
+        keys = self._prefixes.get(token[:self.MAX_PREFIX], set())
+        if len(token) > self.MAX_PREFIX:
+            keys = {k for k in keys if any(t.startswith(token) for t in self._item_tokens[k])}
+        return keys
+
+
+def _trigrams(text):
+    """Returns the set of padded character trigrams of every word in `text`."""
+    grams = set()
+    for word in re.findall(r"\w+", text.lower()):
+        padded = f"  {word} "
+        for i in range(len(padded) - 2):
+            grams.add(padded[i:i + 3])
+    return grams
+
+
+class TrigramIndex:
+    """Typo-tolerant fuzzy index over item names and descriptions.
+
+    Items are indexed by character trigrams; a query is scored by the
+    share of its trigrams found in an item, with name matches weighted
+    double. Kept up to date with add/update/remove, no full rebuilds.
+    """
+
+    NAME_WEIGHT = 2
+    DESCRIPTION_WEIGHT = 1
+    MIN_SCORE = 0.35  # fraction of the query's best possible score
+
+    def __init__(self):
+        self._items = {}  # key -> item
+        self._item_grams = {}  # key -> {trigram: weight}
+        self._postings = {}  # trigram -> {key: weight}
+
+    def __len__(self):
+        return len(self._items)
+
+    def build(self, items):
+        self._items.clear()
+        self._item_grams.clear()
+        self._postings.clear()
+        for item in items:
+            self.add(item)
+
+    def add(self, item):
+        key = item["name"]
+        if key in self._items:
+            self.remove(key)
+        grams = {g: self.DESCRIPTION_WEIGHT for g in _trigrams(str(item.get("description", "")))}
+        for g in _trigrams(key):
+            grams[g] = self.NAME_WEIGHT
+        self._items[key] = item
+        self._item_grams[key] = grams
+        for g, weight in grams.items():
+            self._postings.setdefault(g, {})[key] = weight
+
+    def remove(self, key):
+        self._items.pop(key, None)
+        for g in self._item_grams.pop(key, {}):
+            keys = self._postings.get(g)
+            if keys is not None:
+                keys.pop(key, None)
+                if not keys:
+                    del self._postings[g]
+
+    def update(self, old_key, item):
+        self.remove(old_key)
+        self.add(item)
+
+    def search(self, query, limit=None):
+        """Returns matching items, best first. None for an empty query."""
+        query_grams = _trigrams(query)
+        if not query_grams:
+            return None
+        scores = {}
+        for g in query_grams:
+            for key, weight in self._postings.get(g, {}).items():
+                scores[key] = scores.get(key, 0) + weight
+        best_possible = self.NAME_WEIGHT * len(query_grams)
+        threshold = self.MIN_SCORE * best_possible
+        ranked = sorted(
+            (key for key, score in scores.items() if score >= threshold),
+            key=lambda k: (-scores[k], k.lower()),
+        )
+        if limit is not None:
+            ranked = ranked[:limit]
+        return [self._items[key] for key in ranked]
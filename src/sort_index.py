@@ -0,0 +1,109 @@
+"""Precomputed sort orders over the catalog.
+
+Each sort order is kept as a sorted list of (sort key, item name) pairs.
+A single-item change (edit, stock change, sale) moves that one entry with
+a bisect removal and insertion, so switching the displayed order never
+needs a full re-sort.
+"""
+from bisect import bisect_left, insort
+
+SORT_CATALOG = "catalog"  # file order, handled by the screens themselves
+SORT_NAME = "name"
+SORT_PRICE = "price"
+SORT_STOCK = "stock"
+SORT_POPULARITY = "popularity"
+
+# Display labels for the sort selectors, in menu order
+SORT_LABELS = {
+    SORT_CATALOG: "Default",
+    SORT_NAME: "Name",
+    SORT_PRICE: "Price",
+    SORT_STOCK: "Stock",
+    SORT_POPULARITY: "Popularity",
+}
+
+
+def order_for_label(label):
+    """Maps a selector label back to its sort order (SORT_CATALOG if unknown)."""
+    for order, text in SORT_LABELS.items():
+        if text == label:
+            return order
+    return SORT_CATALOG
+
+
+_KEY_FUNCS = {
+    SORT_NAME: lambda item: (item["name"].lower(),),
+    SORT_PRICE: lambda item: (item.get("price", 0), item["name"].lower()),
+    SORT_STOCK: lambda item: (-item.get("quantity", 0), item["name"].lower()),
+    SORT_POPULARITY: lambda item: (-item.get("sold", 0), item["name"].lower()),
+}
+
+
+class SortIndex:
+    """Maintains every sort order in `_KEY_FUNCS` incrementally."""
+
+    def __init__(self):
+        self._items = {}  # name -> item
+        self._keys = {order: {} for order in _KEY_FUNCS}  # order -> {name: sort key}
+        self._sorted = {order: [] for order in _KEY_FUNCS}  # order -> [(sort key, name)]
+
+    def build(self, items):
+        self._items = {item["name"]: item for item in items}
+        for order, key_func in _KEY_FUNCS.items():
+            keys = {name: key_func(item) for name, item in self._items.items()}
+            self._keys[order] = keys
+            self._sorted[order] = sorted((key, name) for name, key in keys.items())
+
+    def add(self, item):
+        name = item["name"]
+        if name in self._items:
+            self.remove(name)
+        self._items[name] = item
+        for order, key_func in _KEY_FUNCS.items():
+            key = key_func(item)
+            self._keys[order][name] = key
+            insort(self._sorted[order], (key, name))
+
+    def remove(self, name):
+        if self._items.pop(name, None) is None:
+            return
+        for order in _KEY_FUNCS:
+            key = self._keys[order].pop(name)
+            self._discard(order, key, name)
+
+    def update(self, old_name, item):
+        self.remove(old_name)
+        self.add(item)
+
+    def item_changed(self, item):
+        """Repositions `item` in the orders whose sort key changed."""
+        name = item["name"]
+        if name not in self._items:
+            return
+        self._items[name] = item
+        for order, key_func in _KEY_FUNCS.items():
+            key = key_func(item)
+            old_key = self._keys[order][name]
+            if key != old_key:
+                self._discard(order, old_key, name)
+                insort(self._sorted[order], (key, name))
+                self._keys[order][name] = key
+
+    def _discard(self, order, key, name):
+        entries = self._sorted[order]
+        i = bisect_left(entries, (key, name))
+        if i < len(entries) and entries[i] == (key, name):
+            del entries[i]
+
+    def ordered_items(self, order):
+        """All items in the given order."""
+        items = self._items
+        return [items[name] for _, name in self._sorted[order]]
+
+    def sort_names(self, names, order):
+        """Orders a subset of item names (e.g. search matches) without a catalog scan."""
+        keys = self._keys[order]
+        return sorted((name for name in names if name in keys), key=lambda n: keys[n])
+
+    def item(self, name):
+        return self._items.get(name)
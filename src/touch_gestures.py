@@ -0,0 +1,189 @@
+"""Touch gesture recognizer for drag-to-scroll canvases.
+
+Discriminates taps from drags using a touch-slop distance instead of a
+fixed delay, coalesces motion events into at most one scroll per display
+frame, and continues scrolling with inertia after a fling.
+"""
+import time
+
+
+class TouchScroller:
+    """Vertical drag/tap/fling handling for a tk.Canvas.
+
+    The owner forwards its press, motion and release events to
+    `press`, `motion` and `release`. A press that is released without
+    moving further than `touch_slop` pixels is reported to `on_tap`
+    immediately; anything else scrolls the canvas.
+    """
+
+    FRAME_MS = 16  # ~60 Hz display frame
+    TOUCH_SLOP = 12  # px of travel before a press becomes a drag
+    VELOCITY_WINDOW = 0.1  # seconds of motion history used for fling velocity
+    MIN_FLING_VELOCITY = 150.0  # px/s below which a release does not fling
+    FRICTION = 0.95  # velocity retained per 60 Hz frame while flinging
+
+    def __init__(self, canvas, on_tap=None, touch_slop=None):
+        """Initialize the recognizer.
+
+        Args:
+            canvas: The tk.Canvas to scroll vertically
+            on_tap (callable, optional): Callback(event, payload) for taps
+            touch_slop (int, optional): Override for the tap/drag threshold in px
+        """
+        self.canvas = canvas
+        self.on_tap = on_tap
+        self.touch_slop = touch_slop if touch_slop is not None else self.TOUCH_SLOP
+        # Scroll in whole pixels so drag deltas map 1:1 onto the view
+        self.canvas.configure(yscrollincrement=1)
+
+        self._pressed = False
+        self._dragging = False
+        self._payload = None
+        self._start_y = 0
+        self._last_y = 0
+        self._pending_dy = 0
+        self._samples = []  # (seconds, y_root) of recent motion
+        self._event_clock = False  # samples use event.time rather than time.monotonic()
+        self._frame_job = None
+        self._fling_job = None
+        self._velocity = 0.0
+        self._fling_carry = 0.0
+        self._fling_last = 0.0
+        self._tap_suppressed = False
+
+    @property
+    def is_dragging(self):
+        return self._dragging
+
+    def press(self, event, payload=None):
+        """Starts tracking a touch. `payload` is handed back to on_tap."""
+        # Touching a flinging list only stops it; it must not also count as a tap
+        self._tap_suppressed = self._fling_job is not None
+        self.stop()
+        self._pressed = True
+        self._dragging = False
+        self._payload = payload
+        self._start_y = self._last_y = event.y_root
+        self._pending_dy = 0
+        # One clock per gesture: Tk's event.time (ms) if the press has it, else
+        # time.monotonic(); the two can't be compared with each other
+        self._event_clock = self._tk_time(event) is not None
+        self._samples = [(self._event_seconds(event), event.y_root)]
+
+    def motion(self, event):
+        """Accumulates motion; scrolling is applied once per frame."""
+        if not self._pressed:
+            return
+        if not self._dragging:
+            if abs(event.y_root - self._start_y) < self.touch_slop:
+                return
+            self._dragging = True
+            self._payload = None
+        self._pending_dy += event.y_root - self._last_y
+        self._last_y = event.y_root
+
+        now = self._event_seconds(event)
+        if now is not None:
+            self._samples.append((now, event.y_root))
+            while len(self._samples) > 2 and now - self._samples[0][0] > self.VELOCITY_WINDOW:
+                self._samples.pop(0)
+
+        if self._frame_job is None:
+            self._frame_job = self.canvas.after(self.FRAME_MS, self._flush)
+
+    def release(self, event):
+        """Ends the touch: fires a tap, or hands a drag over to inertia."""
+        if not self._pressed:
+            return
+        self._pressed = False
+        if not self._dragging:
+            payload = self._payload
+            self._payload = None
+            if self.on_tap and not self._tap_suppressed:
+                self.on_tap(event, payload)
+            return
+
+        self._dragging = False
+        if self._frame_job is not None:
+            self.canvas.after_cancel(self._frame_job)
+        self._flush()
+
+        self._velocity = self._release_velocity(event)
+        if abs(self._velocity) >= self.MIN_FLING_VELOCITY:
+            self._fling_carry = 0.0
+            self._fling_last = time.monotonic()
+            self._fling_job = self.canvas.after(self.FRAME_MS, self._fling_step)
+
+    def stop(self):
+        """Cancels any pending frame flush or inertial scroll."""
+        for job in (self._frame_job, self._fling_job):
+            if job is not None:
+                try:
+                    self.canvas.after_cancel(job)
+                except Exception:
+                    pass
+        self._frame_job = None
+        self._fling_job = None
+        self._velocity = 0.0
+
+    def _flush(self):
+        """Applies the motion accumulated since the last frame."""
+        self._frame_job = None
+        dy = int(self._pending_dy)
+        if dy:
+            self._pending_dy -= dy
+            self.canvas.yview_scroll(-dy, "units")
+
+    def _release_velocity(self, event):
+        """Returns the finger velocity in px/s over the recent motion window."""
+        now = self._event_seconds(event)
+        if now is None:
+            now = self._samples[-1][0]
+        samples = [s for s in self._samples if now - s[0] <= self.VELOCITY_WINDOW]
+        if len(samples) < 2:
+            return 0.0
+        dt = samples[-1][0] - samples[0][0]
+        if dt <= 0:
+            return 0.0
+        return (samples[-1][1] - samples[0][1]) / dt
+
+    def _fling_step(self):
+        """Scrolls one frame of inertia and decays the velocity."""
+        self._fling_job = None
+        now = time.monotonic()
+        dt = now - self._fling_last
+        self._fling_last = now
+
+        self._fling_carry += self._velocity * dt
+        dy = int(self._fling_carry)
+        if dy:
+            self._fling_carry -= dy
+            before = self.canvas.yview()
+            self.canvas.yview_scroll(-dy, "units")
+            if self.canvas.yview() == before:
+                # Hit the top or bottom of the scroll region
+                self._velocity = 0.0
+                return
+
+        self._velocity *= self.FRICTION ** (dt * 60)
+        if abs(self._velocity) >= self.MIN_FLING_VELOCITY / 3:
+            self._fling_job = self.canvas.after(self.FRAME_MS, self._fling_step)
+        else:
+            self._velocity = 0.0
+
+    def _event_seconds(self, event):
+        """Timestamp of an event in seconds on the gesture's clock.
+
+        None if the gesture runs on event time and this event has none.
+        """
+        if not self._event_clock:
+            return time.monotonic()
+        return self._tk_time(event)
+
+    @staticmethod
+    def _tk_time(event):
+        """Tk's timestamp of an event in seconds, or None (e.g. generated events)."""
+        event_time = getattr(event, "time", None)
+        if isinstance(event_time, int) and event_time > 0:
+            return event_time / 1000.0
+        return None
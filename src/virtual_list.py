@@ -0,0 +1,113 @@
+"""Virtualized, row-recycling list for a scrollable tk.Canvas.
+
+Only the rows intersecting the visible part of the canvas (plus a small
+overscan) exist as widgets. Rows are pooled and re-bound to new data as
+the view scrolls, so opening or refreshing a list costs the same for 20
+items as for 5,000.
+"""
+import math
+
+
+class VirtualList:
+    """Fixed-row-height list that builds widgets only for visible rows."""
+
+    def __init__(self, canvas, row_height, create_row, bind_row, overscan=2):
+        """Initialize the list.
+
+        Args:
+            canvas: The tk.Canvas to draw into; its yscrollcommand is taken over
+            row_height (int): Height of every row in pixels (including spacing)
+            create_row (callable): create_row(parent) -> new row widget
+            bind_row (callable): bind_row(row, item) fills a row with an item
+            overscan (int): Extra rows kept built above and below the view
+        """
+        self.canvas = canvas
+        self.row_height = row_height
+        self.create_row = create_row
+        self.bind_row = bind_row
+        self.overscan = overscan
+        self.items = []
+        self._width = 1
+        self._visible = {}  # item index -> (row widget, canvas window id)
+        self._free = []  # (row widget, canvas window id) not currently shown
+        self._layout_job = None
+        self._external_yscroll = None
+        self.canvas.configure(yscrollcommand=self._on_yscroll)
+
+    def set_yscrollcommand(self, command):
+        """Chains an extra yscrollcommand (e.g. a scrollbar) after the list's own."""
+        self._external_yscroll = command
+
+    def set_items(self, items, keep_position=True):
+        """Replaces the list contents, keeping the scroll position by default."""
+        top = self.canvas.canvasy(0) if keep_position else 0
+        self.items = items
+        total = max(1, len(items) * self.row_height)
+        self.canvas.configure(scrollregion=(0, 0, self._width, total))
+        self.canvas.yview_moveto(min(top, total) / total)
+        self.refresh()
+
+    def refresh(self):
+        """Re-binds every visible row to its (possibly changed) item."""
+        for index, (row, _) in list(self._visible.items()):
+            if index < len(self.items):
+                self.bind_row(row, self.items[index])
+        self.layout()
+
+    def refresh_item(self, item):
+        """Re-binds the row currently showing `item`, if it is visible."""
+        for index, (row, _) in self._visible.items():
+            if index < len(self.items) and self.items[index] is item:
+                self.bind_row(row, item)
+
+    def on_resize(self, width):
+        """Call from the canvas <Configure> handler."""
+        self._width = max(1, width)
+        total = max(1, len(self.items) * self.row_height)
+        self.canvas.configure(scrollregion=(0, 0, self._width, total))
+        for _, window in list(self._visible.values()) + self._free:
+            self.canvas.itemconfigure(window, width=self._width)
+        self.layout()
+
+    def _on_yscroll(self, first, last):
+        # Called by Tk on every view change; coalesce into one layout pass
+        if self._layout_job is None:
+            self._layout_job = self.canvas.after_idle(self.layout)
+        if self._external_yscroll:
+            self._external_yscroll(first, last)
+
+    def layout(self):
+        """Builds, recycles and positions rows for the current view."""
+        if self._layout_job is not None:
+            try:
+                self.canvas.after_cancel(self._layout_job)
+            except Exception:
+                pass
+            self._layout_job = None
+
+        top = self.canvas.canvasy(0)
+        height = max(1, self.canvas.winfo_height())
+        first = max(0, int(top // self.row_height) - self.overscan)
+        last = min(len(self.items), int(math.ceil((top + height) / self.row_height)) + self.overscan)
+
+        # Recycle rows that scrolled out of range
+        for index in [i for i in self._visible if i < first or i >= last]:
+            row, window = self._visible.pop(index)
+            # Park it above the scroll region, where it can never be seen
+            self.canvas.coords(window, 0, -2 * self.row_height)
+            self._free.append((row, window))
+
+        for index in range(first, last):
+            if index in self._visible:
+                continue
+            if self._free:
+                row, window = self._free.pop()
+                self.canvas.coords(window, 0, index * self.row_height)
+            else:
+                row = self.create_row(self.canvas)
+                window = self.canvas.create_window(
+                    0, index * self.row_height, window=row, anchor="nw",
+                    width=self._width, height=self.row_height,
+                )
+            self.bind_row(row, self.items[index])
+            self._visible[index] = (row, window)
@@ -0,0 +1,67 @@
+"""Window-manager state cache for the main Tk window.
+
+Every attribute, overrideredirect, state and geometry change is a round
+trip to the window manager. `WindowStateController` remembers what it last
+applied and only issues the calls whose value actually differs.
+"""
+
+
+class WindowStateController:
+    """Applies window-manager settings to a Tk root, skipping no-op changes."""
+
+    def __init__(self, root):
+        self.root = root
+        self._attributes = {}  # '-fullscreen', '-type', ... -> last applied value
+        self._overrideredirect = None
+        self._state = None
+        self._geometry = None
+
+    def invalidate(self):
+        """Forgets the cached state, e.g. after the window was changed externally."""
+        self._attributes.clear()
+        self._overrideredirect = None
+        self._state = None
+        self._geometry = None
+
+    def set_attribute(self, name, value):
+        """Sets a `wm attributes` value. Returns True if a call was made."""
+        if name in self._attributes and self._attributes[name] == value:
+            return False
+        self.root.attributes(name, value)
+        self._attributes[name] = value
+        return True
+
+    def set_overrideredirect(self, flag):
+        flag = bool(flag)
+        if self._overrideredirect == flag:
+            return False
+        self.root.overrideredirect(flag)
+        self._overrideredirect = flag
+        return True
+
+    def set_state(self, state):
+        if self._state == state:
+            return False
+        self.root.state(state)
+        self._state = state
+        return True
+
+    def set_geometry(self, geometry):
+        if self._geometry == geometry:
+            return False
+        self.root.geometry(geometry)
+        self._geometry = geometry
+        return True
+
+    def apply(self, steps):
+        """Applies a sequence of (setter name, *args) steps in order.
+
+        Example: apply([('attribute', '-fullscreen', True), ('overrideredirect', True)])
+
+        Returns:
+            bool: True if at least one window-manager call was issued
+        """
+        changed = False
+        for name, *args in steps:
+            changed = getattr(self, f"set_{name}")(*args) or changed
+        return changed